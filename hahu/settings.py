@@ -14,6 +14,8 @@ from pathlib import Path
 
 # for the payment 
 import os
+import sys
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -53,6 +55,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # for serving static files in production
+    'hahuapp.request_metrics.RequestMetricsMiddleware',  # Queries and timings per view, see below
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -87,14 +90,125 @@ WSGI_APPLICATION = 'hahu.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+# DB_PROFILE picks the defaults: dev and test use SQLite, prod uses PostgreSQL
+# (through `psycopg[pool]`, see requirements.txt). DB_ENGINE, DB_NAME,
+# DB_USER, DB_PASSWORD, DB_HOST and DB_PORT override them.
+
+DB_PROFILE = os.getenv('DB_PROFILE', 'dev')
+DB_ENGINE = os.getenv('DB_ENGINE', 'postgresql' if DB_PROFILE == 'prod' else 'sqlite3')
+
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # WAL lets pages keep reading while a write commits. Writers take
+                # the lock when their transaction starts and wait up to
+                # DB_BUSY_TIMEOUT seconds for it instead of failing with
+                # "database is locked".
+                'init_command': (
+                    'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;'
+                    if DB_PROFILE != 'test' else 'PRAGMA synchronous=OFF;'
+                ),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': int(os.getenv('DB_BUSY_TIMEOUT', 20)),
+            },
+            # Tests get a file rather than the in-memory default, so the live
+            # server's threads (see LoadTestTests) each open a connection of
+            # their own, as workers do. One per test run, so runs of other
+            # checkouts on the same host don't share it.
+            'TEST': {'NAME': os.getenv(
+                'DB_TEST_NAME', os.path.join(tempfile.gettempdir(), f'hahu_test_{os.getpid()}.sqlite3'),
+            )},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': f'django.db.backends.{DB_ENGINE}',
+            'NAME': os.getenv('DB_NAME', 'hahu'),
+            'USER': os.getenv('DB_USER', 'hahu'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', ''),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if DB_ENGINE == 'postgresql' and os.getenv('DB_POOL_SIZE'):
+        # A psycopg connection pool per process, shared by its threads. It
+        # replaces persistent connections, which Django doesn't allow with it.
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_SIZE')),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+    else:
+        # Keep each worker's connection open between requests
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND picks the backend: locmem (one cache per process, the default),
+# file (shared by the processes of one host) or redis (shared by every host,
+# needs the `redis` package). CACHE_LOCATION overrides where it keeps its data.
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'hahu'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(BASE_DIR, 'tmp', 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'hahu'),
+        'TIMEOUT': 300,
     }
 }
 
 
+# Request metrics
+# hahuapp/request_metrics.py times every request per URL name; the staff page
+# is custom-admin/request-metrics/. SERVER_TIMING adds a Server-Timing header
+# (on by default with DEBUG), and requests slower than SLOW_REQUEST_MS are
+# logged with their queries to SLOW_REQUEST_LOG, rotated at 5 MB. Under
+# `manage.py test` the log defaults to a file of the run in the temp directory,
+# so the slow requests of the tests stay out of tmp/slow_requests.log.
+
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', '1') == '1'
+SERVER_TIMING = os.getenv('SERVER_TIMING', '1' if DEBUG else '0') == '1'
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_LOG = os.getenv('SLOW_REQUEST_LOG', (
+    os.path.join(tempfile.gettempdir(), f'hahu_slow_requests_{os.getpid()}.log')
+    if sys.argv[1:2] == ['test'] else os.path.join(BASE_DIR, 'tmp', 'slow_requests.log')
+))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_requests': {
+            # Creates the directory of the log on the first slow request
+            'class': 'hahuapp.request_metrics.SlowRequestFileHandler',
+            'filename': SLOW_REQUEST_LOG,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'hahuapp.slow_requests': {'handlers': ['slow_requests'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -136,6 +250,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
+# In production the web server serves MEDIA_ROOT. SERVE_MEDIA=1 serves it
+# from hahuapp/media.py instead, with byte ranges and cache validators;
+# otherwise DEBUG falls back to Django's static() view.
+SERVE_MEDIA = os.getenv('SERVE_MEDIA', '0') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -0,0 +1,246 @@
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from django import forms
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import Q
+
+from .models import (
+    AmharicEnglishMatching,
+    AmharicLetterAudio,
+    AmharicLetterFamily,
+    DescriptiveImage,
+    DescriptiveSentenceQuestion,
+    FillInTheBlank,
+    LetterFillIn,
+    Level,
+    Module,
+    Numbers,
+    NumberToWord,
+    Paragraph,
+    ParagraphCreation,
+    Passage,
+    PointHistory,
+    Sentence,
+    SentencePunctuation,
+    SentenceSynonym,
+    Slide,
+    SlideContent,
+    SlideQuestion,
+    Story,
+    StoryPart,
+    StoryQuestion,
+    UserLevelProgress,
+    UserModuleProgress,
+    UserProfile,
+    UserSlideProgress,
+    Video,
+    VideoResponse,
+    VoiceRecording,
+    WordAudio,
+    WordAudioRecording,
+    WritingSubmission,
+)
+
+### ---------------- Custom Admin Lists -------------------
+#
+# The *_customadmin pages list their rows PER_PAGE at a time, newest first,
+# with keyset pagination: the next page is the rows with a pk below the last
+# one shown (?after=pk), the previous one those above the first (?before=pk).
+# Both are a range scan of the primary key, so a page deep into a million
+# PointHistory rows costs the same as the first one, which OFFSET can't do.
+#
+# Each page is described in LISTS: the foreign keys to select_related for the
+# columns it shows, the text fields ?q= searches (icontains, or the pk for a
+# number) and the fields it can be filtered on, exact matches taken from the
+# query string. A foreign key filter, like the foreign key fields of the
+# forms, is an AutocompleteSelect: a search box that asks admin_autocomplete
+# for AUTOCOMPLETE_LIMIT matches from SOURCES, instead of a <select> of every
+# user or slide.
+
+PER_PAGE = 50
+AUTOCOMPLETE_LIMIT = 20
+CURSORS = ('after', 'before')
+
+AdminList = namedtuple('AdminList', ['model', 'related', 'search', 'filters'], defaults=((), (), ()))
+
+# name -> what the ?q= of an autocomplete searches and the relations its labels (str()) need
+Source = namedtuple('Source', ['model', 'search', 'related'], defaults=((),))
+
+SOURCES = {
+    'user': Source(User, ('username', 'email')),
+    'profile': Source(UserProfile, ('full_name', 'user__username')),
+    'level': Source(Level, ('name',)),
+    'module': Source(Module, ('name',), ('level',)),
+    'slide': Source(Slide, ('title',), ('module__level',)),
+    'story': Source(Story, ('title',)),
+    'story_part': Source(StoryPart, ('story__title',), ('story',)),
+    'letter_family': Source(AmharicLetterFamily, ('letter',)),
+    'video': Source(Video, ('title',)),
+    'word_audio': Source(WordAudio, ('word',)),
+}
+SOURCE_FOR_MODEL = {source.model: name for name, source in SOURCES.items()}
+
+LISTS = {
+    'sentence': AdminList(Sentence, search=('sentence', 'definition'), filters=('is_active',)),
+    'passage': AdminList(Passage, search=('paragraph', 'main_idea')),
+    'descriptive_image': AdminList(DescriptiveImage, search=('correct_word',)),
+    'descriptive_sentence_question': AdminList(DescriptiveSentenceQuestion, search=('correct_sentence',)),
+    'fill_in_the_blank': AdminList(FillInTheBlank, search=('question', 'correct_answer')),
+    'numbers': AdminList(Numbers, search=('word', 'amharic_word')),
+    'writing_submission': AdminList(WritingSubmission, ('user',), ('content',), ('user',)),
+    'video': AdminList(Video, search=('title',)),
+    'video_response': AdminList(VideoResponse, ('video', 'student'), ('response',), ('video', 'student')),
+    'word_audio_recording': AdminList(WordAudioRecording, ('word_audio', 'user'), filters=('word_audio', 'user')),
+    'paragraph': AdminList(Paragraph, search=('content', 'definition'), filters=('is_active',)),
+    'voice_recording': AdminList(VoiceRecording, search=('student_name',)),
+    'paragraph_creation': AdminList(ParagraphCreation, search=('correct_paragraph',)),
+    'amharic_letter_family': AdminList(AmharicLetterFamily, search=('letter',)),
+    'amharic_letter_audio': AdminList(AmharicLetterAudio, ('family',), ('letter',), ('family',)),
+    'letter_fill_in': AdminList(LetterFillIn, search=('correct_word', 'display_word', 'meaning')),
+    'number_to_word': AdminList(NumberToWord, search=('amharic_number', 'number_name')),
+    'amharic_english_matching': AdminList(AmharicEnglishMatching, search=('amharic_sentence', 'english_sentence')),
+    'sentence_synonym': AdminList(SentenceSynonym, search=('sentence', 'correct_word')),
+    'sentence_punctuation': AdminList(SentencePunctuation, search=('text', 'correct_text')),
+    'story': AdminList(Story, search=('title', 'description')),
+    'story_part': AdminList(StoryPart, ('story',), ('text_content',), ('story',)),
+    'story_question': AdminList(StoryQuestion, ('part__story',), ('question_text',), ('part',)),
+    'level': AdminList(Level, search=('name', 'description')),
+    'module': AdminList(Module, ('level',), ('name',), ('level',)),
+    'slide': AdminList(Slide, ('module__level',), ('title',), ('module',)),
+    'slide_content': AdminList(SlideContent, ('slide__module__level',), ('text_content',), ('slide', 'content_type')),
+    'slide_question': AdminList(SlideQuestion, ('slide__module__level',), ('question_text',), ('slide',)),
+    'user_slide_progress': AdminList(UserSlideProgress, ('user', 'slide__module__level'), filters=('user', 'slide', 'is_completed')),
+    'user_level_progress': AdminList(UserLevelProgress, ('user', 'level'), filters=('user', 'level', 'is_locked')),
+    'user_module_progress': AdminList(UserModuleProgress, ('user', 'module__level'), filters=('user', 'module', 'is_locked')),
+    'user_profile': AdminList(
+        UserProfile, ('user', 'related_level'), ('full_name', 'referral_code'), ('related_level', 'is_subscribed'),
+    ),
+    # Searching the reason is a scan, filter by learner first on a big table
+    'point_history': AdminList(PointHistory, ('user_profile',), ('reason',), ('user_profile', 'reason_code')),
+}
+
+# rows: the page; query/filters: the search and filters as shown; newer/older:
+# the query strings of the neighbouring pages, None at either end
+Listing = namedtuple('Listing', ['rows', 'query', 'filters', 'newer', 'older'])
+
+YES_NO = [('1', 'Yes'), ('0', 'No')]
+
+
+def _search(fields, query):
+    # isdecimal(), not isdigit(): int() can't read superscripts like ² or Ethiopic numerals like ፩
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+    if query.isdecimal():
+        condition |= Q(pk=int(query))
+    return condition
+
+
+def _filter(model, name, value):
+    """The row for the filter on field `name` and its lookup, or (row, None) without a valid value."""
+    field = model._meta.get_field(name)
+    row = {'name': name, 'label': field.verbose_name.capitalize(), 'value': value}
+    lookup = None
+    if isinstance(field, models.ForeignKey):
+        source = SOURCE_FOR_MODEL[field.related_model]
+        row.update(source=source, text='')
+        if value.isdecimal():
+            lookup = {field.attname: int(value)}
+            row['text'] = autocomplete_label(source, value)
+    elif isinstance(field, models.BooleanField):
+        row['choices'] = YES_NO
+        if value in ('1', '0'):
+            lookup = {name: value == '1'}
+    else:
+        row['choices'] = [(str(key), label) for key, label in field.choices]
+        if value in dict(row['choices']):
+            lookup = {name: value}
+    if lookup is None:
+        row['value'] = ''
+    return row, lookup
+
+
+def listing(request, name):
+    """A page of the list `name` of LISTS, for the search, filters and cursor in request.GET."""
+    spec = LISTS[name]
+    queryset = spec.model.objects.all()
+    if spec.related:
+        queryset = queryset.select_related(*spec.related)
+
+    query = request.GET.get('q', '').strip()
+    if query and spec.search:
+        queryset = queryset.filter(_search(spec.search, query))
+    filters = []
+    for field in spec.filters:
+        row, lookup = _filter(spec.model, field, request.GET.get(field, '').strip())
+        filters.append(row)
+        if lookup:
+            queryset = queryset.filter(**lookup)
+
+    after, before = (request.GET.get(cursor, '') for cursor in CURSORS)
+    if before.isdecimal():
+        rows = list(queryset.filter(pk__gt=int(before)).order_by('pk')[:PER_PAGE + 1])
+        has_newer, has_older = len(rows) > PER_PAGE, True
+        rows = rows[:PER_PAGE][::-1]
+    else:
+        if after.isdecimal():
+            queryset = queryset.filter(pk__lt=int(after))
+        rows = list(queryset.order_by('-pk')[:PER_PAGE + 1])
+        has_newer, has_older = after.isdecimal(), len(rows) > PER_PAGE
+        rows = rows[:PER_PAGE]
+
+    params = [(key, value) for key, value in request.GET.items() if key not in CURSORS and value]
+    newer = older = None
+    if rows:
+        if has_newer:
+            newer = urlencode(params + [('before', rows[0].pk)])
+        if has_older:
+            older = urlencode(params + [('after', rows[-1].pk)])
+    elif after.isdecimal() or before.isdecimal():
+        newer = urlencode(params)  # Ran off the end, back to the first page
+    return Listing(rows, query, filters, newer, older)
+
+
+def autocomplete(source, query):
+    """[{'id', 'text'}] of up to AUTOCOMPLETE_LIMIT rows of SOURCES[source] matching `query`, newest first."""
+    spec = SOURCES[source]
+    queryset = spec.model.objects.all()
+    if spec.related:
+        queryset = queryset.select_related(*spec.related)
+    if query:
+        queryset = queryset.filter(_search(spec.search, query))
+    return [{'id': row.pk, 'text': str(row)} for row in queryset.order_by('-pk')[:AUTOCOMPLETE_LIMIT]]
+
+
+def autocomplete_label(source, pk):
+    spec = SOURCES[source]
+    row = spec.model.objects.select_related(*spec.related).filter(pk=pk).first()
+    return str(row) if row else ''
+
+
+class AutocompleteSelect(forms.Widget):
+    """A search box in place of a <select> of every row, for a ModelChoiceField."""
+
+    template_name = 'admin_lists/autocomplete_widget.html'
+
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        value = context['widget']['value']
+        context['widget'].update(source=self.source, label=autocomplete_label(self.source, value) if value else '')
+        return context
+
+
+def autocomplete_widgets(model, fields):
+    """{field: AutocompleteSelect} for the foreign keys among `fields` of `model`, for a ModelForm's Meta.widgets."""
+    widgets = {}
+    for name in fields:
+        field = model._meta.get_field(name)
+        if isinstance(field, models.ForeignKey):
+            widgets[name] = AutocompleteSelect(SOURCE_FOR_MODEL[field.related_model])
+    return widgets
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HahuappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hahuapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registers the signal receivers)
@@ -1,7 +1,7 @@
 from django.shortcuts import redirect
 from django.urls import reverse
-from django.utils.timezone import now
-from .models import UserProfile, PointHistory
+from .models import UserProfile
+from . import ledger
 
 def create_user_profile(backend, user, response, *args, **kwargs):
     request = kwargs.get('request')
@@ -28,20 +28,9 @@ def award_daily_login_bonus(backend, user, response, *args, **kwargs):
     try:
         # Fetch the user profile
         profile = UserProfile.objects.get(user=user)
-        today = now().date()
 
-        # Check if the bonus has already been awarded today
-        if profile.last_login_bonus_date != today:
-            profile.aura_points += 10
-            profile.last_login_bonus_date = today
-            profile.save()
-
-            # Log the transaction in PointHistory
-            PointHistory.objects.create(
-                user_profile=profile,
-                points=10,
-                reason="Daily login bonus"
-            )
+        # The ledger checks whether the bonus has already been awarded today
+        if ledger.award_daily_login_bonus(profile):
             print(f"Daily login bonus awarded: {profile.aura_points} Aura points")
         else:
             print("Login bonus already awarded today")
@@ -0,0 +1,275 @@
+import json
+import logging
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import round_bank, synthetic
+from .models import (
+    Level,
+    LetterVideo,
+    Module,
+    Sentence,
+    Slide,
+    StoryPart,
+    UserLevelProgress,
+    UserModuleProgress,
+    UserProfile,
+    Video,
+)
+from .urls import urlpatterns
+
+### ---------------- View Benchmarks -------------------
+#
+# Times every page a learner or the staff can GET: the games, the lesson
+# slides, the leaderboard and the custom admin. It runs against a throwaway
+# test database filled by synthetic.py (content, learners and placeholder
+# media), as a staff learner with every level unlocked. For each page it
+# records the number of queries, the p50/p95 of `repeat` requests after a
+# warm-up, and the peak memory Python allocated while rendering it once more.
+#
+# Reports are JSON (see run()), tagged with the commit, so two runs can be
+# compared with compare() to catch a page that gained queries or slowed down.
+# Run it with `manage.py benchmark_views`, or as tests with the pytest plugin
+# in pytest_view_benchmarks.py.
+
+REPEAT = 20
+LATENCY_FACTOR = 1.5  # p95 slower than this times the baseline is a regression
+USERNAME = 'bench-views'
+ROUNDS_PER_GAME = 200  # Round bank boards, see round_bank.py
+
+Endpoint = namedtuple('Endpoint', ['name', 'group', 'path'])
+
+# Pages that change state on GET, serve files, or only take POSTs
+EXCLUDED = {
+    'logout', 'payment_page', 'success', 'cancel', 'reset-activity', 'award-points',
+    'update_event', 'delete_event', 'submit_slide_question', 'submit-video-response',
+    'submit-word-audio-recording', 'start-recording-upload', 'recording-upload-chunk',
+    'check-answer', 'media', 'media-bundle',
+}
+
+
+def _first_pk(queryset):
+    return queryset.order_by('pk').values_list('pk', flat=True).first()
+
+
+# URL name: the arguments to reverse() it with, from the synthetic content
+ARGUMENTS = {
+    'view_slide': lambda: [_first_pk(Slide.objects)],
+    'story-telling-part': lambda: [_first_pk(StoryPart.objects.filter(part_number=1).values('story')), 1],
+    'sentence-audio-game': lambda: [_first_pk(Sentence.objects)],
+    'video-game-with_id': lambda: [_first_pk(Video.objects)],
+    'letter-copy-with-pk': lambda: [_first_pk(LetterVideo.objects)],
+    'manage_modules': lambda: [_first_pk(Level.objects)],
+    'manage_slides': lambda: [_first_pk(Module.objects)],
+    'create_slide_content': lambda: [_first_pk(Slide.objects)],
+}
+
+
+def _group(name, route):
+    if route.startswith(('custom-admin/', 'add/')):
+        return 'admin'
+    if route.startswith(('slides/', 'slide/')):
+        return 'lesson'
+    if name == 'leaderboard':
+        return 'leaderboard'
+    if route.startswith('games/') or name not in ('home', 'signup', 'login', 'user_profile', 'event_list', 'error_page'):
+        return 'game'
+    return 'other'
+
+
+def endpoints(only=None):
+    """The Endpoints to measure, in URLconf order. `only`: names or groups to keep."""
+    found, seen = [], set()
+    for pattern in urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        name = pattern.name
+        if name in EXCLUDED or name in seen:
+            continue
+        seen.add(name)
+        route = str(pattern.pattern)
+        group = _group(name, route)
+        if only and name not in only and group not in only:
+            continue
+        if pattern.pattern.converters:
+            if name not in ARGUMENTS:
+                continue
+            args = ARGUMENTS[name]()
+            if None in args:
+                continue  # No content to point it at
+            path = reverse(name, args=args)
+        else:
+            path = reverse(name)
+        found.append(Endpoint(name, group, path))
+    return found
+
+
+def benchmark_user():
+    """A staff learner on the top level, with every level and module unlocked."""
+    user = User.objects.create_superuser(USERNAME, f'{USERNAME}@example.com', USERNAME)
+    UserProfile.objects.create(
+        user=user, full_name=USERNAME, referral_code='BENCHVIEWS', rank='1',
+        related_level=Level.objects.order_by('-order').first(), is_subscribed=True,
+        last_login_bonus_date=timezone.localdate(),
+    )
+    UserLevelProgress.objects.bulk_create(UserLevelProgress(user=user, level=level, is_locked=False) for level in Level.objects.all())
+    UserModuleProgress.objects.bulk_create(UserModuleProgress(user=user, module=module, is_locked=False) for module in Module.objects.all())
+    return user
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(int(len(ordered) * fraction + 0.5) - 1, 0)]
+
+
+def measure(client, path, repeat=REPEAT):
+    """{'status', 'queries', 'p50_ms', 'p95_ms', 'peak_kb'} of GET `path`."""
+    client.get(path)  # Warm-up: templates, caches, the course outline
+    timings, queries = [], 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append(time.perf_counter() - started)
+        queries = max(queries, len(captured))  # Views that draw at random may vary
+
+    # Memory on its own pass, tracemalloc slows everything down
+    tracemalloc.start()
+    try:
+        client.get(path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'queries': queries,
+        'p50_ms': round(_percentile(timings, 0.5) * 1000, 2),
+        'p95_ms': round(_percentile(timings, 0.95) * 1000, 2),
+        'peak_kb': round(peak / 1024),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare(rows, seed=0):
+    """Fill the (empty, test) database and return a logged-in Client and what was created."""
+    content = synthetic.populate(rows, seed=seed)
+    content.update(synthetic.populate_learners(max(rows // 10, 1), point_history=rows, slide_progress=5, seed=seed))
+    synthetic.write_media()
+    for game in round_bank.SOURCES:
+        round_bank.store(game, round_bank.generate(game, count=ROUNDS_PER_GAME, workers=1, seed=seed))
+    client = Client(raise_request_exception=False)  # A failing page is reported with its status
+    client.force_login(benchmark_user())
+    return client, content
+
+
+def make_report(rows, repeat, content, results):
+    return {
+        'commit': git_commit(),
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'rows': rows,
+        'repeat': repeat,
+        'content': content,
+        'results': results,
+    }
+
+
+def run(rows, repeat=REPEAT, only=None, seed=0, on_result=None):
+    """
+    Benchmark every endpoint against `rows` rows of synthetic content, returns
+    the report: {'commit', 'created_at', 'database', 'rows', 'repeat',
+    'content': {model: rows}, 'results': {url name: {'group', 'path', ...measure()}}}.
+    `on_result(endpoint, result)` is called as each page is done.
+    """
+    client, content = prepare(rows, seed)
+    results = {}
+    for endpoint in endpoints(only):
+        result = {'group': endpoint.group, 'path': endpoint.path, **measure(client, endpoint.path, repeat)}
+        results[endpoint.name] = result
+        if on_result:
+            on_result(endpoint, result)
+    return make_report(rows, repeat, content, results)
+
+
+def compare(report, baseline, latency_factor=LATENCY_FACTOR):
+    """{url name: [regression, ...]} for the pages of `report` that did worse than in `baseline`."""
+    regressions = {}
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        found = []
+        if result['status'] >= 500 > before['status']:
+            found.append(f"status {before['status']} -> {result['status']}")
+        if result['queries'] > before['queries']:
+            found.append(f"queries {before['queries']} -> {result['queries']}")
+        if result['p95_ms'] > before['p95_ms'] * latency_factor:
+            found.append(f"p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+        if found:
+            regressions[name] = found
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as report:
+        return json.load(report)
+
+
+def save(report, path):
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2, ensure_ascii=False)
+
+
+@contextmanager
+def isolated_database():
+    """
+    A fresh test database (as `manage.py test` makes), an empty cache and a
+    temporary MEDIA_ROOT for the benchmark; the real data is never touched.
+    Server errors are left to the report rather than logged with a traceback.
+    """
+    request_logger = logging.getLogger('django.request')
+    log_level = request_logger.level
+    request_logger.setLevel(logging.CRITICAL)
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    media_root = tempfile.mkdtemp()
+    try:
+        with override_settings(MEDIA_ROOT=media_root):
+            cache.clear()
+            yield
+    finally:
+        cache.clear()
+        shutil.rmtree(media_root, ignore_errors=True)
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+        request_logger.setLevel(log_level)
@@ -0,0 +1,69 @@
+import random
+
+from . import word_grid
+
+### ---------------- Game Boards -------------------
+#
+# Builders for the boards of games that take real work to set up. They are
+# plain functions of a `source` (the content they draw from, as plain lists)
+# and a random.Random, with no database access, so the round bank can run
+# them in worker processes (see round_bank.py) and views can still call them
+# directly when the bank is empty.
+#
+# A builder returns the board as JSON-ready data, or None when it couldn't
+# make one from the draw it got.
+
+
+def word_hunt_board(source, rng, word_count=3):
+    """
+    source: {'words': [...], 'letters': [...]}, the letters fill the empty cells.
+    Returns {'grid': [row strings], 'words': [...]}.
+    """
+    if len(source['words']) < word_count or not source['letters']:
+        return None
+    words = rng.sample(source['words'], word_count)
+    try:
+        board = word_grid.generate(words, source['letters'], seed=rng.randrange(2 ** 32))
+    except word_grid.GridError:
+        return None
+    return {'grid': word_grid.as_rows(board), 'words': words}
+
+
+def find_family_board(source, rng, option_count=10):
+    """
+    source: [(letter, family members), ...]. Returns {'letter', 'family', 'options'}:
+    4 members of one family mixed with members of other families.
+    """
+    families = [family for family in source if len(family[1]) >= 2]
+    if len(families) < 3:
+        return None
+    selected, *others = rng.sample(families, min(len(families), 5))
+    letter, family = selected
+    if len(family) < 4:
+        return None
+
+    options = rng.sample(family, 4)
+    for other in rng.sample(others, 2):
+        options.extend(rng.sample(other[1], 2))
+    while len(options) < option_count:
+        options.append(rng.choice(rng.choice(others)[1]))
+    rng.shuffle(options)
+    return {'letter': letter, 'family': family, 'options': options[:option_count]}
+
+
+BUILDERS = {
+    'word_hunt': word_hunt_board,
+    'find_family': find_family_board,
+}
+
+
+def build_batch(game, source, seed, count):
+    """Build up to `count` boards of a game from one seed, in a worker process."""
+    rng = random.Random(seed)
+    builder = BUILDERS[game]
+    boards = []
+    for _ in range(count):
+        board = builder(source, rng)
+        if board is not None:
+            boards.append(board)
+    return boards
@@ -0,0 +1,165 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Level, Module, Slide, SlideContent
+
+### ---------------- Course Outline -------------------
+#
+# The ordered Level -> Module -> Slide -> SlideContent tree, kept in memory
+# and shared between workers through the cache. Navigation (next and previous
+# slide, first module of a level, first slide of a module) is precomputed
+# into dicts, so every lookup is O(1) and none of them touch the database.
+#
+# The tree is versioned: VERSION_KEY in the cache holds the current version
+# and the rows are cached under that version. Saving or deleting a level,
+# module, slide or content bumps the version (see signals.py), which makes
+# every worker rebuild on its next lookup. Workers compare their version with
+# the shared one at most every VERSION_CHECK_SECONDS.
+
+VERSION_KEY = 'course_outline:version'
+DATA_TIMEOUT = 60 * 60 * 24
+VERSION_CHECK_SECONDS = 2
+
+
+def _data_key(version):
+    return f'course_outline:{version}'
+
+
+def _read_rows():
+    """The outline as plain, picklable rows, read with one query per table."""
+    return {
+        'levels': list(Level.objects.order_by('order').values('id', 'name', 'description', 'order', 'price')),
+        'modules': list(
+            Module.objects.order_by('order', 'id').values('id', 'name', 'description', 'level_id', 'order')
+        ),
+        'slides': list(Slide.objects.order_by('order', 'id').values('id', 'title', 'module_id', 'order')),
+        'contents': list(
+            SlideContent.objects.order_by('order', 'id')
+            .values('id', 'slide_id', 'content_type', 'order', 'image_content', 'video_content')
+        ),
+    }
+
+
+class CourseOutline:
+    def __init__(self):
+        self._levels = []  # level nodes in course order, each with its modules, slides and contents
+        self._level_of = {}  # level id -> level node
+        self._level_by_name = {}
+        self._slide_of = {}  # slide id -> slide node
+        self._first_module = {}  # level id -> first module id
+        self._first_slide = {}  # module id -> first slide id
+        self._next = {}  # slide id -> next slide id
+        self._previous = {}  # slide id -> previous slide id
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.RLock()
+
+    def _build(self, rows):
+        levels = [SimpleNamespace(**row, modules=[]) for row in rows['levels']]
+        level_of = {level.id: level for level in levels}
+        module_of = {}
+        for row in rows['modules']:
+            module = SimpleNamespace(**row, slides=[])
+            module_of[module.id] = module
+            level_of[module.level_id].modules.append(module)
+        slide_of = {}
+        for row in rows['slides']:
+            slide = SimpleNamespace(**row, contents=[])
+            slide_of[slide.id] = slide
+            module_of[slide.module_id].slides.append(slide)
+        for row in rows['contents']:
+            slide_of[row['slide_id']].contents.append(SimpleNamespace(**row))
+
+        first_module, first_slide, following, previous = {}, {}, {}, {}
+        for level in levels:
+            if level.modules:
+                first_module[level.id] = level.modules[0].id
+            # Navigation runs through the slides of a level, module by module
+            ordered = []
+            for module in level.modules:
+                if module.slides:
+                    first_slide[module.id] = module.slides[0].id
+                ordered.extend(module.slides)
+            for current, after in zip(ordered, ordered[1:]):
+                following[current.id] = after.id
+                previous[after.id] = current.id
+
+        self._levels, self._level_of = levels, level_of
+        self._level_by_name = {level.name: level for level in reversed(levels)}  # First one wins on a clash
+        self._slide_of = slide_of
+        self._first_module, self._first_slide = first_module, first_slide
+        self._next, self._previous = following, previous
+
+    def _ensure_loaded(self):
+        if self._checked_at is not None and time.monotonic() - self._checked_at < VERSION_CHECK_SECONDS:
+            return
+        with self._lock:
+            # Start from the clock, so a flushed cache never brings back an old version
+            cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(VERSION_KEY)
+            if version != self._version:
+                rows = cache.get(_data_key(version))
+                if rows is None:
+                    rows = _read_rows()
+                    cache.set(_data_key(version), rows, DATA_TIMEOUT)
+                self._build(rows)
+                self._version = version
+            self._checked_at = time.monotonic()
+
+    def invalidate(self):
+        """Drop this worker's copy and move every worker to a new version."""
+        with self._lock:
+            self._version = None
+            self._checked_at = None
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+    def invalidate_on_commit(self):
+        # Bump now, so this worker rebuilds straight away, and again after the
+        # commit, so no worker keeps a tree read before the change was visible
+        self.invalidate()
+        transaction.on_commit(self.invalidate)
+
+    ## ---- lookups ----
+
+    def levels(self):
+        self._ensure_loaded()
+        return self._levels
+
+    def level(self, level_id):
+        self._ensure_loaded()
+        return self._level_of.get(level_id)
+
+    def level_by_name(self, name):
+        self._ensure_loaded()
+        return self._level_by_name.get(name)
+
+    def slide(self, slide_id):
+        self._ensure_loaded()
+        return self._slide_of.get(slide_id)
+
+    def first_module_id(self, level_id):
+        self._ensure_loaded()
+        return self._first_module.get(level_id)
+
+    def first_slide_id(self, module_id):
+        self._ensure_loaded()
+        return self._first_slide.get(module_id)
+
+    def next_slide_id(self, slide_id):
+        """The next slide in the same level, crossing into the next module, or None."""
+        self._ensure_loaded()
+        return self._next.get(slide_id)
+
+    def previous_slide_id(self, slide_id):
+        self._ensure_loaded()
+        return self._previous.get(slide_id)
+
+
+outline = CourseOutline()
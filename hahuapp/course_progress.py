@@ -0,0 +1,80 @@
+from django.db import transaction
+
+from .course_outline import outline
+from .models import UserLevelProgress, UserModuleProgress, UserSlideProgress
+
+### ---------------- Course Progress -------------------
+#
+# Per-user progress for the slide pages. Each helper reads or creates the
+# progress rows it needs with one query per table, whatever the size of the
+# course.
+
+
+def slide_progress_map(user):
+    """Return {slide id: {'is_completed': bool}} for the user, in one query."""
+    return {
+        slide_id: {'is_completed': is_completed}
+        for slide_id, is_completed in UserSlideProgress.objects.filter(user=user).values_list('slide_id', 'is_completed')
+    }
+
+
+def _ensure_rows(model, user, field, ids, flag):
+    """
+    Create the missing progress rows for `ids` with one bulk_create and
+    return {id: flag value} for all of them.
+    """
+    if not ids:
+        return {}
+    values = dict(model.objects.filter(user=user, **{f'{field}__in': ids}).values_list(f'{field}_id', flag))
+    missing = [pk for pk in ids if pk not in values]
+    if missing:
+        # A concurrent request may have created some of them, the unique constraint keeps one
+        model.objects.bulk_create([model(user=user, **{f'{field}_id': pk}) for pk in missing], ignore_conflicts=True)
+        default = model._meta.get_field(flag).default
+        values.update((pk, default) for pk in missing)
+    return values
+
+
+def unlock_first_steps(user, levels, progress_map):
+    """
+    Make sure the user has progress rows for the start of the course and open
+    the first locked step.
+
+    Walks the levels in order up to the first one that has a slide, creating
+    the level rows, the first module row of each level and the first slide
+    row in bulk, then unlocks the first locked level, module or slide it
+    meets. `progress_map` comes from slide_progress_map() and is updated in
+    place.
+    """
+    level_ids, module_ids, first_modules = [], [], {}
+    first_slide_id = None
+    for level in levels:
+        level_ids.append(level.id)
+        module_id = outline.first_module_id(level.id)
+        if module_id:
+            first_modules[level.id] = module_id
+            module_ids.append(module_id)
+            first_slide_id = outline.first_slide_id(module_id)
+            if first_slide_id:
+                break
+
+    with transaction.atomic():
+        level_locked = _ensure_rows(UserLevelProgress, user, 'level', level_ids, 'is_locked')
+        module_locked = _ensure_rows(UserModuleProgress, user, 'module', module_ids, 'is_locked')
+        if first_slide_id and first_slide_id not in progress_map:
+            UserSlideProgress.objects.get_or_create(user=user, slide_id=first_slide_id)
+            progress_map[first_slide_id] = {'is_completed': False}
+
+        first_unlocked = False
+        for level_id in level_ids:
+            if level_locked[level_id] and not first_unlocked:
+                UserLevelProgress.objects.filter(user=user, level_id=level_id).update(is_locked=False)
+                first_unlocked = True
+
+            module_id = first_modules.get(level_id)
+            if module_id and module_locked[module_id] and not first_unlocked:
+                UserModuleProgress.objects.filter(user=user, module_id=module_id).update(is_locked=False)
+
+        if first_slide_id and not progress_map[first_slide_id]['is_completed'] and not first_unlocked:
+            UserSlideProgress.objects.filter(user=user, slide_id=first_slide_id).update(is_completed=True)
+            progress_map[first_slide_id] = {'is_completed': True}
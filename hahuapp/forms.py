@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
+from .admin_lists import autocomplete_widgets
 from .models import UserProfile, WordCharade, WritingSubmission, Video, VoiceRecording, Event, LetterSound, WordAudio, WordVideo, WordCountdownRecording, Sentence, Passage
 
 class UserRegisterForm(UserCreationForm):
@@ -243,6 +244,7 @@ class WritingSubmissionForm(forms.ModelForm):
     class Meta:
         model = WritingSubmission
         fields = ['user', 'content']  # User should be selected from the admin
+        widgets = autocomplete_widgets(model, fields)
 
 class VideoForm(forms.ModelForm):
     class Meta:
@@ -254,11 +256,13 @@ class VideoResponseForm(forms.ModelForm):
     class Meta:
         model = VideoResponse
         fields = ['video', 'student', 'response']
+        widgets = autocomplete_widgets(model, fields)
 
 class WordAudioRecordingForm(forms.ModelForm):
     class Meta:
         model = WordAudioRecording
         fields = ['word_audio', 'user', 'recording_file']
+        widgets = autocomplete_widgets(model, fields)
 
 
 class ParagraphForm(forms.ModelForm):
@@ -287,6 +291,7 @@ class AmharicLetterAudioForm(forms.ModelForm):
     class Meta:
         model = AmharicLetterAudio
         fields = ['family', 'letter', 'audio_file']
+        widgets = autocomplete_widgets(model, fields)
 
 
 
@@ -331,11 +336,13 @@ class StoryPartForm(forms.ModelForm):
     class Meta:
         model = StoryPart
         fields = ['story', 'part_number', 'audio_file', 'video_file', 'text_content']
+        widgets = autocomplete_widgets(model, fields)
 
 class StoryQuestionForm(forms.ModelForm):
     class Meta:
         model = StoryQuestion
         fields = ['part', 'question_text', 'correct_answer', 'options']
+        widgets = autocomplete_widgets(model, fields)
 
 from .models import Level
 
@@ -350,6 +357,7 @@ class ModuleForm(forms.ModelForm):
     class Meta:
         model = Module
         fields = ['name', 'description', 'level', 'order']
+        widgets = autocomplete_widgets(model, fields)
 
 from .models import Slide
 
@@ -357,22 +365,26 @@ class SlideForm(forms.ModelForm):
     class Meta:
         model = Slide
         fields = ['title', 'module', 'order']
+        widgets = autocomplete_widgets(model, fields)
 
 class SlideContentForm(forms.ModelForm):
     class Meta:
         model = SlideContent
         fields = ['slide', 'content_type', 'text_content', 'image_content', 'video_content', 'order']
+        widgets = autocomplete_widgets(model, fields)
 
 class SlideQuestionForm(forms.ModelForm):
     class Meta:
         model = SlideQuestion
         fields = ['slide', 'question_text', 'choice1', 'choice2', 'choice3', 'choice4', 'correct_answer']
+        widgets = autocomplete_widgets(model, fields)
 
 from .models import UserSlideProgress
 class UserSlideProgressForm(forms.ModelForm):
     class Meta:
         model = UserSlideProgress
         fields = ['user', 'slide', 'is_completed', 'completed_at']
+        widgets = autocomplete_widgets(model, fields)
 
 
 from .models import UserLevelProgress
@@ -381,6 +393,7 @@ class UserLevelProgressForm(forms.ModelForm):
     class Meta:
         model = UserLevelProgress
         fields = ['user', 'level', 'is_locked']
+        widgets = autocomplete_widgets(model, fields)
 
 from .models import UserModuleProgress
 
@@ -388,15 +401,18 @@ class UserModuleProgressForm(forms.ModelForm):
     class Meta:
         model = UserModuleProgress
         fields = ['user', 'module', 'is_locked']
+        widgets = autocomplete_widgets(model, fields)
 
 class UserProfileForm(forms.ModelForm):
     class Meta:
         model = UserProfile
         fields = ['user', 'full_name', 'referral_code', 'rank', 'level', 'related_level', 
                   'aura', 'aura_points', 'is_subscribed', 'last_login_bonus_date', 'referred_by']
+        widgets = autocomplete_widgets(model, fields)
         
 from .models import PointHistory      
 class PointHistoryForm(forms.ModelForm):
     class Meta:
         model = PointHistory
-        fields = ['user_profile', 'points', 'reason']
\ No newline at end of file
+        fields = ['user_profile', 'points', 'reason', 'reason_code']
+        widgets = autocomplete_widgets(model, fields)
\ No newline at end of file
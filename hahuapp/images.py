@@ -0,0 +1,173 @@
+import hashlib
+import io
+import json
+import os
+from functools import lru_cache
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+### ---------------- Image Derivatives -------------------
+#
+# Game and event images are served as resized AVIF/WebP copies next to the
+# original, chosen by the browser through <picture>/srcset. Derivatives are
+# stored under DERIVED_DIR by the SHA-256 of the source content, so the same
+# picture uploaded twice is only resized once and a replaced picture gets new
+# names (and URLs) automatically.
+#
+# They are made when an image is saved (see signals.py), and for images
+# stored before that by `manage.py build_image_derivatives`. What exists for
+# an image is written to a small JSON manifest under MANIFEST_DIR, keyed by
+# file name, modification time and size, so every process finds it; the
+# cache sits in front of the files, and remembers a missing manifest for
+# MISSING_TIMEOUT. Rendering only looks the manifest up and never encodes:
+# an image without one is served as the original.
+
+DERIVED_DIR = 'derived'
+WIDTHS = (160, 320, 640, 960)
+FORMATS = [fmt for fmt in ('avif', 'webp') if features.check(fmt)]  # Best first
+QUALITY = {'avif': 50, 'webp': 70}
+MANIFEST_DIR = f'{DERIVED_DIR}/manifests'
+MANIFEST_TIMEOUT = None  # The key changes with the file, an entry never goes stale
+MISSING_TIMEOUT = 60  # Until another process's manifest is looked for again
+
+
+def _manifest_key(field_file):
+    try:
+        stat = os.stat(field_file.path)
+    except NotImplementedError:  # Remote storage, whose names are unique per upload
+        return f'image_derivatives:{field_file.name}'
+    return f'image_derivatives:{field_file.name}:{stat.st_mtime_ns}:{stat.st_size}'
+
+
+def _derived_name(content_hash, width, fmt):
+    return f'{DERIVED_DIR}/{content_hash[:2]}/{content_hash}-{width}.{fmt}'
+
+
+def build_derivatives(field_file):
+    """
+    Create the missing derivatives of an image and return its manifest:
+    {'width', 'height', 'sources': {format: [(width, name), ...]}}.
+    """
+    with field_file.open('rb') as source:
+        data = source.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    with Image.open(io.BytesIO(data)) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'P') else 'RGB')
+
+    # Never upscale, below the largest width the image's own width is the last candidate
+    widths = [width for width in WIDTHS if width < image.width]
+    if image.width <= WIDTHS[-1]:
+        widths.append(image.width)
+    sources = {}
+    for fmt in FORMATS:
+        sources[fmt] = []
+        for width in widths:
+            name = _derived_name(content_hash, width, fmt)
+            if not default_storage.exists(name):
+                resized = image.copy()
+                resized.thumbnail((width, image.height), Image.LANCZOS)
+                buffer = io.BytesIO()
+                resized.save(buffer, format=fmt.upper(), quality=QUALITY[fmt])
+                saved = default_storage.save(name, ContentFile(buffer.getvalue()))
+                if saved != name:
+                    default_storage.delete(saved)  # Another worker wrote the same derivative first
+            sources[fmt].append((width, name))
+
+    return {'width': image.width, 'height': image.height, 'sources': sources}
+
+
+def _key_for(field_file):
+    if not field_file:
+        return None
+    try:
+        return _manifest_key(field_file)
+    except OSError:  # The file is missing
+        return None
+
+
+def _manifest_name(key):
+    return f'{MANIFEST_DIR}/{hashlib.sha256(key.encode()).hexdigest()}.json'
+
+
+def derivatives(field_file):
+    """The manifest of an image, or None until it has been built."""
+    key = _key_for(field_file)
+    if key is None:
+        return None
+    manifest = cache.get(key)
+    if manifest is None:
+        try:
+            with default_storage.open(_manifest_name(key), 'rb') as stored:
+                manifest = json.load(stored)
+        except (OSError, ValueError):
+            manifest = False  # Not built yet
+        cache.set(key, manifest, MANIFEST_TIMEOUT if manifest else MISSING_TIMEOUT)
+    return manifest or None
+
+
+def build(field_file):
+    """Build the manifest of an image unless it exists, returns it or None if the file can't be used."""
+    manifest = derivatives(field_file)
+    if manifest is not None:
+        return manifest
+    key = _key_for(field_file)
+    if key is None:
+        return None
+    try:
+        manifest = build_derivatives(field_file)
+    except (OSError, UnidentifiedImageError, ValueError, Image.DecompressionBombError):
+        return None
+    name = _manifest_name(key)
+    default_storage.delete(name)  # An unreadable manifest of an earlier run
+    saved = default_storage.save(name, ContentFile(json.dumps(manifest).encode()))
+    if saved != name:
+        default_storage.delete(saved)  # Another process wrote it first
+    cache.set(key, manifest, MANIFEST_TIMEOUT)
+    return manifest
+
+
+def srcset(manifest, fmt):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in manifest['sources'][fmt])
+
+
+def image_srcset(field_file, fmt='webp'):
+    """A srcset of one format for a plain <img>, or '' when there are no derivatives."""
+    manifest = derivatives(field_file)
+    if manifest is None or fmt not in manifest['sources']:
+        return ''
+    return srcset(manifest, fmt)
+
+
+@lru_cache(maxsize=None)
+def image_fields(model):
+    return [field.name for field in model._meta.fields if isinstance(field, models.ImageField)]
+
+
+def handle_save(sender, instance, update_fields=None):
+    for field_name in image_fields(sender):
+        if update_fields is None or field_name in update_fields:
+            build(getattr(instance, field_name))
+
+
+def build_existing():
+    """Build the manifests of every stored image that has none, returns (images, built)."""
+    seen = built = 0
+    for model in apps.get_app_config('hahuapp').get_models():
+        for field_name in image_fields(model):
+            for instance in model.objects.exclude(**{field_name: ''}).only('pk', field_name).iterator():
+                field_file = getattr(instance, field_name)
+                if not field_file:
+                    continue
+                seen += 1
+                if derivatives(field_file) is None and build(field_file) is not None:
+                    built += 1
+    return seen, built
@@ -0,0 +1,130 @@
+import bisect
+import threading
+import time
+
+from .models import UserProfile
+
+### ---------------- Leaderboard Index -------------------
+#
+# Ranks use standard competition ranking (100, 100, 90 -> 1, 1, 3), so the
+# rank of a subscribed profile is one plus the number of subscribed profiles
+# with strictly more aura points. The index keeps those points in a sorted
+# list, which turns a rank lookup into a single bisect, O(log n).
+#
+# The receivers in signals.py update the index whenever a profile is saved or
+# deleted, the points ledger updates it after its F() increments, and it is
+# reloaded every REFRESH_SECONDS to pick up writes made by other workers.
+
+REFRESH_SECONDS = 300
+
+
+class LeaderboardIndex:
+    def __init__(self):
+        self._points = {}  # profile id -> aura points, subscribed profiles only
+        self._sorted = []  # the same points negated, in ascending order
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def _load(self):
+        points = dict(UserProfile.objects.filter(is_subscribed=True).values_list('id', 'aura_points'))
+        with self._lock:
+            self._points = points
+            self._sorted = sorted(-value for value in points.values())
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > REFRESH_SECONDS:
+            self._load()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._sorted)
+
+    ## ---- lookups ----
+
+    def rank_for_points(self, points):
+        self._ensure_loaded()
+        return bisect.bisect_left(self._sorted, -points) + 1
+
+    def rank_of(self, profile):
+        """Rank of a profile, or None when it is not on the leaderboard."""
+        self._ensure_loaded()
+        points = self._points.get(profile.id)
+        if points is None:
+            return None
+        return self.rank_for_points(points)
+
+    ## ---- maintenance ----
+
+    def _discard(self, profile_id):
+        old = self._points.pop(profile_id, None)
+        if old is not None:
+            index = bisect.bisect_left(self._sorted, -old)
+            del self._sorted[index]
+
+    def update(self, profile_id, points, is_subscribed):
+        with self._lock:
+            if self._loaded_at is None:
+                return  # Nothing loaded yet, the next lookup reads fresh data
+            self._discard(profile_id)
+            if is_subscribed:
+                self._points[profile_id] = points
+                bisect.insort(self._sorted, -points)
+
+    def adjust(self, profile_id, delta):
+        """Apply a points increment made in the database with an F() update."""
+        with self._lock:
+            points = self._points.get(profile_id)
+            if points is not None:
+                self._discard(profile_id)
+                self._points[profile_id] = points + delta
+                bisect.insort(self._sorted, -(points + delta))
+
+    def remove(self, profile_id):
+        with self._lock:
+            self._discard(profile_id)
+
+
+leaderboard = LeaderboardIndex()
+
+
+class RankedProfiles:
+    """
+    Lazy, sliceable list of ranked leaderboard rows for the Paginator.
+
+    Only the requested slice is read from the database; its length and the
+    ranks come from the leaderboard index.
+    """
+
+    def __init__(self, offset=0):
+        self.offset = offset
+
+    def __len__(self):
+        return max(len(leaderboard) - self.offset, 0)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            rows = self[item:item + 1]
+            if not rows:
+                raise IndexError(item)
+            return rows[0]
+
+        start = self.offset + (item.start or 0)
+        stop = self.offset + item.stop if item.stop is not None else None
+        profiles = (
+            UserProfile.objects.filter(is_subscribed=True)
+            .order_by('-aura_points', 'id')
+            .values('full_name', 'aura_points')[start:stop]
+        )
+        return [
+            {
+                "rank": leaderboard.rank_for_points(profile['aura_points']),
+                "full_name": profile['full_name'],
+                "aura_points": profile['aura_points'],
+            }
+            for profile in profiles
+        ]
@@ -0,0 +1,97 @@
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils.timezone import now
+
+from .leaderboard import leaderboard
+from .models import UserProfile, PointHistory
+
+### ---------------- Points Ledger -------------------
+#
+# Every change to UserProfile.aura_points goes through this module. Points are
+# added with F() increments, so concurrent awards can't overwrite each other,
+# and the PointHistory rows are written with one bulk_create in the same
+# transaction.
+
+DAILY_LOGIN_BONUS = 10
+
+Award = namedtuple(
+    'Award', ['profile', 'points', 'reason', 'reason_code', 'source_profile'], defaults=(PointHistory.OTHER, None),
+)
+
+
+def award(profile, points, reason, reason_code=PointHistory.OTHER, source_profile=None):
+    """Add `points` to a profile and log them in PointHistory."""
+    award_many([Award(profile, points, reason, reason_code, source_profile)])
+
+
+def award_many(awards):
+    """
+    Apply several awards in one transaction.
+
+    Each award is an Award or a plain (profile, points, reason[, reason_code,
+    source_profile]) tuple.
+
+    Issues one UPDATE for all profiles and one INSERT for all history rows.
+    The aura_points of the given profile objects are bumped in memory too.
+    """
+    awards = [Award(*item) for item in awards]
+    if not awards:
+        return
+
+    totals = defaultdict(int)
+    profiles = {}
+    for item in awards:
+        totals[item.profile.pk] += item.points
+        profiles[item.profile.pk] = item.profile
+
+    with transaction.atomic():
+        increment = Case(
+            *[When(pk=profile_id, then=Value(total)) for profile_id, total in totals.items()],
+            default=Value(0),
+        )
+        UserProfile.objects.filter(pk__in=totals).update(aura_points=F('aura_points') + increment)
+        PointHistory.objects.bulk_create([
+            PointHistory(
+                user_profile=item.profile, points=item.points, reason=item.reason,
+                reason_code=item.reason_code, source_profile=item.source_profile,
+            )
+            for item in awards
+        ])
+        transaction.on_commit(lambda: _update_leaderboard(totals))
+
+    for profile_id, total in totals.items():
+        profiles[profile_id].aura_points = int(profiles[profile_id].aura_points or 0) + total
+
+
+def _update_leaderboard(totals):
+    for profile_id, total in totals.items():
+        leaderboard.adjust(profile_id, total)
+
+
+def award_daily_login_bonus(profile):
+    """
+    Give the daily login bonus once per day, returns True when it was awarded.
+
+    Claiming the day and adding the points is a single conditional UPDATE, so
+    two logins at the same moment can't both receive the bonus.
+    """
+    today = now().date()
+    with transaction.atomic():
+        claimed = (
+            UserProfile.objects.filter(pk=profile.pk)
+            .exclude(last_login_bonus_date=today)
+            .update(last_login_bonus_date=today, aura_points=F('aura_points') + DAILY_LOGIN_BONUS)
+        )
+        if not claimed:
+            return False
+        PointHistory.objects.create(
+            user_profile=profile, points=DAILY_LOGIN_BONUS,
+            reason="Daily login bonus", reason_code=PointHistory.DAILY_LOGIN,
+        )
+        transaction.on_commit(lambda: leaderboard.adjust(profile.pk, DAILY_LOGIN_BONUS))
+
+    profile.last_login_bonus_date = today
+    profile.aura_points = int(profile.aura_points or 0) + DAILY_LOGIN_BONUS
+    return True
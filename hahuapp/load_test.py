@@ -0,0 +1,243 @@
+import random
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+import requests
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.urls import NoReverseMatch, reverse
+
+from . import synthetic
+from .models import WordAudio
+from .views import GAMES
+
+### ---------------- Learner Load Test -------------------
+#
+# Replays learner sessions against a running server, the way a Locust
+# HttpUser would: each virtual user logs in as one of the synthetic learners
+# (which awards the daily bonus once a day), opens the games page, plays
+# ROUNDS game rounds taking turns between the listening, reading and speaking
+# games, posts award_points, uploads a recording in chunks and opens the
+# leaderboard, waiting a think time between steps. It starts over with a new
+# session until the duration is up.
+#
+# Every request is timed by step; report() turns that into the throughput and
+# the p50/p95/p99 of each step. The game pages and the recording targets are
+# looked up in the configured database, so point it at the server's
+# database, filled with `manage.py generate_synthetic_data`. Run it with
+# `manage.py load_test`.
+
+ROUNDS = 10
+GAME_CATEGORIES = ('Listening', 'Reading', 'Speaking')
+THINK_TIME = (0.5, 2.0)  # Seconds between steps, min and max
+TIMEOUT = 30
+POINTS = 5  # Per award_points post
+RECORDING_TARGETS = 100  # WordAudio rows the uploads answer
+
+STEPS = ['login page', 'login', 'games page', 'game round', 'award points', 'start upload', 'upload chunk', 'leaderboard']
+
+Result = namedtuple('Result', ['step', 'ms', 'status', 'ok'])
+
+
+class LoginFailed(Exception):
+    pass
+
+
+def game_paths():
+    """{category: [path, ...]} of the GAMES in GAME_CATEGORIES that have a URL."""
+    paths = defaultdict(list)
+    for game in GAMES:
+        if game['category'] not in GAME_CATEGORIES:
+            continue
+        try:
+            paths[game['category']].append(reverse(game['url']))
+        except NoReverseMatch:
+            continue  # Listed on the games page but not built yet
+    return dict(paths)
+
+
+def targets():
+    """What the sessions need from the database: game paths and the recordings' WordAudio."""
+    return {
+        'games': game_paths(),
+        'word_audio': list(WordAudio.objects.order_by('pk').values_list('pk', flat=True)[:RECORDING_TARGETS]),
+        'word_audio_type': ContentType.objects.get_for_model(WordAudio).pk,
+    }
+
+
+def learner_usernames(count):
+    """Usernames of up to `count` synthetic learners."""
+    return list(
+        User.objects.filter(username__startswith=synthetic.LEARNER_PREFIX)
+        .order_by('pk').values_list('username', flat=True)[:count]
+    )
+
+
+class Learner:
+    """One virtual user, with its own cookies."""
+
+    def __init__(self, base_url, username, password, targets, record, rng, think_time=THINK_TIME):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.targets = targets
+        self.record = record
+        self.rng = rng
+        self.think_time = think_time
+        self.session = None
+
+    def request(self, step, method, path, expect=None, **kwargs):
+        headers = kwargs.pop('headers', {})
+        if method != 'GET':
+            headers['X-CSRFToken'] = self.session.cookies.get('csrftoken', '')
+            headers['Referer'] = self.base_url + path
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, self.base_url + path, headers=headers, allow_redirects=False, timeout=TIMEOUT, **kwargs,
+            )
+        except requests.RequestException:
+            self.record(Result(step, round((time.perf_counter() - started) * 1000, 2), 0, False))
+            return None
+        ok = response.status_code == expect if expect else response.status_code < 400
+        self.record(Result(step, round((time.perf_counter() - started) * 1000, 2), response.status_code, ok))
+        return response
+
+    def think(self):
+        low, high = self.think_time
+        if high > 0:
+            time.sleep(self.rng.uniform(low, high))
+
+    def journey(self):
+        self.session = requests.Session()
+        try:
+            self.login()
+            self.think()
+            self.request('games page', 'GET', reverse('games'))
+            for round_number in range(ROUNDS):
+                self.think()
+                self.play(GAME_CATEGORIES[round_number % len(GAME_CATEGORIES)])
+            self.think()
+            self.request('award points', 'POST', reverse('award-points'), json={'points': POINTS, 'reason': 'Load test'})
+            self.think()
+            self.upload_recording()
+            self.think()
+            self.request('leaderboard', 'GET', reverse('leaderboard'))
+        finally:
+            self.session.close()
+
+    def login(self):
+        self.request('login page', 'GET', reverse('login'))
+        response = self.request('login', 'POST', reverse('login'), expect=302, data={
+            'username': self.username,
+            'password': self.password,
+            'csrfmiddlewaretoken': self.session.cookies.get('csrftoken', ''),
+        })
+        if response is None or response.status_code != 302:
+            raise LoginFailed(self.username)
+
+    def play(self, category):
+        paths = self.targets['games'].get(category)
+        if paths:
+            self.request('game round', 'GET', self.rng.choice(paths))
+
+    def upload_recording(self):
+        if not self.targets['word_audio']:
+            return
+        recording = synthetic.placeholder('mp3')
+        response = self.request('start upload', 'POST', reverse('start-recording-upload'), expect=201, data={
+            'kind': 'word_audio',
+            'content_type': self.targets['word_audio_type'],
+            'object_id': self.rng.choice(self.targets['word_audio']),
+            'filename': 'recording.mp3',
+            'size': len(recording),
+        })
+        if response is None or response.status_code != 201:
+            return
+        self.request(
+            'upload chunk', 'PUT', response.json()['url'],
+            data=recording, headers={'Upload-Offset': '0', 'Content-Type': 'application/octet-stream'},
+        )
+
+
+def run(base_url, usernames, password=synthetic.LEARNER_PASSWORD, users=10, duration=60, ramp_up=10,
+        think_time=THINK_TIME, journeys=None, seed=0):
+    """
+    Run `users` virtual users against `base_url` for `duration` seconds, or
+    until each finished `journeys` journeys, and return report() of it. The
+    users start evenly over `ramp_up` seconds and log in as `usernames` in
+    turn. A journey in progress when time is up is finished.
+    """
+    found = targets()
+    results = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def record(result):
+        with lock:
+            results.append(result)
+
+    def virtual_user(number):
+        rng = random.Random(seed * 100003 + number)
+        learner = Learner(base_url, usernames[number % len(usernames)], password, found, record, rng, think_time)
+        done = 0
+        while not stop.is_set() and (journeys is None or done < journeys):
+            try:
+                learner.journey()
+            except LoginFailed:
+                stop.wait(1)  # Don't hammer the login of a learner that can't log in
+            done += 1
+
+    threads = [threading.Thread(target=virtual_user, args=(number,), daemon=True) for number in range(users)]
+    started = time.monotonic()
+    for number, thread in enumerate(threads):
+        if number and ramp_up:
+            stop.wait(ramp_up / users)
+        thread.start()
+    deadline = started + duration
+    for thread in threads:
+        thread.join(max(deadline - time.monotonic(), 0))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return report(results, time.monotonic() - started, users)
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(int(len(ordered) * fraction + 0.5) - 1, 0)]
+
+
+def report(results, elapsed, users):
+    """
+    {'users', 'seconds', 'requests', 'failures', 'rps', 'steps': {step:
+    {'requests', 'failures', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'}}},
+    the steps in journey order.
+    """
+    by_step = defaultdict(list)
+    for result in results:
+        by_step[result.step].append(result)
+    steps = {}
+    for step in STEPS:
+        done = by_step.get(step)
+        if not done:
+            continue
+        timings = [result.ms for result in done]
+        steps[step] = {
+            'requests': len(done),
+            'failures': sum(not result.ok for result in done),
+            'rps': round(len(done) / elapsed, 2) if elapsed else 0,
+            'p50_ms': _percentile(timings, 0.5),
+            'p95_ms': _percentile(timings, 0.95),
+            'p99_ms': _percentile(timings, 0.99),
+            'max_ms': max(timings),
+        }
+    return {
+        'users': users,
+        'seconds': round(elapsed, 1),
+        'requests': len(results),
+        'failures': sum(not result.ok for result in results),
+        'rps': round(len(results) / elapsed, 2) if elapsed else 0,
+        'steps': steps,
+    }
@@ -0,0 +1,98 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+
+from hahuapp import ledger
+from hahuapp.models import PointHistory, UserProfile
+
+USERNAME_PREFIX = 'bench-writes-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure write throughput of the configured database: threads award points through the ledger "
+        "(one UPDATE and one INSERT per award, as award_points does). Run it once per DB_PROFILE to compare them. "
+        "It writes to the database, and the learners it creates are removed at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--learners', type=int, default=50, help="Learners the awards are spread over.")
+
+    def handle(self, *args, **options):
+        self.describe_database()
+        profiles = self.create_learners(options['learners'])
+        try:
+            self.run(profiles, options['threads'], options['seconds'])
+        finally:
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def describe_database(self):
+        database = settings.DATABASES['default']
+        details = [f"profile={settings.DB_PROFILE}", f"vendor={connection.vendor}"]
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                details.append(f"journal_mode={cursor.fetchone()[0]}")
+            details.append(f"busy_timeout={database['OPTIONS'].get('timeout')}s")
+        else:
+            details.append(f"conn_max_age={database.get('CONN_MAX_AGE')}")
+            details.append(f"pool={database['OPTIONS'].get('pool', False)}")
+        self.stdout.write(' '.join(details))
+
+    def create_learners(self, count):
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()  # Left over from an interrupted run
+        users = User.objects.bulk_create(User(username=f'{USERNAME_PREFIX}{i}') for i in range(count))
+        return UserProfile.objects.bulk_create(
+            UserProfile(user=user, full_name=user.username, referral_code=f'BW{user.pk:08d}'[-10:])
+            for user in users
+        )
+
+    def run(self, profiles, threads, seconds):
+        deadline = time.monotonic() + seconds
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def worker(index):
+            mine, local, failed = profiles[index::threads] or profiles, [], 0
+            try:
+                while time.monotonic() < deadline:
+                    profile = mine[len(local) % len(mine)]
+                    started = time.perf_counter()
+                    try:
+                        ledger.award(profile, 1, 'Write benchmark', PointHistory.OTHER)
+                    except OperationalError:
+                        failed += 1  # e.g. "database is locked" once the busy timeout ran out
+                        continue
+                    local.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()  # This thread's connection
+                with lock:
+                    latencies.extend(local)
+                    errors.append(failed)
+
+        started = time.monotonic()
+        workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        if not latencies:
+            self.stderr.write(f"No write succeeded, {sum(errors)} failed.")
+            return
+        latencies.sort()
+        self.stdout.write(
+            f"{threads} threads, {len(latencies)} awards in {elapsed:.1f}s: "
+            f"{len(latencies) / elapsed:.0f} writes/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, "
+            f"{sum(errors)} failed"
+        )
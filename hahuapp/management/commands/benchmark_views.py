@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hahuapp import benchmark, synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every game, lesson, leaderboard and admin page: query count, p50/p95 latency and peak "
+        "memory, against synthetic content in a throwaway test database. Writes a JSON report and can "
+        "compare it with the report of an earlier commit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', default='1k', help=f"Rows per content table: {', '.join(synthetic.SCALES)} or a number.")
+        parser.add_argument('--repeat', type=int, default=benchmark.REPEAT, help="Timed requests per page.")
+        parser.add_argument('--only', nargs='*', help="URL names or groups (game, lesson, leaderboard, admin, other) to run.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+        parser.add_argument('--compare', help="A report of an earlier run; regressions fail the command.")
+
+    def handle(self, *args, **options):
+        rows = synthetic.rows_for(options['scale'])
+        if not rows:
+            raise CommandError(f"Unknown scale {options['scale']!r}, use {', '.join(synthetic.SCALES)} or a number of rows")
+        baseline = benchmark.load(options['compare']) if options['compare'] else None
+
+        started = time.monotonic()
+        with benchmark.isolated_database():
+            report = benchmark.run(
+                rows, repeat=options['repeat'], only=options['only'], seed=options['seed'], on_result=self.write_result,
+            )
+        self.stdout.write(f"{len(report['results'])} pages at {rows} rows in {time.monotonic() - started:.0f}s")
+
+        if options['output']:
+            benchmark.save(report, options['output'])
+            self.stdout.write(f"Report written to {options['output']}")
+        errors = [name for name, result in report['results'].items() if result['status'] >= 500]
+        if errors:
+            self.stderr.write(f"Server errors: {', '.join(errors)}")
+        if baseline:
+            regressions = benchmark.compare(report, baseline)
+            for name, found in regressions.items():
+                self.stderr.write(f"{name}: {'; '.join(found)}")
+            if regressions:
+                raise CommandError(f"{len(regressions)} pages regressed since {baseline.get('commit') or 'the baseline'}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions since {baseline.get('commit') or 'the baseline'}"))
+
+    def write_result(self, endpoint, result):
+        self.stdout.write(
+            f"{endpoint.group:<12}{endpoint.name:<45}{result['status']:>4}{result['queries']:>6} q"
+            f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f} ms{result['peak_kb']:>8} KB"
+        )
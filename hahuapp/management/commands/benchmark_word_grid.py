@@ -0,0 +1,51 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from hahuapp import word_grid
+from hahuapp.models import LetterSound, WordAudio
+
+# Used when the database has too few words to benchmark with
+SAMPLE_WORDS = [
+    'ሰላም', 'ቤት', 'ውሃ', 'መጽሐፍ', 'ትምህርት', 'ኢትዮጵያ', 'አማርኛ', 'ልጅ', 'እናት', 'አባት',
+    'ወንድም', 'እህት', 'ቡና', 'እንጀራ', 'ገበያ', 'ከተማ', 'መኪና', 'በር', 'መስኮት', 'ወንበር',
+    'ጠረጴዛ', 'ፀሐይ', 'ጨረቃ', 'ኮከብ', 'ዝናብ', 'አበባ', 'ዛፍ', 'ወፍ', 'ውሻ', 'ድመት',
+]
+SAMPLE_LETTERS = [chr(code) for code in range(0x1200, 0x1358) if chr(code).isalpha()]
+
+
+class Command(BaseCommand):
+    help = "Time word_grid.generate for boards of 3 to 10 words and report the spread per word count."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--boards', type=int, default=200, help="Boards per word count.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--sample-words', action='store_true', help="Use the built-in Amharic words and letters, not the database.")
+
+    def handle(self, *args, **options):
+        words, letters = SAMPLE_WORDS, SAMPLE_LETTERS
+        if not options['sample_words']:
+            stored = list(WordAudio.objects.values_list('word', flat=True).distinct())
+            if len(stored) >= 10:
+                words = stored
+                letters = list(LetterSound.objects.values_list('letter', flat=True).distinct()) or letters
+        rng = random.Random(options['seed'])
+
+        self.stdout.write(f"{'words':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'failed':>7}")
+        for count in range(3, 11):
+            timings, failed = [], 0
+            for _ in range(options['boards']):
+                chosen = rng.sample(words, count)
+                started = time.perf_counter()
+                try:
+                    word_grid.generate(chosen, letters, seed=rng.randrange(2 ** 32))
+                except word_grid.GridError:
+                    failed += 1
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{count:>5} {statistics.median(timings):>8.2f} "
+                f"{timings[int(len(timings) * 0.95) - 1]:>8.2f} {timings[-1]:>8.2f} {failed:>7}"
+            )
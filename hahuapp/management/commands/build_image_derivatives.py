@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from hahuapp import images
+
+
+class Command(BaseCommand):
+    help = "Build the AVIF/WebP derivatives of stored images that have none, see hahuapp/images.py."
+
+    def handle(self, *args, **options):
+        seen, built = images.build_existing()
+        self.stdout.write(self.style.SUCCESS(f"Built derivatives for {built} of {seen} images."))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hahuapp import round_bank
+
+
+class Command(BaseCommand):
+    help = "Pre-generate game boards into the round bank, replacing the stored ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('games', nargs='*', help=f"Games to generate, of: {', '.join(round_bank.SOURCES)}.")
+        parser.add_argument('--count', type=int, default=round_bank.ROUNDS_PER_GAME, help="Boards per game.")
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes, defaults to the CPU count.")
+        parser.add_argument('--seed', type=int, default=None, help="Make the boards reproducible.")
+
+    def handle(self, *args, **options):
+        games = options['games'] or list(round_bank.SOURCES)
+        unknown = [game for game in games if game not in round_bank.SOURCES]
+        if unknown:
+            raise CommandError(f"Unknown games: {', '.join(unknown)}. Choose from: {', '.join(round_bank.SOURCES)}")
+
+        for game in games:
+            started = time.monotonic()
+            rounds = round_bank.generate(game, options['count'], options['workers'], options['seed'])
+            if not rounds:
+                self.stderr.write(f"{game}: not enough content to build a board, the bank is left as it is")
+                continue
+            round_bank.store(game, rounds)
+            self.stdout.write(self.style.SUCCESS(
+                f"{game}: stored {len(rounds)} boards in {time.monotonic() - started:.1f}s"
+            ))
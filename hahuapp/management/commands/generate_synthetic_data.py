@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hahuapp import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the configured database with synthetic Amharic content and learners for load tests: "
+        "every game table, stories, the course tree, users with referral trees, progress and point history. "
+        "It adds to what is there and is meant for a scratch database, never production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', default='1k', help=f"Rows per content table: {', '.join(synthetic.SCALES)} or a number.")
+        parser.add_argument('--no-content', action='store_true', help="Only add learners, to the content already there.")
+        parser.add_argument('--learners', type=int, default=1000)
+        parser.add_argument('--point-history', type=int, default=100000, help="PointHistory rows spread over the new learners.")
+        parser.add_argument('--slide-progress', type=int, default=20, help="Average completed slides per learner.")
+        parser.add_argument('--media', action='store_true', help="Write the placeholder media files under MEDIA_ROOT.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=synthetic.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        rows = synthetic.rows_for(options['scale'])
+        if not rows:
+            raise CommandError(f"Unknown scale {options['scale']!r}, use {', '.join(synthetic.SCALES)} or a number of rows")
+
+        if not options['no_content']:
+            self.timed("Content", lambda: synthetic.populate(rows, seed=options['seed'], batch_size=options['batch_size']))
+        if options['learners']:
+            self.timed("Learners", lambda: synthetic.populate_learners(
+                options['learners'], point_history=options['point_history'], slide_progress=options['slide_progress'],
+                seed=options['seed'], batch_size=options['batch_size'],
+            ))
+        if options['media']:
+            started = time.monotonic()
+            written = synthetic.write_media()
+            self.stdout.write(f"Media: {written} placeholder files in {time.monotonic() - started:.1f}s")
+
+    def timed(self, label, create):
+        started = time.monotonic()
+        created = create()
+        self.stdout.write(self.style.SUCCESS(f"{label} in {time.monotonic() - started:.1f}s:"))
+        for model, count in created.items():
+            self.stdout.write(f"  {model:<30}{count:>10}")
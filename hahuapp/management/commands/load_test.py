@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hahuapp import load_test, synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running server with learner sessions: log in, the games page, game rounds, award_points, "
+        "a recording upload and the leaderboard, as the synthetic learners of generate_synthetic_data. "
+        "Prints the throughput and p50/p95/p99 latency of each step."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=10, help="Concurrent virtual users.")
+        parser.add_argument('--duration', type=float, default=60, help="Seconds to run for.")
+        parser.add_argument('--ramp-up', type=float, default=10, help="Seconds over which the users start.")
+        parser.add_argument('--think-time', type=float, nargs=2, default=load_test.THINK_TIME, metavar=('MIN', 'MAX'))
+        parser.add_argument('--journeys', type=int, help="Stop each user after this many journeys.")
+        parser.add_argument('--password', default=synthetic.LEARNER_PASSWORD)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError("--users must be at least 1")
+        usernames = load_test.learner_usernames(options['users'])
+        if not usernames:
+            raise CommandError("No synthetic learners, create them with `manage.py generate_synthetic_data`")
+
+        self.stdout.write(f"{options['users']} users as {len(usernames)} learners against {options['base_url']}")
+        report = load_test.run(
+            options['base_url'], usernames, password=options['password'], users=options['users'],
+            duration=options['duration'], ramp_up=options['ramp_up'], think_time=tuple(options['think_time']),
+            journeys=options['journeys'], seed=options['seed'],
+        )
+
+        self.stdout.write(f"{'step':<16}{'requests':>9}{'failures':>9}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9} ms")
+        for step, row in report['steps'].items():
+            self.stdout.write(
+                f"{step:<16}{row['requests']:>9}{row['failures']:>9}{row['rps']:>9.2f}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+            )
+        self.stdout.write(
+            f"{report['requests']} requests, {report['failures']} failed, {report['rps']} req/s over {report['seconds']}s"
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hahuapp import transcoding
+from hahuapp.models import MediaJob
+
+
+class Command(BaseCommand):
+    help = "Transcode queued recordings and lesson media into compact renditions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty instead of waiting.")
+        parser.add_argument('--limit', type=int, default=0, help="Stop after this many jobs (0 means no limit).")
+        parser.add_argument('--sleep', type=float, default=5, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--enqueue-existing', action='store_true', help="Queue stored files that have no job yet.")
+
+    def handle(self, *args, **options):
+        if not transcoding.ffmpeg_available():
+            raise CommandError(f"{transcoding.FFMPEG} and {transcoding.FFPROBE} must be installed and on PATH.")
+
+        if options['enqueue_existing']:
+            self.stdout.write(f"Queued {transcoding.enqueue_existing()} existing files.")
+
+        processed = saved = 0
+        while not options['limit'] or processed < options['limit']:
+            job = transcoding.claim_next()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            transcoding.process(job)
+            processed += 1
+            if job.status == MediaJob.DONE:
+                saved += job.source_size - job.output_size
+                self.stdout.write(
+                    f"{job.source_name} -> {job.output_name}: "
+                    f"{job.source_size // 1024} KB -> {job.output_size // 1024} KB, "
+                    f"{job.duration or 0:.1f}s at {(job.bitrate or 0) // 1000} kb/s"
+                )
+            else:
+                self.stdout.write(f"{job.source_name}: {job.status} {job.error}".rstrip())
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs, saved {saved // 1024} KB."))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hahuapp import retention
+
+
+class Command(BaseCommand):
+    help = "Delete expired recordings and their files, following the policies in hahuapp/retention.py."
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help="Only sweep these models, e.g. WordCharade.")
+        parser.add_argument('--batch-size', type=int, default=retention.BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=retention.FILE_WORKERS, help="Threads removing files.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the expired rows.")
+
+    def handle(self, *args, **options):
+        policies = {policy.model.__name__.lower(): policy for policy in retention.POLICIES}
+        try:
+            selected = [policies[name.lower()] for name in options['models']] or retention.POLICIES
+        except KeyError as e:
+            raise CommandError(f"No retention policy for {e.args[0]}. Choose from: {', '.join(policies)}")
+
+        if options['dry_run']:
+            for policy in selected:
+                count = retention.expired(policy).count()
+                self.stdout.write(f"{policy.model.__name__}: {count} rows older than {policy.max_age.days} days")
+            return
+
+        total = 0
+        for policy in selected:
+            result = retention.sweep(policy, options['batch_size'], options['workers'])
+            total += result.reclaimed
+            self.stdout.write(
+                f"{policy.model.__name__}: deleted {result.rows} rows and {result.files} files, "
+                f"reclaimed {result.reclaimed / 1024 / 1024:.1f} MB"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Reclaimed {total / 1024 / 1024:.1f} MB in total."))
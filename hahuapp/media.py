@@ -0,0 +1,149 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+### ---------------- Media Serving -------------------
+#
+# Serves MEDIA_ROOT with byte ranges (206 Partial Content), so seeking in a
+# video fetches only the part that is played, plus ETag / Last-Modified
+# revalidation. Uploaded files are never rewritten in place, so the file's
+# size and modification time identify its content; they make the ETag and
+# the `?v=` token that versioned_url() appends. A request carrying the
+# current token may be cached for a year, any other must revalidate.
+#
+# Files are passed to FileResponse, which hands them to the server's
+# wsgi.file_wrapper (sendfile where the server supports it).
+
+MAX_AGE = 60 * 60 * 24 * 365
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def version_token(stat):
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+
+def versioned_url(field_file):
+    """The URL of a stored file with its version token, for long-lived caching."""
+    if not field_file:
+        return ''
+    try:
+        stat = os.stat(field_file.path)
+    except (NotImplementedError, OSError):  # Remote storage or a missing file
+        return field_file.url
+    return f'{field_file.url}?v={version_token(stat)}'
+
+
+class RangeFile:
+    """A file positioned at the start of a range that reads no further than its end."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) for a single `bytes=` range, inclusive, or None to
+    send the whole file. Raises ValueError when the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None  # Malformed or multiple ranges, answer with the whole file
+    first, last = match.groups()
+    if first == '':
+        length = int(last)  # The last `length` bytes
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def if_range_matches(request, etag, mtime):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError):
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    etag = f'"{version_token(stat)}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': (
+            f'public, max-age={MAX_AGE}, immutable'
+            if request.GET.get('v') == version_token(stat)
+            else 'public, no-cache'
+        ),
+    }
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified.headers[header] = value
+        return not_modified
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    size = stat.st_size
+    start, end, status = 0, size - 1, 200
+
+    range_header = request.headers.get('Range')
+    if range_header and size and if_range_matches(request, etag, stat.st_mtime):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range:
+            (start, end), status = byte_range, 206
+
+    length = end - start + 1 if size else 0
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, status=status)
+    else:
+        response = FileResponse(RangeFile(open(full_path, 'rb'), start, length), content_type=content_type, status=status)
+    for header, value in headers.items():
+        response.headers[header] = value
+    response.headers['Content-Length'] = length
+    if status == 206:
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 14:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hahuapp', '0044_level_alter_userprofile_rank_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pointhistory',
+            name='reason_code',
+            field=models.CharField(choices=[('activity', 'Activity'), ('daily_login', 'Daily login bonus'), ('welcome', 'Welcome bonus'), ('referral', 'Referral bonus'), ('downline', 'Downline bonus'), ('other', 'Other')], default='other', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='pointhistory',
+            name='source_profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generated_points', to='hahuapp.userprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='pointhistory',
+            index=models.Index(fields=['user_profile', 'reason_code', 'created_at'], name='pointhistory_reason_idx'),
+        ),
+    ]
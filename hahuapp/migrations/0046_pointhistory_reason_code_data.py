@@ -0,0 +1,59 @@
+import re
+from collections import Counter
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+REFERRAL_RE = re.compile(r'^Referral Bonus: Payment completed by (?P<name>.*)$')
+DOWNLINE_RE = re.compile(r'^Downline Bonus: Payment completed by (?P<name>.*) \(Level \d+\)$')
+
+
+def classify(reason):
+    """Return (reason_code, source full name) for a free-text reason."""
+    if reason == 'Daily login bonus':
+        return 'daily_login', None
+    if reason == 'Welcome Bonus':
+        return 'welcome', None
+    match = REFERRAL_RE.match(reason)
+    if match:
+        return 'referral', match.group('name')
+    match = DOWNLINE_RE.match(reason)
+    if match:
+        return 'downline', match.group('name')
+    return 'activity', None
+
+
+def set_reason_codes(apps, schema_editor):
+    PointHistory = apps.get_model('hahuapp', 'PointHistory')
+    UserProfile = apps.get_model('hahuapp', 'UserProfile')
+
+    # Bonus reasons only carry the payer's name, link it when the name is unique
+    names = Counter(UserProfile.objects.values_list('full_name', flat=True))
+    profile_ids = {
+        full_name: profile_id
+        for profile_id, full_name in UserProfile.objects.values_list('id', 'full_name')
+        if names[full_name] == 1
+    }
+
+    batch = []
+    for history in PointHistory.objects.only('id', 'reason').iterator(chunk_size=BATCH_SIZE):
+        history.reason_code, source_name = classify(history.reason)
+        history.source_profile_id = profile_ids.get(source_name)
+        batch.append(history)
+        if len(batch) >= BATCH_SIZE:
+            PointHistory.objects.bulk_update(batch, ['reason_code', 'source_profile'])
+            batch = []
+    if batch:
+        PointHistory.objects.bulk_update(batch, ['reason_code', 'source_profile'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hahuapp', '0045_pointhistory_reason_code'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_reason_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-18 14:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('hahuapp', '0047_recordingupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('field_name', models.CharField(max_length=50)),
+                ('source_name', models.CharField(max_length=255)),
+                ('output_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('bitrate', models.PositiveIntegerField(blank=True, null=True)),
+                ('source_size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('output_size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='mediajob_queue_idx'), models.Index(fields=['content_type', 'object_id', 'field_name'], name='mediajob_target_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hahuapp', '0048_mediajob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recordingupload',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='videoresponse',
+            name='submitted_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='voicerecording',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='wordaudiorecording',
+            name='uploaded_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='wordcharade',
+            name='sent_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='wordcountdownrecording',
+            name='submission_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
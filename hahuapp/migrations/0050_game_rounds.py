@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 14:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hahuapp', '0049_retention_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameRound',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game', models.CharField(max_length=30)),
+                ('slot', models.PositiveIntegerField()),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('game', 'slot'), name='gameround_game_slot_unique')],
+            },
+        ),
+    ]
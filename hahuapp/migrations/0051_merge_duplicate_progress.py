@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, Max, Min
+from django.db.models.functions import Cast
+
+
+def merge_duplicate_progress(apps, schema_editor):
+    """
+    Keep one progress row per user and level, module or slide before the
+    unique constraints are added. The oldest row is kept, unlocked if any of
+    its duplicates was and completed (at the earliest time) if any was.
+    """
+    # Booleans are aggregated as integers, PostgreSQL has no MIN/MAX for them
+    locked = {'is_locked': Min(Cast('is_locked', IntegerField()))}
+    completed = {'is_completed': Max(Cast('is_completed', IntegerField())), 'completed_at': Min('completed_at')}
+    for model_name, field, merged in (
+        ('UserLevelProgress', 'level', locked),
+        ('UserModuleProgress', 'module', locked),
+        ('UserSlideProgress', 'slide', completed),
+    ):
+        model = apps.get_model('hahuapp', model_name)
+        duplicates = (
+            model.objects.values('user_id', f'{field}_id')
+            .annotate(rows=Count('id'), keep=Min('id'), **merged)
+            .filter(rows__gt=1)
+        )
+        for group in duplicates:
+            model.objects.filter(pk=group['keep']).update(**{name: group[name] for name in merged})
+            model.objects.filter(user_id=group['user_id'], **{f'{field}_id': group[f'{field}_id']}).exclude(
+                pk=group['keep']
+            ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hahuapp', '0050_game_rounds'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_progress, migrations.RunPython.noop),
+    ]
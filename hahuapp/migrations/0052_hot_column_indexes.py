@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-18 14:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hahuapp', '0051_merge_duplicate_progress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='start_date',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='paragraph',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['id'], name='paragraph_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sentence',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['id'], name='sentence_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storypart',
+            index=models.Index(fields=['story', 'part_number'], name='storypart_story_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(condition=models.Q(('is_subscribed', True)), fields=['-aura_points'], name='profile_leaderboard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wordcountdownrecording',
+            index=models.Index(fields=['user', 'submission_date'], name='countdown_user_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='userlevelprogress',
+            constraint=models.UniqueConstraint(fields=('user', 'level'), name='userlevelprogress_user_level_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='usermoduleprogress',
+            constraint=models.UniqueConstraint(fields=('user', 'module'), name='usermoduleprogress_user_module_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='userslideprogress',
+            constraint=models.UniqueConstraint(fields=('user', 'slide'), name='userslideprogress_user_slide_unique'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hahuapp', '0052_hot_column_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recordingupload',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
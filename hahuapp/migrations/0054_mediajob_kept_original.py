@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hahuapp', '0053_recording_upload_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediajob',
+            name='kept_original',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def drop_word_hunt_rounds(apps, schema_editor):
+    """
+    Stored word hunt boards could have crossing words, which the page can't
+    finish. Drop them; the view builds boards live until `manage.py
+    generate_rounds` fills the bank again.
+    """
+    apps.get_model('hahuapp', 'GameRound').objects.filter(game='word_hunt').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hahuapp', '0054_mediajob_kept_original'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_word_hunt_rounds, migrations.RunPython.noop),
+    ]
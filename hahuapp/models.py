@@ -1,12 +1,12 @@
 import random
+import uuid
 import string
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
-from datetime import timedelta
-from django.utils.timezone import now
 
 ### -------------- Lecture Slide -------------- ### 
 
@@ -73,6 +73,11 @@ class UserSlideProgress(models.Model):
     is_completed = models.BooleanField(default=False)  # Tracks if the user completed the slide
     completed_at = models.DateTimeField(null=True, blank=True)  # Optional timestamp for completion
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'slide'], name='userslideprogress_user_slide_unique'),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.slide} - {'Completed' if self.is_completed else 'In Progress'}"
     
@@ -81,6 +86,11 @@ class UserLevelProgress(models.Model):
     level = models.ForeignKey(Level, on_delete=models.CASCADE, related_name='user_progress')
     is_locked = models.BooleanField(default=True)  # User-specific lock status
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'level'], name='userlevelprogress_user_level_unique'),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.level} - {'Locked' if self.is_locked else 'Unlocked'}"
 
@@ -90,6 +100,11 @@ class UserModuleProgress(models.Model):
     module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='user_progress')
     is_locked = models.BooleanField(default=True)  # User-specific lock status
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'module'], name='usermoduleprogress_user_module_unique'),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.module} - {'Locked' if self.is_locked else 'Unlocked'}"
 
@@ -109,6 +124,13 @@ class UserProfile(models.Model):
     last_login_bonus_date = models.DateField(null=True, blank=True)
     referred_by = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='referrals')
 
+    class Meta:
+        indexes = [
+            # The leaderboards: subscribed learners by points. A partial index, as
+            # `WHERE is_subscribed` can't search an index on the column itself.
+            models.Index(fields=['-aura_points'], condition=Q(is_subscribed=True), name='profile_leaderboard_idx'),
+        ]
+
     def __str__(self):
         return self.full_name
 
@@ -122,21 +144,44 @@ class UserProfile(models.Model):
     
     def successful_referrals_this_week(self):
         """Count successful referrals made during the current week."""
-        start_of_week = now().date() - timedelta(days=now().weekday())  # Monday
+        from .referrals import start_of_week  # referrals.py imports the models
         return PointHistory.objects.filter(
             user_profile=self,
-            reason__startswith="Referral Bonus",
-            created_at__gte=start_of_week
+            reason_code=PointHistory.REFERRAL,
+            created_at__gte=start_of_week()
         ).count()
 
 # point history model
 
 class PointHistory(models.Model):
+    # Typed reason, used for bonus lookups instead of matching the reason text
+    ACTIVITY = 'activity'
+    DAILY_LOGIN = 'daily_login'
+    WELCOME = 'welcome'
+    REFERRAL = 'referral'
+    DOWNLINE = 'downline'
+    OTHER = 'other'
+    REASON_CODE_CHOICES = (
+        (ACTIVITY, 'Activity'),
+        (DAILY_LOGIN, 'Daily login bonus'),
+        (WELCOME, 'Welcome bonus'),
+        (REFERRAL, 'Referral bonus'),
+        (DOWNLINE, 'Downline bonus'),
+        (OTHER, 'Other'),
+    )
+
     user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='point_history')
     points = models.IntegerField()
     reason = models.CharField(max_length=255)
+    reason_code = models.CharField(max_length=20, choices=REASON_CODE_CHOICES, default=OTHER)
+    source_profile = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='generated_points')  # The learner whose payment earned a referral/downline bonus
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_profile', 'reason_code', 'created_at'], name='pointhistory_reason_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user_profile} - {self.reason}"
     
@@ -145,7 +190,7 @@ class PointHistory(models.Model):
 class Event(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
-    start_date = models.DateTimeField()
+    start_date = models.DateTimeField(db_index=True)
     end_date = models.DateTimeField()
     location = models.CharField(max_length=255, blank=True)
     image = models.ImageField(upload_to='event_images/', blank=True, null=True)
@@ -219,16 +264,16 @@ class WordCharade(models.Model):
     question = GenericForeignKey('content_type', 'object_id')
 
     recording = models.FileField(upload_to='recordings/')
-    sent_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return f"{self.user.username} - {self.question} - {self.sent_at}"
 
     @staticmethod
     def delete_old_recordings():
-        """Delete recordings older than 3 days."""
-        threshold = timezone.now() - timedelta(days=3)
-        WordCharade.objects.filter(sent_at__lt=threshold).delete()
+        """Delete recordings older than 3 days, together with their files."""
+        from .retention import policy_for, sweep
+        return sweep(policy_for(WordCharade))
 
 # word countdown start
 
@@ -236,7 +281,13 @@ class WordCountdownRecording(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     letter = models.ForeignKey(LetterImage, on_delete=models.CASCADE)
     audio_file = models.FileField(upload_to='word_countdown_recordings/')
-    submission_date = models.DateTimeField(auto_now_add=True)
+    submission_date = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # A learner's latest recording (feedback_view)
+            models.Index(fields=['user', 'submission_date'], name='countdown_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.letter.letter}"
@@ -250,6 +301,12 @@ class Sentence(models.Model):
     definition = models.TextField()
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # The ids the question pool samples from
+            models.Index(fields=['id'], condition=Q(is_active=True), name='sentence_active_idx'),
+        ]
+
     def __str__(self):
         return self.sentence
 
@@ -354,7 +411,7 @@ class VideoResponse(models.Model):
     video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='responses')
     student = models.ForeignKey('auth.User', on_delete=models.CASCADE)  # or a custom user model
     response = models.TextField(help_text="The student's description of the video")
-    submitted_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return f"Response by {self.student.username} for {self.video.title}"
@@ -363,7 +420,7 @@ class WordAudioRecording(models.Model):
     word_audio = models.ForeignKey(WordAudio, on_delete=models.CASCADE, related_name='recordings')
     user = models.ForeignKey(User, on_delete=models.CASCADE)  # Assuming you have a User model
     recording_file = models.FileField(upload_to='user_recordings/')
-    uploaded_at = models.DateTimeField(auto_now_add=True)
+    uploaded_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return f"{self.user.username} - {self.word_audio.word}"
@@ -373,13 +430,18 @@ class Paragraph(models.Model):
     definition = models.TextField(blank=True, null=True)  # Optional definition/description
     is_active = models.BooleanField(default=True)  # Status of the paragraph
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=Q(is_active=True), name='paragraph_active_idx'),
+        ]
+
     def __str__(self):
         return f"Paragraph {self.id}"
     
 class VoiceRecording(models.Model):
     student_name = models.CharField(max_length=100)
     audio_file = models.FileField(upload_to='uploads/voice_recordings/', null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return self.student_name
@@ -518,6 +580,11 @@ class StoryPart(models.Model):
     video_file = models.FileField(upload_to='story_videos/', null=True, blank=True)
     text_content = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['story', 'part_number'], name='storypart_story_number_idx'),
+        ]
+
     def __str__(self):
         return f"{self.story} - {self.part_number}"
 
@@ -531,3 +598,97 @@ class StoryQuestion(models.Model):
         return f"{self.part} - Question"
 
 # story ---- for listening part
+
+# chunked recording uploads
+
+class RecordingUpload(models.Model):
+    KIND_CHOICES = (
+        ('word_audio', 'Word audio recording'),
+        ('charade', 'Speaking charade'),
+        ('countdown', 'Word countdown recording'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recording_uploads')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+
+    # What the learner is recording, e.g. the WordAudio or LetterImage
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    target = GenericForeignKey('content_type', 'object_id')
+
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()  # Total size announced by the client
+    received = models.PositiveBigIntegerField(default=0)  # Bytes stored so far, the resume offset
+    parts = models.JSONField(default=list)  # Storage names of the stored chunks, in order
+    recording_id = models.PositiveIntegerField(null=True, blank=True)  # The recording created on completion
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # When a request started copying the parts
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.kind} - {self.received}/{self.size}"
+
+# media transcoding queue
+
+class MediaJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (SKIPPED, 'Skipped'),
+        (FAILED, 'Failed'),
+    )
+
+    # The file being transcoded: a FileField on any model
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    field_name = models.CharField(max_length=50)
+    source_name = models.CharField(max_length=255)  # The file name when the job was queued
+    output_name = models.CharField(max_length=255, blank=True)  # The rendition now served instead
+    kept_original = models.CharField(max_length=255, blank=True)  # Left in storage with MEDIA_KEEP_ORIGINALS
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    duration = models.FloatField(null=True, blank=True)  # Seconds
+    bitrate = models.PositiveIntegerField(null=True, blank=True)  # Bits per second, of the rendition
+    source_size = models.PositiveBigIntegerField(null=True, blank=True)
+    output_size = models.PositiveBigIntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='mediajob_queue_idx'),
+            models.Index(fields=['content_type', 'object_id', 'field_name'], name='mediajob_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.field_name} of {self.content_type.model} {self.object_id} - {self.status}"
+
+
+### ---------------- Round Bank -------------------
+
+class GameRound(models.Model):
+    """A pre-generated board of a game, see round_bank.py."""
+    game = models.CharField(max_length=30)
+    slot = models.PositiveIntegerField()  # 0..n-1 within a game
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['game', 'slot'], name='gameround_game_slot_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.game} round {self.slot}"
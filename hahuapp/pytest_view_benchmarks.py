@@ -0,0 +1,117 @@
+import os
+from contextlib import ExitStack
+
+import pytest
+
+### ---------------- View Benchmarks for pytest -------------------
+#
+# Runs the page benchmarks of benchmark.py as pytest items, one per page, so
+# they can gate a CI job:
+#
+#   pytest -p hahuapp.pytest_view_benchmarks --view-benchmarks \
+#       --bench-scale 10k --bench-output bench.json --bench-baseline main.json
+#
+# A page fails on a server error, or when --bench-baseline is given and it
+# regressed against that report (see benchmark.compare()). The report of the
+# run is written to --bench-output at the end of the session. Without
+# --view-benchmarks the plugin does nothing.
+
+STATE = pytest.StashKey[dict]()
+
+
+class BenchmarkFailure(Exception):
+    pass
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('view-benchmarks')
+    group.addoption('--view-benchmarks', action='store_true', help="Benchmark the pages instead of running the tests.")
+    group.addoption('--bench-scale', default='1k', help="Rows per content table: 1k, 10k, 100k or a number.")
+    group.addoption('--bench-repeat', type=int, default=None, help="Timed requests per page.")
+    group.addoption('--bench-only', nargs='*', default=None, help="URL names or groups to run.")
+    group.addoption('--bench-output', help="Write the JSON report to this file.")
+    group.addoption('--bench-baseline', help="Fail the pages that regressed against this report.")
+
+
+def pytest_configure(config):
+    if not config.getoption('view_benchmarks'):
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hahu.settings')
+    import django
+    django.setup()
+
+
+class ViewBenchmark(pytest.Item):
+    def __init__(self, *, endpoint, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint
+
+    def runtest(self):
+        from . import benchmark
+
+        state = self.config.stash[STATE]
+        result = {
+            'group': self.endpoint.group,
+            'path': self.endpoint.path,
+            **benchmark.measure(state['client'], self.endpoint.path, state['repeat']),
+        }
+        state['results'][self.name] = result
+
+        problems = []
+        if result['status'] >= 500:
+            problems.append(f"status {result['status']}")
+        if state['baseline']:
+            problems.extend(benchmark.compare({'results': {self.name: result}}, state['baseline']).get(self.name, []))
+        if problems:
+            raise BenchmarkFailure(f"{self.endpoint.path}: {'; '.join(problems)}")
+
+    def repr_failure(self, excinfo):
+        if isinstance(excinfo.value, BenchmarkFailure):
+            return str(excinfo.value)
+        return super().repr_failure(excinfo)
+
+    def reportinfo(self):
+        return self.path, None, f"{self.endpoint.group} page {self.name}"
+
+
+def pytest_collection_modifyitems(session, config, items):
+    if not config.getoption('view_benchmarks'):
+        return
+    from . import benchmark, synthetic
+
+    rows = synthetic.rows_for(config.getoption('bench_scale'))
+    if not rows:
+        raise pytest.UsageError(f"Unknown --bench-scale {config.getoption('bench_scale')!r}")
+    baseline = config.getoption('bench_baseline')
+
+    # The database lives for the whole session, it's closed in pytest_sessionfinish
+    stack = ExitStack()
+    stack.enter_context(benchmark.isolated_database())
+    client, content = benchmark.prepare(rows)
+    config.stash[STATE] = {
+        'stack': stack,
+        'client': client,
+        'content': content,
+        'rows': rows,
+        'repeat': config.getoption('bench_repeat') or benchmark.REPEAT,
+        'baseline': benchmark.load(baseline) if baseline else None,
+        'results': {},
+    }
+    items[:] = [
+        ViewBenchmark.from_parent(session, name=endpoint.name, endpoint=endpoint)
+        for endpoint in benchmark.endpoints(config.getoption('bench_only'))
+    ]
+
+
+def pytest_sessionfinish(session):
+    state = session.config.stash.get(STATE, None)
+    if state is None:
+        return
+    from . import benchmark
+
+    try:
+        output = session.config.getoption('bench_output')
+        if output:
+            benchmark.save(benchmark.make_report(state['rows'], state['repeat'], state['content'], state['results']), output)
+    finally:
+        state['stack'].close()
@@ -0,0 +1,183 @@
+import random
+import threading
+import time
+from array import array
+
+### ---------------- Question Pools -------------------
+#
+# Every game picks a handful of random rows out of a content table. Doing that
+# with order_by('?') sorts the whole table in SQL and random.choice(QuerySet)
+# loads every row into Python, so both get slower as the content grows.
+#
+# A pool keeps the primary keys of one model (optionally filtered) in a compact
+# array, samples ids from it in memory and fetches only the chosen rows with a
+# single in_bulk() call. Pools are kept up to date by the post_save/post_delete
+# receivers in signals.py and are reloaded every REFRESH_SECONDS so that writes
+# made by other worker processes are eventually picked up as well.
+
+REFRESH_SECONDS = 300
+
+
+class QuestionPool:
+    def __init__(self, model, filters=None):
+        self.model = model
+        self.filters = dict(filters or {})
+        self._ids = array('q')
+        self._positions = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._ids)
+
+    def queryset(self):
+        return self.model.objects.filter(**self.filters)
+
+    ## ---- loading / maintenance ----
+
+    def _load(self):
+        ids = array('q', self.queryset().order_by().values_list('pk', flat=True))
+        with self._lock:
+            self._ids = ids
+            self._positions = {pk: index for index, pk in enumerate(ids)}
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > REFRESH_SECONDS:
+            self._load()
+
+    def invalidate(self):
+        """Drop the cached ids, they are reloaded on the next access."""
+        with self._lock:
+            self._loaded_at = None
+
+    def add(self, pk):
+        with self._lock:
+            if self._loaded_at is None or pk in self._positions:
+                return
+            self._positions[pk] = len(self._ids)
+            self._ids.append(pk)
+
+    def discard(self, pk):
+        """Remove an id in O(1) by moving the last id into its slot."""
+        with self._lock:
+            index = self._positions.pop(pk, None)
+            if index is None:
+                return
+            last = self._ids.pop()
+            if last != pk:
+                self._ids[index] = last
+                self._positions[last] = index
+
+    def refresh_instance(self, instance, created):
+        if not self.filters:
+            if created:
+                self.add(instance.pk)
+            return
+        # Filtered pools have to ask the database whether the row still matches
+        if self.queryset().filter(pk=instance.pk).exists():
+            self.add(instance.pk)
+        else:
+            self.discard(instance.pk)
+
+    ## ---- sampling ----
+
+    def sample_ids(self, k, exclude=()):
+        """Return up to k distinct random ids that are not in `exclude`."""
+        self._ensure_loaded()
+        exclude = set(exclude)
+        # Sample under the lock, discard() may shrink the array meanwhile
+        with self._lock:
+            ids = self._ids
+            available = len(ids) - len(exclude)
+            if k <= 0 or available <= 0:
+                return []
+
+            if exclude and (available <= k or len(exclude) * 2 > len(ids)):
+                # Most of the pool is excluded, filtering is cheaper than rejection sampling
+                candidates = [pk for pk in ids if pk not in exclude]
+                return random.sample(candidates, min(k, len(candidates)))
+
+            if not exclude:
+                return [ids[index] for index in random.sample(range(len(ids)), min(k, len(ids)))]
+
+            picked = []
+            seen = set(exclude)
+            while len(picked) < k:
+                pk = ids[random.randrange(len(ids))]
+                if pk not in seen:
+                    seen.add(pk)
+                    picked.append(pk)
+            return picked
+
+    def _fetch(self, ids):
+        rows = self.model.objects.in_bulk(ids)
+        if len(rows) < len(ids):
+            # Some ids were deleted by another process, reload on the next access
+            self.invalidate()
+        return [rows[pk] for pk in ids if pk in rows]
+
+    def sample(self, k, exclude=(), unique_by=None, exclude_values=()):
+        """
+        Return up to k random rows in random order.
+
+        `exclude` is a collection of primary keys to skip. When `unique_by` is
+        given, no two returned rows share that attribute and none of them has
+        a value listed in `exclude_values`.
+        """
+        skip = set(exclude)
+        taken_values = set(exclude_values)
+        picked = []
+
+        for _ in range(3):
+            need = k - len(picked)
+            if need <= 0:
+                break
+            # Draw a few spare ids when duplicates have to be filtered out
+            ids = self.sample_ids(need * 2 if unique_by else need, exclude=skip)
+            if not ids:
+                break
+            skip.update(ids)
+            for obj in self._fetch(ids):
+                if unique_by:
+                    value = getattr(obj, unique_by)
+                    if value in taken_values:
+                        continue
+                    taken_values.add(value)
+                picked.append(obj)
+
+        return picked[:k]
+
+    def choice(self, exclude=()):
+        """Return one random row, or None when the pool is empty."""
+        rows = self.sample(1, exclude=exclude)
+        return rows[0] if rows else None
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(model, **filters):
+    """Return the shared pool for `model`, creating it on first use."""
+    key = (model._meta.label_lower, tuple(sorted(filters.items())))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, QuestionPool(model, filters))
+    return pool
+
+
+def pools_for(model):
+    return [pool for pool in list(_pools.values()) if pool.model is model]
+
+
+def handle_save(sender, instance, created):
+    for pool in pools_for(sender):
+        pool.refresh_instance(instance, created)
+
+
+def handle_delete(sender, instance):
+    for pool in pools_for(sender):
+        pool.discard(instance.pk)
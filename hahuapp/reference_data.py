@@ -0,0 +1,174 @@
+import random
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AmharicLetterFamily, LetterSound, Numbers
+
+### ---------------- Reference Data -------------------
+#
+# Small tables that change only when the content is edited (letters, letter
+# families, numbers) are served whole from process memory; levels are kept by
+# course_outline.py. A ReferenceTable loads every row of its model once. It
+# keeps the rows in the shared cache (see CACHES in settings) for the other
+# workers, and keeps a copy in the process. The rows are model instances that
+# every request shares, so treat them as read-only.
+#
+# Invalidation works as in course_outline.py. A version key per table is
+# bumped when a row is saved or deleted (see signals.py). Workers compare
+# their copy's version with the shared one at most every
+# VERSION_CHECK_SECONDS.
+#
+# Each lookup is counted by where it was answered from: 'memory' (this
+# process), 'shared' (the cache) or 'database'. stats() reports the counts.
+
+DATA_TIMEOUT = 60 * 60 * 24
+VERSION_CHECK_SECONDS = 2
+
+counters = Counter()  # (table name, source) -> lookups
+_counters_lock = threading.Lock()
+
+
+def _count(name, source):
+    with _counters_lock:
+        counters[name, source] += 1
+
+
+def stats():
+    """{table name: {'memory': n, 'shared': n, 'database': n, 'hit_rate': 0..1}} for this process."""
+    report = {}
+    for table in TABLES.values():
+        row = {source: counters[table.name, source] for source in ('memory', 'shared', 'database')}
+        total = sum(row.values())
+        row['hit_rate'] = (total - row['database']) / total if total else None
+        report[table.name] = row
+    return report
+
+
+class ReferenceTable:
+    def __init__(self, model, ordering=('pk',)):
+        self.model = model
+        self.ordering = ordering
+        self.name = model._meta.model_name
+        self.version_key = f'reference_data:{self.name}:version'
+        self._rows = []
+        self._by_pk = {}
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _data_key(self, version):
+        return f'reference_data:{self.name}:{version}'
+
+    def _ensure_loaded(self):
+        if self._checked_at is not None and time.monotonic() - self._checked_at < VERSION_CHECK_SECONDS:
+            _count(self.name, 'memory')
+            return
+        with self._lock:
+            # Start from the clock, so a flushed cache never brings back an old version
+            cache.add(self.version_key, time.time_ns(), timeout=None)
+            version = cache.get(self.version_key)
+            if version == self._version:
+                _count(self.name, 'memory')
+            else:
+                rows = cache.get(self._data_key(version))
+                if rows is None:
+                    _count(self.name, 'database')
+                    rows = list(self.model.objects.order_by(*self.ordering))
+                    cache.set(self._data_key(version), rows, DATA_TIMEOUT)
+                else:
+                    _count(self.name, 'shared')
+                self._rows = rows
+                self._by_pk = {row.pk: row for row in rows}
+                self._version = version
+            self._checked_at = time.monotonic()
+
+    def invalidate(self):
+        """Drop this worker's copy and move every worker to a new version."""
+        with self._lock:
+            self._version = None
+            self._checked_at = None
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.add(self.version_key, time.time_ns(), timeout=None)
+
+    def invalidate_on_commit(self):
+        self.invalidate()
+        transaction.on_commit(self.invalidate)
+
+    ## ---- lookups ----
+
+    def __len__(self):
+        return len(self.all())
+
+    def all(self):
+        self._ensure_loaded()
+        return self._rows
+
+    def get(self, pk):
+        self._ensure_loaded()
+        return self._by_pk.get(pk)
+
+    def sample(self, k, exclude=(), unique_by=None, exclude_values=()):
+        """The same contract as QuestionPool.sample(), answered from memory."""
+        rows = self.all()
+        skip = set(exclude)
+        taken_values = set(exclude_values)
+        picked = []
+        for index in random.sample(range(len(rows)), len(rows)):
+            if len(picked) >= k:
+                break
+            row = rows[index]
+            if row.pk in skip:
+                continue
+            if unique_by:
+                value = getattr(row, unique_by)
+                if value in taken_values:
+                    continue
+                taken_values.add(value)
+            picked.append(row)
+        return picked
+
+    def choice(self, exclude=()):
+        rows = self.sample(1, exclude=exclude)
+        return rows[0] if rows else None
+
+    def sample_ids(self, k, exclude=()):
+        return [row.pk for row in self.sample(k, exclude=exclude)]
+
+    def in_bulk(self, ids):
+        """{pk: row} like QuerySet.in_bulk(), without a query."""
+        self._ensure_loaded()
+        return {pk: self._by_pk[pk] for pk in ids if pk in self._by_pk}
+
+
+letter_sounds = ReferenceTable(LetterSound, ('letter', 'pk'))
+letter_families = ReferenceTable(AmharicLetterFamily, ('letter', 'pk'))
+numbers = ReferenceTable(Numbers, ('number', 'pk'))
+
+TABLES = {table.model: table for table in (letter_sounds, letter_families, numbers)}
+
+
+def handle_change(sender):
+    table = TABLES.get(sender)
+    if table is not None:
+        table.invalidate_on_commit()
+
+
+## ---- typed helpers ----
+
+def letters() -> list[str]:
+    """Every distinct letter that has a sound, in alphabetical order."""
+    return list(dict.fromkeys(sound.letter for sound in letter_sounds.all()))
+
+
+def family_of(letter: str) -> AmharicLetterFamily | None:
+    return next((family for family in letter_families.all() if family.letter == letter), None)
+
+
+def number(pk: int) -> Numbers | None:
+    return numbers.get(pk)
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import localtime
+
+from . import ledger
+from .ledger import Award
+from .models import UserProfile, PointHistory
+
+### ---------------- Referral Bonuses -------------------
+#
+# When a learner pays, they get a one time welcome bonus, their direct
+# referrer gets a referral bonus (at most WEEKLY_REFERRAL_CAP per week) and the
+# referrers above that get downline bonuses. The whole upline is loaded with
+# one query, every existing bonus is checked with one query and all awards are
+# applied with a single ledger.award_many() call, so the cost does not grow
+# with the depth of the referral chain.
+
+WELCOME_BONUS = 100
+REFERRAL_BONUS = 25
+WEEKLY_REFERRAL_CAP = 3
+DOWNLINE_BONUSES = [0, 15, 5]  # Points for levels 2 and 3 (Level 1 gets the referral bonus)
+
+
+def referral_reason(profile):
+    return f"Referral Bonus: Payment completed by {profile.full_name}"
+
+
+def downline_reason(profile, level_idx):
+    return f"Downline Bonus: Payment completed by {profile.full_name} (Level {level_idx + 1})"
+
+
+def get_upline(profile, depth=len(DOWNLINE_BONUSES)):
+    """Return the referrers above `profile`, nearest first, loaded in one query."""
+    path = '__'.join(['referred_by'] * depth)
+    current = UserProfile.objects.select_related(path).get(pk=profile.pk)
+
+    upline = []
+    for _ in range(depth):
+        current = current.referred_by
+        if current is None:
+            break
+        upline.append(current)
+    return upline
+
+
+def start_of_week():
+    """Local midnight of this week's Monday, when the weekly referral cap starts over."""
+    today = localtime()
+    return today.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=today.weekday())
+
+
+def plan_payment_bonuses(profile, upline):
+    """
+    Work out which bonuses are still due, using a single PointHistory query.
+
+    Bonuses are matched on reason_code and source_profile, which the
+    (user_profile, reason_code, created_at) index serves directly. Rows
+    written before the codes existed may lack a source, so the reason text
+    is accepted as well.
+    """
+    week_start = start_of_week()
+    referrer = upline[0] if upline else None
+
+    candidates = [Award(profile, WELCOME_BONUS, "Welcome Bonus", PointHistory.WELCOME)]
+    if referrer:
+        candidates.append(Award(referrer, REFERRAL_BONUS, referral_reason(profile), PointHistory.REFERRAL, profile))
+    for level_idx, upline_profile in enumerate(upline):
+        if level_idx > 0:  # Skip Level 1 to avoid conflict with Weekly Referral Cap
+            candidates.append(Award(
+                upline_profile, DOWNLINE_BONUSES[level_idx], downline_reason(profile, level_idx),
+                PointHistory.DOWNLINE, profile,
+            ))
+
+    lookup = Q(user_profile=profile, reason_code=PointHistory.WELCOME)
+    for candidate in candidates[1:]:
+        lookup |= Q(user_profile=candidate.profile, reason_code=candidate.reason_code) & (
+            Q(source_profile=profile) | Q(reason=candidate.reason)
+        )
+    if referrer:
+        lookup |= Q(user_profile=referrer, reason_code=PointHistory.REFERRAL, created_at__gte=week_start)
+
+    existing = set()
+    referrals_this_week = 0
+    rows = PointHistory.objects.filter(lookup).values_list(
+        'user_profile_id', 'reason_code', 'source_profile_id', 'reason', 'created_at'
+    )
+    for user_profile_id, reason_code, source_profile_id, reason, created_at in rows:
+        if reason_code == PointHistory.WELCOME or source_profile_id == profile.pk:
+            existing.add((user_profile_id, reason_code))
+        existing.add((user_profile_id, reason_code, reason))
+        if (referrer and user_profile_id == referrer.pk and reason_code == PointHistory.REFERRAL
+                and created_at >= week_start):
+            referrals_this_week += 1
+
+    awards = []
+    for candidate in candidates:
+        key = (candidate.profile.pk, candidate.reason_code)
+        if key in existing or key + (candidate.reason,) in existing:
+            continue
+        if candidate.reason_code == PointHistory.REFERRAL and referrals_this_week >= WEEKLY_REFERRAL_CAP:
+            continue
+        awards.append(candidate)
+    return awards
+
+
+def apply_payment_bonuses(profile):
+    """Award the welcome, referral and downline bonuses due for a payment."""
+    with transaction.atomic():
+        # Serialise concurrent confirmations of the same payment
+        UserProfile.objects.select_for_update().filter(pk=profile.pk).first()
+        awards = plan_payment_bonuses(profile, get_upline(profile))
+        ledger.award_many(awards)
+    return awards
@@ -0,0 +1,261 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import Template
+
+### ---------------- Request Metrics -------------------
+#
+# RequestMetricsMiddleware measures every request: the number of queries and
+# the time spent in them, the time rendering templates, the time in the view
+# and in total, keyed by URL name. The view time runs from the call of the
+# view until its response is back in the middleware, so it includes the
+# response side of the middleware listed after this one. Query and template
+# time overlap where a template runs lazy queries.
+#
+# A query shape (the SQL before its parameters are filled in) that runs more
+# than once in a request is a duplicate, the mark of an N+1 loop. Each sample
+# records how many extra runs there were and the worst repeated query.
+#
+# Samples are buffered in the process and merged into the shared cache every
+# FLUSH_SECONDS, keeping the latest MAX_SAMPLES per view; summary() turns
+# them into percentiles for the staff page. Merges of different workers can
+# race and drop a batch now and then, which is fine for sampling.
+#
+# Requests slower than SLOW_REQUEST_MS go to the 'hahuapp.slow_requests'
+# logger (a rotating file, see LOGGING in settings) with their worst queries.
+# With SERVER_TIMING on, responses carry a Server-Timing header for the
+# browser's network panel.
+
+MAX_SAMPLES = 500  # Per view
+FLUSH_SECONDS = 5
+SAMPLES_TIMEOUT = 60 * 60 * 24
+SLOW_QUERIES_LOGGED = 5
+UNRESOLVED = '(unresolved)'
+VIEWS_KEY = 'request_metrics:views'
+
+Sample = namedtuple('Sample', [
+    'total_ms', 'view_ms', 'db_ms', 'template_ms', 'queries', 'duplicates', 'status', 'worst_duplicate',
+])
+
+slow_log = logging.getLogger('hahuapp.slow_requests')
+
+
+class SlowRequestFileHandler(RotatingFileHandler):
+    """A RotatingFileHandler that creates the log's directory when it opens the file, the first slow request."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_pending = defaultdict(list)  # view name -> [Sample, ...] not yet in the cache
+_pending_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+class RequestTimer:
+    """What one request spent so far. Query and template time are in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_time = 0.0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.queries = Counter()  # SQL shape -> runs
+        self.query_times = defaultdict(float)  # SQL shape -> seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.db_time += elapsed
+            self.queries[sql] += 1
+            self.query_times[sql] += elapsed
+
+    def duplicates(self):
+        """Extra runs of repeated query shapes, and the most repeated one as (runs, sql) or None."""
+        repeated = [(runs, sql) for sql, runs in self.queries.items() if runs > 1]
+        return sum(runs - 1 for runs, _ in repeated), max(repeated, default=None)
+
+    def sample(self, status):
+        extra, worst = self.duplicates()
+        return Sample(
+            total_ms=round((time.perf_counter() - self.started) * 1000, 2),
+            view_ms=round(self.view_time * 1000, 2),
+            db_ms=round(self.db_time * 1000, 2),
+            template_ms=round(self.template_time * 1000, 2),
+            queries=sum(self.queries.values()),
+            duplicates=extra,
+            status=status,
+            worst_duplicate=worst,
+        )
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(self, *args, **kwargs):
+        timer = _current.get()
+        if timer is None:
+            return render(self, *args, **kwargs)
+        timer.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timer.template_depth -= 1
+            if not timer.template_depth:  # Templates rendered from a template are already counted
+                timer.template_time += time.perf_counter() - started
+    wrapper.timed = True
+    return wrapper
+
+
+def install_template_timer():
+    """Time every Django template render(), once per process."""
+    if not getattr(Template.render, 'timed', False):
+        Template.render = _timed_render(Template.render)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        token = _current.set(timer)
+        try:
+            with connection.execute_wrapper(timer):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if timer.view_started is not None:
+            timer.view_time = time.perf_counter() - timer.view_started
+
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED
+        sample = timer.sample(response.status_code)
+        record(view, sample)
+        if sample.total_ms >= settings.SLOW_REQUEST_MS:
+            log_slow_request(request, view, sample, timer)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = server_timing(sample)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = _current.get()
+        if timer is not None:
+            timer.view_started = time.perf_counter()
+
+
+def server_timing(sample):
+    return ', '.join([
+        f'db;dur={sample.db_ms};desc="{sample.queries} queries, {sample.duplicates} duplicates"',
+        f'tpl;dur={sample.template_ms};desc="templates"',
+        f'view;dur={sample.view_ms};desc="view"',
+        f'total;dur={sample.total_ms};desc="total"',
+    ])
+
+
+def log_slow_request(request, view, sample, timer):
+    slowest = sorted(timer.query_times.items(), key=lambda item: item[1], reverse=True)[:SLOW_QUERIES_LOGGED]
+    slow_log.warning(json.dumps({
+        'view': view,
+        'method': request.method,
+        'path': request.path,
+        **sample._asdict(),
+        'slowest_queries': [
+            {'sql': sql, 'runs': timer.queries[sql], 'ms': round(seconds * 1000, 2)} for sql, seconds in slowest
+        ],
+    }, ensure_ascii=False))
+
+
+## ---- samples ----
+
+def _samples_key(view):
+    return f'request_metrics:samples:{view}'
+
+
+def record(view, sample):
+    with _pending_lock:
+        _pending[view].append(sample)
+        due = time.monotonic() - _flushed_at >= FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def flush():
+    """Merge this process's samples into the shared cache."""
+    global _flushed_at
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    if not pending:
+        return
+    views = cache.get(VIEWS_KEY) or set()
+    if not views.issuperset(pending):
+        cache.set(VIEWS_KEY, views | set(pending), SAMPLES_TIMEOUT)
+    for view, samples in pending.items():
+        stored = cache.get(_samples_key(view)) or []
+        cache.set(_samples_key(view), (stored + [tuple(sample) for sample in samples])[-MAX_SAMPLES:], SAMPLES_TIMEOUT)
+
+
+def clear():
+    with _pending_lock:
+        _pending.clear()
+    cache.delete_many([_samples_key(view) for view in cache.get(VIEWS_KEY) or ()] + [VIEWS_KEY])
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(int(len(ordered) * fraction + 0.5) - 1, 0)]
+
+
+def summary():
+    """
+    One row per view, slowest p95 first: {'view', 'requests', 'p50_ms',
+    'p95_ms', 'p99_ms', 'db_p95_ms', 'template_p95_ms', 'queries_p95',
+    'duplicates_p95', 'errors', 'worst_duplicate'} over the stored samples.
+    """
+    flush()
+    rows = []
+    for view in sorted(cache.get(VIEWS_KEY) or ()):
+        samples = [Sample(*sample) for sample in cache.get(_samples_key(view)) or ()]
+        if not samples:
+            continue
+        total = [sample.total_ms for sample in samples]
+        worst = max((sample.worst_duplicate for sample in samples if sample.worst_duplicate), default=None)
+        rows.append({
+            'view': view,
+            'requests': len(samples),
+            'p50_ms': _percentile(total, 0.5),
+            'p95_ms': _percentile(total, 0.95),
+            'p99_ms': _percentile(total, 0.99),
+            'db_p95_ms': _percentile([sample.db_ms for sample in samples], 0.95),
+            'template_p95_ms': _percentile([sample.template_ms for sample in samples], 0.95),
+            'queries_p95': _percentile([sample.queries for sample in samples], 0.95),
+            'duplicates_p95': _percentile([sample.duplicates for sample in samples], 0.95),
+            'errors': sum(sample.status >= 500 for sample in samples),
+            'worst_duplicate': {'runs': worst[0], 'sql': worst[1]} if worst else None,
+        })
+    rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return rows
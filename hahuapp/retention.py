@@ -0,0 +1,107 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import transcoding
+from .models import (
+    MediaJob,
+    RecordingUpload,
+    VideoResponse,
+    VoiceRecording,
+    WordAudioRecording,
+    WordCharade,
+    WordCountdownRecording,
+)
+
+### ---------------- Retention -------------------
+#
+# Each policy says how long rows of a model are kept, by which (indexed)
+# date column, and which fields hold files. A sweep works in batches: it
+# reads the oldest expired rows, removes their files (with the originals
+# their transcoding jobs kept) with a small thread pool, then deletes the rows in a short transaction of their own, so no
+# lock is held for long.
+#
+# Files go before rows. If a sweep is interrupted, the rows of the batch in
+# flight are still there and the next run picks them up again (removing a
+# file that is already gone is a no-op), so sweeps resume without any saved
+# state.
+
+BATCH_SIZE = 500
+FILE_WORKERS = 8
+
+RetentionPolicy = namedtuple('RetentionPolicy', ['model', 'date_field', 'max_age', 'file_fields'], defaults=((),))
+
+POLICIES = [
+    RetentionPolicy(WordCharade, 'sent_at', timedelta(days=3), ('recording',)),
+    RetentionPolicy(WordCountdownRecording, 'submission_date', timedelta(days=30), ('audio_file',)),
+    RetentionPolicy(WordAudioRecording, 'uploaded_at', timedelta(days=30), ('recording_file',)),
+    RetentionPolicy(VoiceRecording, 'created_at', timedelta(days=30), ('audio_file',)),
+    RetentionPolicy(VideoResponse, 'submitted_at', timedelta(days=180)),
+    # Abandoned chunked uploads, `parts` lists the stored chunks
+    RetentionPolicy(RecordingUpload, 'created_at', timedelta(days=2), ('parts',)),
+]
+
+SweepResult = namedtuple('SweepResult', ['model', 'rows', 'files', 'reclaimed'])
+
+
+def policy_for(model):
+    return next(policy for policy in POLICIES if policy.model is model)
+
+
+def expired(policy, at=None):
+    cutoff = (at or now()) - policy.max_age
+    return policy.model.objects.filter(**{f'{policy.date_field}__lt': cutoff})
+
+
+def remove_file(name):
+    """Delete a stored file, returns the bytes reclaimed, or None if it was already gone or can't be deleted."""
+    try:
+        size = default_storage.size(name)
+        default_storage.delete(name)
+    except OSError:
+        return None
+    return size
+
+
+def sweep(policy, batch_size=BATCH_SIZE, workers=FILE_WORKERS, at=None):
+    """Delete the expired rows of one policy and their files, returns a SweepResult."""
+    queryset = expired(policy, at).order_by(policy.date_field, 'pk')
+    rows = files = reclaimed = 0
+    # Transcoding jobs point at their recording by a generic key, nothing cascades to them
+    content_type = ContentType.objects.get_for_model(policy.model) if policy.model in transcoding.FIELDS_BY_MODEL else None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(queryset.values_list('pk', *policy.file_fields)[:batch_size])
+            if not batch:
+                break
+
+            names = []
+            for values in batch:
+                for value in values[1:]:
+                    if isinstance(value, list):
+                        names.extend(value)
+                    elif value:
+                        names.append(value)
+            pks = [values[0] for values in batch]
+            if content_type:
+                # Originals kept next to their renditions (MEDIA_KEEP_ORIGINALS)
+                names.extend(MediaJob.objects.filter(
+                    content_type=content_type, object_id__in=pks,
+                ).exclude(kept_original='').values_list('kept_original', flat=True))
+            removed = [size for size in executor.map(remove_file, names) if size is not None]
+            reclaimed += sum(removed)
+            files += len(removed)
+
+            with transaction.atomic():
+                policy.model.objects.filter(pk__in=pks).delete()
+                if content_type:
+                    MediaJob.objects.filter(content_type=content_type, object_id__in=pks).delete()
+            rows += len(batch)
+
+    return SweepResult(policy.model, rows, files, reclaimed)
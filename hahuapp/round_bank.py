@@ -0,0 +1,119 @@
+import logging
+import multiprocessing
+import random
+
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from . import boards, reference_data
+from .models import GameRound, WordAudio
+from .question_pool import get_pool
+
+### ---------------- Round Bank -------------------
+#
+# Boards that are costly to build (see boards.py) are generated offline by
+# `manage.py generate_rounds` and stored as GameRound rows numbered 0..n-1
+# within each game. Serving one is a random slot and a single lookup on the
+# (game, slot) unique index; the size of each bank is kept in the cache.
+#
+# Regenerating replaces a game's bank in one transaction, so content edits
+# reach the games on the next run of the command. A view whose bank is empty
+# builds its board on the spot from a small live sample instead. When the
+# content can't fill a board either, get_board() logs it and returns None,
+# and the view answers 404.
+
+ROUNDS_PER_GAME = 5000
+BATCH_SIZE = 250  # Boards per worker task
+SIZE_TIMEOUT = 60 * 60
+
+log = logging.getLogger('hahuapp.round_bank')
+
+
+def word_hunt_source():
+    return {
+        'words': list(WordAudio.objects.values_list('word', flat=True).distinct()),
+        'letters': reference_data.letters(),
+    }
+
+
+def word_hunt_live_source():
+    return {
+        'words': [word.word for word in get_pool(WordAudio).sample(3, unique_by='word')],
+        'letters': reference_data.letters(),
+    }
+
+
+def find_family_source():
+    return [(family.letter, family.family) for family in reference_data.letter_families.all()]
+
+
+def find_family_live_source():
+    return [(family.letter, family.family) for family in reference_data.letter_families.sample(5)]
+
+
+# game: (full source for the bank, small source for a board built on request)
+SOURCES = {
+    'word_hunt': (word_hunt_source, word_hunt_live_source),
+    'find_family': (find_family_source, find_family_live_source),
+}
+
+
+def _size_key(game):
+    return f'round_bank:{game}:size'
+
+
+def bank_size(game):
+    size = cache.get(_size_key(game))
+    if size is None:
+        size = GameRound.objects.filter(game=game).count()
+        cache.set(_size_key(game), size, SIZE_TIMEOUT)
+    return size
+
+
+def draw(game):
+    """A random stored board of a game, or None when its bank is empty."""
+    size = bank_size(game)
+    if not size:
+        return None
+    board = GameRound.objects.filter(game=game, slot=random.randrange(size)).values_list('data', flat=True).first()
+    if board is None:
+        cache.delete(_size_key(game))  # The bank was regenerated smaller
+    return board
+
+
+def get_board(game):
+    """A board for a request: from the bank, or built now when the bank is empty. None without the content for one."""
+    board = draw(game)
+    if board is None:
+        board = boards.BUILDERS[game](SOURCES[game][1](), random)
+        if board is None:
+            log.warning("No %s board: the round bank is empty and the content can't fill one", game)
+    return board
+
+
+def generate(game, count=ROUNDS_PER_GAME, workers=None, seed=None):
+    """Build `count` boards of a game with a process pool, returns them."""
+    source = SOURCES[game][0]()
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    tasks = [
+        (game, source, seed + index, min(BATCH_SIZE, count - start))
+        for index, start in enumerate(range(0, count, BATCH_SIZE))
+    ]
+    if workers == 1:
+        results = [boards.build_batch(*task) for task in tasks]
+    else:
+        connections.close_all()  # Don't share the open connection with forked workers
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.starmap(boards.build_batch, tasks)
+    return [board for batch in results for board in batch]
+
+
+def store(game, rounds):
+    """Replace the bank of a game with `rounds`."""
+    with transaction.atomic():
+        GameRound.objects.filter(game=game).delete()
+        GameRound.objects.bulk_create(
+            (GameRound(game=game, slot=slot, data=data) for slot, data in enumerate(rounds)),
+            batch_size=1000,
+        )
+        transaction.on_commit(lambda: cache.set(_size_key(game), len(rounds), SIZE_TIMEOUT))
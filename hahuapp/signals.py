@@ -0,0 +1,76 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import images, question_pool, reference_data, transcoding
+from .course_outline import outline
+from .leaderboard import leaderboard
+from .models import Level, Module, Slide, SlideContent, UserProfile
+
+
+# keep the in-memory question pools in step with the content tables
+
+@receiver(post_save, dispatch_uid='hahuapp_question_pool_save')
+def update_question_pools_on_save(sender, instance, created, **kwargs):
+    question_pool.handle_save(sender, instance, created)
+
+
+@receiver(post_delete, dispatch_uid='hahuapp_question_pool_delete')
+def update_question_pools_on_delete(sender, instance, **kwargs):
+    question_pool.handle_delete(sender, instance)
+
+
+# reload the reference tables kept in memory
+
+@receiver(post_save, dispatch_uid='hahuapp_reference_data_save')
+@receiver(post_delete, dispatch_uid='hahuapp_reference_data_delete')
+def invalidate_reference_data(sender, **kwargs):
+    reference_data.handle_change(sender)
+
+
+# keep the leaderboard index in step with the profiles
+
+@receiver(post_save, sender=UserProfile, dispatch_uid='hahuapp_leaderboard_save')
+def update_leaderboard_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'aura_points' not in update_fields:
+        if 'is_subscribed' in update_fields:
+            leaderboard.invalidate()  # Joined the leaderboard with points that weren't saved here
+        return
+    if isinstance(instance.aura_points, int):
+        leaderboard.update(instance.id, instance.aura_points, instance.is_subscribed)
+    else:
+        leaderboard.invalidate()  # Saved with an F() expression, the value is unknown here
+
+
+@receiver(post_delete, sender=UserProfile, dispatch_uid='hahuapp_leaderboard_delete')
+def update_leaderboard_on_delete(sender, instance, **kwargs):
+    leaderboard.remove(instance.id)
+
+
+# rebuild the course outline after any change to its structure
+
+@receiver(post_save, sender=Level, dispatch_uid='hahuapp_outline_level_save')
+@receiver(post_save, sender=Module, dispatch_uid='hahuapp_outline_module_save')
+@receiver(post_save, sender=Slide, dispatch_uid='hahuapp_outline_slide_save')
+@receiver(post_save, sender=SlideContent, dispatch_uid='hahuapp_outline_content_save')
+@receiver(post_delete, sender=Level, dispatch_uid='hahuapp_outline_level_delete')
+@receiver(post_delete, sender=Module, dispatch_uid='hahuapp_outline_module_delete')
+@receiver(post_delete, sender=Slide, dispatch_uid='hahuapp_outline_slide_delete')
+@receiver(post_delete, sender=SlideContent, dispatch_uid='hahuapp_outline_content_delete')
+def invalidate_course_outline(sender, **kwargs):
+    outline.invalidate_on_commit()
+
+
+# queue uploaded recordings and lesson media for transcoding
+
+@receiver(post_save, dispatch_uid='hahuapp_media_jobs_save')
+def queue_media_transcoding(sender, instance, update_fields=None, raw=False, **kwargs):
+    if not raw:
+        transcoding.handle_save(sender, instance, update_fields)
+
+
+# resize uploaded images for srcset
+
+@receiver(post_save, dispatch_uid='hahuapp_image_derivatives_save')
+def create_image_derivatives(sender, instance, update_fields=None, raw=False, **kwargs):
+    if not raw:
+        images.handle_save(sender, instance, update_fields)
@@ -0,0 +1,46 @@
+// Search boxes in place of <select>s of every row on the custom admin pages.
+//
+// An <input data-autocomplete="url"> follows the hidden input that holds the
+// chosen pk. Typing asks url?q= for matches ({results: [{id, text}]}) and
+// offers them in a <datalist>; picking one stores its pk, clearing the box
+// clears it.
+(function () {
+  let lists = 0;
+
+  function bind(input) {
+    const hidden = input.previousElementSibling;
+    const datalist = document.createElement("datalist");
+    datalist.id = `autocomplete-${++lists}`;
+    input.setAttribute("list", datalist.id);
+    input.after(datalist);
+
+    const ids = new Map(); // option text -> pk
+    let timer = null;
+
+    input.addEventListener("input", () => {
+      if (ids.has(input.value)) {
+        hidden.value = ids.get(input.value);
+        return;
+      }
+      if (!input.value) hidden.value = "";
+      clearTimeout(timer);
+      timer = setTimeout(async () => {
+        const response = await fetch(`${input.dataset.autocomplete}?q=${encodeURIComponent(input.value)}`);
+        if (!response.ok) return;
+        const { results } = await response.json();
+        ids.clear();
+        datalist.replaceChildren(...results.map(({ id, text }) => {
+          const label = `${text} #${id}`;
+          ids.set(label, id);
+          const option = document.createElement("option");
+          option.value = label;
+          return option;
+        }));
+      }, 200);
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", () => {
+    document.querySelectorAll("input[data-autocomplete]").forEach(bind);
+  });
+})();
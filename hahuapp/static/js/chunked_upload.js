@@ -0,0 +1,60 @@
+// Chunked, resumable upload of a recording Blob to /recording-uploads/.
+//
+// uploadRecording(blob, {url, kind, contentType, objectId, filename, csrfToken})
+// resolves with the final upload status. `url` is where uploads start, from
+// {% url 'start-recording-upload' %}; each upload's status carries the URL of
+// its chunks. A failed chunk is retried after asking the server how much it
+// already stored.
+async function uploadRecording(blob, options) {
+  const form = new FormData();
+  form.append("kind", options.kind);
+  form.append("content_type", options.contentType);
+  form.append("object_id", options.objectId);
+  form.append("filename", options.filename);
+  form.append("size", blob.size);
+
+  let response = await fetch(options.url, {
+    method: "POST",
+    headers: { "X-CSRFToken": options.csrfToken },
+    body: form,
+  });
+  let status = await response.json();
+  if (!response.ok) throw new Error(status.error);
+
+  const url = status.url;
+  let retries = 0;
+  while (!status.complete) {
+    if (status.offset >= blob.size) {
+      // Every byte is stored and another request is assembling the recording
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+    const chunk = blob.slice(status.offset, status.offset + status.chunk_size);
+    try {
+      response = await fetch(url, {
+        method: "PUT",
+        headers: {
+          "X-CSRFToken": options.csrfToken,
+          "Content-Type": "application/octet-stream",
+          "Upload-Offset": status.offset,
+        },
+        body: chunk,
+      });
+      const result = await response.json();
+      if (response.ok || response.status === 409) {
+        status = { ...status, ...result };  // On 409 the server says where to resume
+        retries = 0;
+        continue;
+      }
+      throw new Error(result.error);
+    } catch (err) {
+      if (++retries > 5) throw err;
+      await new Promise((resolve) => setTimeout(resolve, 1000 * retries));
+      try {
+        status = { ...status, ...(await (await fetch(url)).json()) };
+      } catch (_) {
+        // Still offline, the next attempt asks again
+      }
+    }
+  }
+  return status;
+}
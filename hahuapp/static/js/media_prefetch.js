@@ -0,0 +1,28 @@
+// Loads every clip in a page's media manifest (see hahuapp/prefetch.py) with
+// one request to its bundle, then slices the bundle into object URLs using
+// the manifest's offsets.
+//
+// mediaPrefetch.url(url) gives the loaded clip for a media URL, or the URL
+// itself while the bundle is loading or when it couldn't be used.
+const mediaPrefetch = (() => {
+  const element = document.getElementById("media-manifest");
+  const manifest = element ? JSON.parse(element.textContent) : { bundle: null, clips: {} };
+  const objectUrls = {};
+
+  const ready = manifest.bundle
+    ? fetch(manifest.bundle)
+        .then((response) => {
+          if (!response.ok) throw new Error(`bundle answered ${response.status}`);
+          return response.arrayBuffer();
+        })
+        .then((buffer) => {
+          for (const [url, clip] of Object.entries(manifest.clips)) {
+            const bytes = buffer.slice(clip.offset, clip.offset + clip.length);
+            objectUrls[url] = URL.createObjectURL(new Blob([bytes], { type: clip.type }));
+          }
+        })
+        .catch((error) => console.warn("Loading clips one by one:", error))
+    : Promise.resolve();
+
+  return { ready, url: (url) => objectUrls[url] || url };
+})();
@@ -0,0 +1,499 @@
+import io
+import random
+import unicodedata
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, models, transaction
+from django.utils import timezone
+from PIL import Image
+
+from .models import (
+    AmharicEnglishMatching,
+    AmharicLetterAudio,
+    AmharicLetterFamily,
+    BingoItem,
+    BingoQuestion,
+    DescriptiveImage,
+    DescriptiveSentenceQuestion,
+    Event,
+    FillInTheBlank,
+    Level,
+    LetterFillIn,
+    LetterImage,
+    LetterSound,
+    LetterSoundSequence,
+    LetterVideo,
+    Module,
+    NumberToWord,
+    Numbers,
+    PointHistory,
+    Paragraph,
+    ParagraphCreation,
+    Passage,
+    Sentence,
+    SentencePunctuation,
+    SentenceSynonym,
+    Slide,
+    SlideContent,
+    SlideQuestion,
+    Story,
+    StoryPart,
+    StoryQuestion,
+    UserLevelProgress,
+    UserModuleProgress,
+    UserProfile,
+    UserSlideProgress,
+    Video,
+    WordAudio,
+    WordVideo,
+)
+
+### ---------------- Synthetic Content -------------------
+#
+# Fills the database with generated Amharic content and learners, for
+# benchmarks and load tests (see benchmark.py and `manage.py
+# generate_synthetic_data`).
+#
+# populate(rows) makes `rows` rows of each game table (WordAudio,
+# LetterSound, Sentence, ...). Tables with children get about as many child
+# rows (e.g. StoryPart), and the course tree is capped at MAX_SLIDES slides.
+# populate_learners() adds users with their profiles, referral trees,
+# progress through the course and point history, for the leaderboards and
+# the admin.
+#
+# Content rows are made by the factories in FACTORIES, plain functions of
+# (rng, index) returning an unsaved instance. Everything is written with
+# bulk_create in batches of BATCH_SIZE, and the same seed gives the same data.
+# Media fields point to a few placeholder names per kind under MEDIA_DIR;
+# write_media() creates those files, each a few hundred bytes.
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000}
+BATCH_SIZE = 2000
+MAX_SLIDES = 5000
+LEVEL_NAMES = ['Beginner', 'Basic', 'Advanced', 'Pro']  # The names the games page knows
+MODULES_PER_LEVEL = 10
+PARTS_PER_STORY = 5
+QUESTIONS_PER_PART = 2
+OPTIONS_PER_BINGO_QUESTION = 4
+SOUNDS_PER_SEQUENCE = 3
+MEDIA_DIR = 'synthetic'
+MEDIA_FILES_PER_KIND = 20
+
+LEARNER_PREFIX = 'learner-'
+LEARNER_PASSWORD = 'learner-password'  # Every synthetic learner's, for load tests
+REFERRED_SHARE = 0.6  # Learners who signed up with a referral code
+SUBSCRIBED_SHARE = 0.3
+HISTORY_DAYS = 180  # Point history is spread over this many days up to now
+
+# Each consonant of the Ethiopic block takes a row of 8 code points, the
+# first 7 being its vowel orders. Rows with an unassigned order are skipped.
+FIDEL_START, FIDEL_END = 0x1200, 0x1357
+FAMILIES = [
+    [chr(code + order) for order in range(7)]
+    for code in range(FIDEL_START, FIDEL_END, 8)
+    if all(unicodedata.name(chr(code + order), None) for order in range(7))
+]
+FIDEL = [letter for family in FAMILIES for letter in family]
+PUNCTUATION = ['።', '፣', '፤', '?', '!']
+ENGLISH_WORDS = ['house', 'water', 'child', 'market', 'school', 'river', 'bread', 'coffee', 'road', 'sun']
+
+
+def rows_for(scale):
+    """The rows for a scale: one of SCALES or a number. None when it's neither."""
+    scale = str(scale)
+    return SCALES.get(scale) or (int(scale) if scale.isdigit() and int(scale) > 0 else None)
+
+
+def letter(rng):
+    return rng.choice(FIDEL)
+
+
+def word(rng, shortest=2, longest=5):
+    return ''.join(rng.choices(FIDEL, k=rng.randint(shortest, longest)))
+
+
+def words(rng, count):
+    return [word(rng) for _ in range(count)]
+
+
+def sentence(rng, shortest=4, longest=9):
+    return ' '.join(words(rng, rng.randint(shortest, longest))) + '።'
+
+
+def paragraph(rng, sentences=4):
+    return ' '.join(sentence(rng) for _ in range(sentences))
+
+
+def media(kind, index, extension):
+    """A placeholder file name, rows share MEDIA_FILES_PER_KIND files of each kind."""
+    return f'{MEDIA_DIR}/{kind}/{index % MEDIA_FILES_PER_KIND}.{extension}'
+
+
+## ---- flat tables: (rng, index) -> unsaved instance ----
+
+def _letter_fill_in(rng, index):
+    correct = word(rng, 3, 5)
+    position = rng.randrange(len(correct))
+    choices = [correct[position]] + rng.sample(FIDEL, 3)
+    rng.shuffle(choices)
+    return LetterFillIn(
+        correct_word=correct,
+        display_word=correct[:position] + '_' + correct[position + 1:],
+        correct_letter=correct[position],
+        choices=choices,
+        meaning=rng.choice(ENGLISH_WORDS),
+    )
+
+
+def _fill_in_the_blank(rng, index):
+    answer = word(rng)
+    return FillInTheBlank(question=f'{word(rng)} __ {sentence(rng, 2, 4)}', correct_answer=answer)
+
+
+def _sentence_punctuation(rng, index):
+    text = sentence(rng)[:-1]
+    mark = rng.choice(PUNCTUATION)
+    return SentencePunctuation(text=text, correct_text=text + mark, choices=','.join(PUNCTUATION), correct_answer=mark)
+
+
+def _paragraph_creation(rng, index):
+    sentences = [sentence(rng) for _ in range(4)]
+    # bulk_create skips ParagraphCreation.save(), which sets correct_order
+    return ParagraphCreation(correct_paragraph=' '.join(sentences), sentences=sentences, correct_order=list(sentences))
+
+
+def _event(rng, index):
+    start = timezone.now() + timedelta(days=rng.randint(-365, 365))
+    return Event(
+        title=sentence(rng, 2, 4), description=paragraph(rng, 2),
+        start_date=start, end_date=start + timedelta(hours=2), location=word(rng),
+    )
+
+
+FACTORIES = {
+    LetterSound: lambda rng, i: LetterSound(letter=letter(rng), sound_field=media('sounds', i, 'mp3')),
+    LetterImage: lambda rng, i: LetterImage(letter=letter(rng), image=media('letter_images', i, 'png')),
+    LetterVideo: lambda rng, i: LetterVideo(letter_set=', '.join(rng.sample(FIDEL, 4)), video=media('letter_videos', i, 'mp4')),
+    WordAudio: lambda rng, i: WordAudio(
+        word=word(rng), audio_file=media('word_audios', i, 'mp3'), image=media('word_images', i, 'png'),
+        definition=sentence(rng), acceptable_characters=''.join(rng.sample(FIDEL, 6)),
+    ),
+    WordVideo: lambda rng, i: WordVideo(word=word(rng), video_file=media('word_videos', i, 'mp4'), hint=sentence(rng, 2, 4)),
+    Sentence: lambda rng, i: Sentence(sentence=sentence(rng), definition=sentence(rng)),
+    Passage: lambda rng, i: Passage(paragraph=paragraph(rng), main_idea=sentence(rng), wrong_choices=[sentence(rng) for _ in range(3)]),
+    Paragraph: lambda rng, i: Paragraph(content=paragraph(rng), definition=sentence(rng)),
+    ParagraphCreation: _paragraph_creation,
+    DescriptiveImage: lambda rng, i: DescriptiveImage(image=media('descriptive_images', i, 'png'), correct_word=word(rng)),
+    DescriptiveSentenceQuestion: lambda rng, i: DescriptiveSentenceQuestion(
+        image=media('descriptive_sentences', i, 'png'), correct_sentence=sentence(rng),
+    ),
+    FillInTheBlank: _fill_in_the_blank,
+    Numbers: lambda rng, i: Numbers(number=i + 1, word=f'number {i + 1}', amharic_word=word(rng)),
+    NumberToWord: lambda rng, i: NumberToWord(number=i + 1, amharic_number=word(rng, 1, 3), number_name=word(rng)),
+    LetterFillIn: _letter_fill_in,
+    AmharicEnglishMatching: lambda rng, i: AmharicEnglishMatching(amharic_sentence=sentence(rng), english_sentence=' '.join(rng.sample(ENGLISH_WORDS, 4))),
+    SentenceSynonym: lambda rng, i: SentenceSynonym(sentence=sentence(rng), correct_word=word(rng), hint=word(rng)),
+    SentencePunctuation: _sentence_punctuation,
+    Video: lambda rng, i: Video(title=sentence(rng, 2, 4), video_file=media('videos', i, 'mp4')),
+    BingoItem: lambda rng, i: BingoItem(title=word(rng), item_type='image', image=media('bingo', i, 'png')),
+    Event: _event,
+}
+
+
+def _bulk_create(model, objs, batch_size):
+    """bulk_create an iterable in batches, returns the created instances."""
+    objs, created = iter(objs), []
+    while batch := list(islice(objs, batch_size)):
+        created.extend(model.objects.bulk_create(batch))
+    return created
+
+
+def _bulk_insert(model, objs, batch_size):
+    """_bulk_create() for large tables, returns only the number of rows."""
+    objs, count = iter(objs), 0
+    while batch := list(islice(objs, batch_size)):
+        count += len(model.objects.bulk_create(batch))
+    return count
+
+
+## ---- tables with children ----
+
+def _letter_families(rng, rows, batch_size):
+    families = _bulk_create(
+        AmharicLetterFamily,
+        (AmharicLetterFamily(letter=family[0], family=family) for family in islice(_cycle(rng, FAMILIES), rows)),
+        batch_size,
+    )
+    # One set of letter recordings, for the first family of each letter
+    _bulk_create(AmharicLetterAudio, (
+        AmharicLetterAudio(family=family, letter=member, audio_file=media('amharic_audio', index * 7 + order, 'mp3'))
+        for index, family in enumerate(families[:len(FAMILIES)]) for order, member in enumerate(family.family)
+    ), batch_size)
+
+
+def _cycle(rng, items):
+    while True:
+        yield from rng.sample(items, len(items))
+
+
+def _stories(rng, rows, batch_size):
+    stories = _bulk_create(Story, (
+        Story(title=sentence(rng, 2, 4), description=sentence(rng), cover_image=media('story_covers', i, 'png'))
+        for i in range(max(rows // PARTS_PER_STORY, 1))
+    ), batch_size)
+    parts = _bulk_create(StoryPart, (
+        StoryPart(
+            story=story, part_number=number, text_content=paragraph(rng, 2),
+            audio_file=media('story_audios', index * PARTS_PER_STORY + number, 'mp3'),
+        )
+        for index, story in enumerate(stories) for number in range(1, PARTS_PER_STORY + 1)
+    ), batch_size)
+
+    def question(part):
+        options = words(rng, 4)
+        return StoryQuestion(part=part, question_text=sentence(rng), correct_answer=options[0], options=options)
+    _bulk_create(StoryQuestion, (question(part) for part in parts for _ in range(QUESTIONS_PER_PART)), batch_size)
+
+
+def _course(rng, rows, batch_size):
+    first = (Level.objects.order_by('-order').values_list('order', flat=True).first() or 0) + 1  # Level.order is unique
+    levels = _bulk_create(Level, (
+        Level(name=name, description=sentence(rng), order=order)
+        for order, name in enumerate(LEVEL_NAMES, first)
+    ), batch_size)
+    modules = _bulk_create(Module, (
+        Module(name=word(rng), description=sentence(rng), level=level, order=order)
+        for level in levels for order in range(1, MODULES_PER_LEVEL + 1)
+    ), batch_size)
+    per_module = max(min(rows, MAX_SLIDES) // len(modules), 1)
+    slides = _bulk_create(Slide, (
+        Slide(title=sentence(rng, 2, 4), module=module, order=order)
+        for module in modules for order in range(1, per_module + 1)
+    ), batch_size)
+    _bulk_create(SlideContent, (
+        SlideContent(slide=slide, content_type='Text', text_content=paragraph(rng, 2), order=1) for slide in slides
+    ), batch_size)
+
+    def question(slide):
+        choices = words(rng, 4)
+        return SlideQuestion(
+            slide=slide, question_text=sentence(rng), correct_answer=rng.randint(1, 4),
+            choice1=choices[0], choice2=choices[1], choice3=choices[2], choice4=choices[3],
+        )
+    _bulk_create(SlideQuestion, (question(slide) for slide in slides), batch_size)
+
+
+def _bingo_questions(rng, rows, batch_size):
+    items = list(BingoItem.objects.values_list('pk', flat=True))
+    if len(items) < OPTIONS_PER_BINGO_QUESTION:
+        return
+    draws = [rng.sample(items, OPTIONS_PER_BINGO_QUESTION) for _ in range(max(rows // 10, 1))]
+    questions = _bulk_create(BingoQuestion, (
+        BingoQuestion(question_text=sentence(rng, 3, 5), correct_item_id=options[0]) for options in draws
+    ), batch_size)
+    through = BingoQuestion.options.through
+    _bulk_create(through, (
+        through(bingoquestion_id=question.pk, bingoitem_id=item)
+        for question, options in zip(questions, draws) for item in options
+    ), batch_size)
+
+
+def _letter_sound_sequences(rng, rows, batch_size):
+    sounds = list(LetterSound.objects.values_list('pk', 'letter'))
+    if len(sounds) < SOUNDS_PER_SEQUENCE:
+        return
+    draws = [rng.sample(sounds, SOUNDS_PER_SEQUENCE) for _ in range(max(rows // 10, 1))]
+    sequences = _bulk_create(LetterSoundSequence, (
+        LetterSoundSequence(correct_order=','.join(letter for _, letter in draw)) for draw in draws
+    ), batch_size)
+    through = LetterSoundSequence.sounds.through
+    _bulk_create(through, (
+        through(lettersoundsequence_id=sequence.pk, lettersound_id=pk)
+        for sequence, draw in zip(sequences, draws) for pk, _ in draw
+    ), batch_size)
+
+
+# Run after FACTORIES, in this order, as some draw from the rows made before
+TREES = [_letter_families, _stories, _course, _bingo_questions, _letter_sound_sequences]
+
+
+def populate(rows, seed=0, batch_size=BATCH_SIZE):
+    """Create `rows` rows of every content table (see above), returns {model name: rows created}."""
+    rng = random.Random(seed)
+    tables = list(FACTORIES) + [AmharicLetterFamily, AmharicLetterAudio, Story, StoryPart, StoryQuestion,
+                                Level, Module, Slide, SlideContent, SlideQuestion, BingoQuestion, LetterSoundSequence]
+    before = {model: model.objects.count() for model in tables}
+    with transaction.atomic():
+        for model, factory in FACTORIES.items():
+            _bulk_create(model, (factory(rng, index) for index in range(rows)), batch_size)
+        for build in TREES:
+            build(rng, rows, batch_size)
+    return {model.__name__: model.objects.count() - before[model] for model in tables}
+
+
+## ---- learners ----
+
+def _points(rng, reason_code):
+    if reason_code == PointHistory.DAILY_LOGIN:
+        return 10
+    if reason_code in (PointHistory.REFERRAL, PointHistory.DOWNLINE):
+        return rng.choice((5, 10, 20))
+    return rng.randint(1, 10)
+
+
+def populate_learners(count, point_history=0, slide_progress=0, seed=0, batch_size=BATCH_SIZE):
+    """
+    Create `count` learners: users (all with LEARNER_PASSWORD) and profiles,
+    REFERRED_SHARE of them referred by an earlier learner. Each gets level
+    progress, module progress up to their level and on average `slide_progress`
+    completed slides, in course order. Then `point_history` PointHistory rows
+    spread over the learners and the last HISTORY_DAYS, with aura_points
+    matching. Returns {model name: rows created}.
+    """
+    rng = random.Random(seed)
+    levels = list(Level.objects.order_by('order'))
+    modules = list(Module.objects.order_by('level__order', 'order').values_list('pk', 'level__order'))
+    slides = list(Slide.objects.order_by('module__level__order', 'module__order', 'order').values_list('pk', flat=True))
+    password = make_password(LEARNER_PASSWORD)  # Hashing is slow, every learner shares the hash
+    first = User.objects.filter(username__startswith=LEARNER_PREFIX).count()
+    created = defaultdict(int)
+
+    profiles = []  # (profile pk, user pk, level order)
+    referrals = defaultdict(list)  # referrer pk -> learner pks
+    with transaction.atomic():
+        for start in range(first, first + count, batch_size):
+            numbers = range(start, min(start + batch_size, first + count))
+            users = User.objects.bulk_create(
+                User(username=f'{LEARNER_PREFIX}{number}', password=password, email=f'{LEARNER_PREFIX}{number}@example.com')
+                for number in numbers
+            )
+            earlier = len(profiles)  # Referrers come from earlier batches, whose keys are known
+            batch = []
+            for number, user in zip(numbers, users):
+                level = rng.choice(levels) if levels else None
+                referrer = profiles[rng.randrange(earlier)][0] if earlier and rng.random() < REFERRED_SHARE else None
+                batch.append(UserProfile(
+                    user=user, full_name=f'{word(rng)} {word(rng)}', referral_code=f'SY{number:08d}',
+                    rank='', related_level=level, is_subscribed=rng.random() < SUBSCRIBED_SHARE, referred_by_id=referrer,
+                ))
+            for profile in UserProfile.objects.bulk_create(batch):
+                profiles.append((profile.pk, profile.user_id, profile.related_level.order if profile.related_level else 0))
+                if profile.referred_by_id:
+                    referrals[profile.referred_by_id].append(profile.pk)
+            created['User'] += len(users)
+
+        created['UserProfile'] = len(profiles)
+
+        created['UserLevelProgress'] = _bulk_insert(UserLevelProgress, (
+            UserLevelProgress(user_id=user, level=level, is_locked=level.order > order)
+            for _, user, order in profiles for level in levels
+        ), batch_size)
+        # Module rows for the unlocked levels only, as a learner gets them while going through the course
+        created['UserModuleProgress'] = _bulk_insert(UserModuleProgress, (
+            UserModuleProgress(user_id=user, module_id=module, is_locked=False)
+            for _, user, order in profiles for module, level_order in modules if level_order <= order
+        ), batch_size)
+        if slides and slide_progress:
+            completed_at = timezone.now()
+
+            def progress(user):
+                done = min(rng.randint(0, 2 * slide_progress), len(slides))
+                for index, slide in enumerate(slides[:done + 1]):
+                    yield UserSlideProgress(
+                        user_id=user, slide_id=slide, is_completed=index < done,
+                        completed_at=completed_at if index < done else None,
+                    )
+            created['UserSlideProgress'] = _bulk_insert(
+                UserSlideProgress, (row for _, user, _ in profiles for row in progress(user)), batch_size,
+            )
+
+        if profiles and point_history:
+            created['PointHistory'] = _point_history(rng, profiles, referrals, point_history, batch_size)
+    return dict(created)
+
+
+def _point_history(rng, profiles, referrals, total, batch_size):
+    """
+    Create `total` PointHistory rows, oldest first, and add them to aura_points.
+    The rows go in with a plain executemany: building model instances would
+    take most of the time, and bulk_create would overwrite the created_at
+    (auto_now_add) the history is spread over.
+    """
+    pks = [pk for pk, _, _ in profiles]
+    codes = [PointHistory.ACTIVITY, PointHistory.DAILY_LOGIN, PointHistory.REFERRAL]
+    weights = [75, 20, 5]
+    reasons = dict(PointHistory.REASON_CODE_CHOICES)
+    totals = defaultdict(int)
+    first_day = timezone.now() - timedelta(days=HISTORY_DAYS)
+    step = timedelta(days=HISTORY_DAYS) / total
+
+    fields = ['user_profile', 'points', 'reason', 'reason_code', 'source_profile', 'created_at']
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(PointHistory._meta.db_table),
+        ', '.join(quote(PointHistory._meta.get_field(name).column) for name in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, total, batch_size):
+            batch = []
+            for index in range(start, min(start + batch_size, total)):
+                pk = rng.choice(pks)
+                code = rng.choices(codes, weights)[0]
+                source = None
+                if code == PointHistory.REFERRAL:
+                    if referrals.get(pk):
+                        source = rng.choice(referrals[pk])
+                    else:
+                        code = PointHistory.ACTIVITY
+                points = _points(rng, code)
+                totals[pk] += points
+                created_at = connection.ops.adapt_datetimefield_value(first_day + step * index)
+                batch.append((pk, points, reasons[code], code, source, created_at))
+            cursor.executemany(sql, batch)
+
+    UserProfile.objects.bulk_update(
+        [UserProfile(pk=pk, aura_points=points) for pk, points in totals.items()], ['aura_points'], batch_size=1000,
+    )
+    return total
+
+
+## ---- placeholder media ----
+
+@lru_cache
+def placeholder(extension):
+    """The content of a tiny file of a type, by extension."""
+    if extension in ('png', 'jpg', 'jpeg', 'webp'):
+        output = io.BytesIO()
+        Image.new('RGB', (8, 8), (200, 120, 40)).save(output, 'PNG' if extension == 'png' else extension.replace('jpg', 'jpeg').upper())
+        return output.getvalue()
+    if extension == 'mp3':
+        return bytes.fromhex('fffb9064') + bytes(413)  # One silent MPEG-1 Layer III frame
+    if extension == 'mp4':
+        return bytes.fromhex('00000018') + b'ftypmp42' + bytes(4) + b'mp42isom'
+    return b''
+
+
+def write_media():
+    """Create the placeholder files the synthetic rows point to, returns how many were written."""
+    names = set()
+    for model in list(FACTORIES) + [AmharicLetterAudio, Story, StoryPart]:
+        for field in model._meta.fields:
+            if isinstance(field, models.FileField):
+                names.update(
+                    model.objects.filter(**{f'{field.name}__startswith': f'{MEDIA_DIR}/'})
+                    .values_list(field.name, flat=True).distinct()
+                )
+    written = 0
+    for name in sorted(names):
+        if not default_storage.exists(name):
+            default_storage.save(name, ContentFile(placeholder(name.rsplit('.', 1)[-1])))
+            written += 1
+    return written
@@ -1,4 +1,8 @@
 from django import template
+from django.utils.html import format_html, format_html_join
+
+from hahuapp.images import derivatives, image_srcset, srcset
+from hahuapp.media import versioned_url
 
 register = template.Library()
 
@@ -8,3 +12,39 @@ def get_item(dictionary, key):
         return dictionary.get(key)
     except (TypeError, AttributeError):
         return None
+
+
+@register.filter
+def media_url(field_file):
+    """URL of an uploaded file with its version token, so browsers can cache it for long."""
+    return versioned_url(field_file)
+
+
+@register.simple_tag
+def responsive_image(field_file, sizes='100vw', **attrs):
+    """
+    A <picture> with AVIF/WebP srcsets for an uploaded image, falling back
+    to the original. Extra keyword arguments become <img> attributes, e.g.
+    {% responsive_image word.image sizes="200px" class="img-fluid" alt=word.word %}
+    """
+    if not field_file:
+        return ''
+    img = format_html(
+        '<img src="{}" loading="lazy" decoding="async"{}>',
+        field_file.url, format_html_join('', ' {}="{}"', attrs.items()),
+    )
+    manifest = derivatives(field_file)
+    if manifest is None:
+        return img
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((fmt, srcset(manifest, fmt), sizes) for fmt in manifest['sources']),
+    )
+    # display: contents keeps the <img> laid out exactly as it was without the wrapper
+    return format_html('<picture style="display: contents">{}{}</picture>', sources, img)
+
+
+@register.filter
+def webp_srcset(field_file):
+    """WebP srcset for an <img> whose src is swapped by script, where <picture> would get in the way."""
+    return image_srcset(field_file)
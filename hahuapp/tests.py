@@ -1,3 +1,854 @@
-from django.test import TestCase
+import io
+import logging
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Max, Min, Sum
+from django.template import Context, Template
+from django.test import LiveServerTestCase, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+import numpy as np
+from PIL import Image
+
+from .models import (
+    Event,
+    Level,
+    LetterFillIn,
+    LetterSound,
+    MediaJob,
+    Module,
+    Paragraph,
+    PointHistory,
+    RecordingUpload,
+    Sentence,
+    SentencePunctuation,
+    SentenceSynonym,
+    Slide,
+    StoryPart,
+    UserLevelProgress,
+    UserProfile,
+    UserSlideProgress,
+    WordAudio,
+    WordAudioRecording,
+    WordCharade,
+    WordCountdownRecording,
+    WordVideo,
+)
+from . import (
+    admin_lists, benchmark, images, ledger, load_test, reference_data, referrals, request_metrics, retention, round_bank,
+    synthetic, transcoding, uploads, word_grid,
+)
+from .course_outline import outline
+from .leaderboard import leaderboard
+from .media import serve_media
+from .question_pool import get_pool
+from .utils import QUESTION_TYPES, source_for
+
+
+class MultipleChoiceViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        letters = 'ሀለሐመሠረሰሸ'
+        for i, letter in enumerate(letters):
+            LetterSound.objects.create(letter=letter, sound_field=f'sounds/{i}.mp3')
+            WordAudio.objects.create(
+                word=f'ቃል{i}', audio_file=f'word_audios/{i}.mp3',
+                image=f'word_images/{i}.png', definition=f'definition {i}',
+            )
+            WordVideo.objects.create(word=f'ቪዲዮ{i}', video_file=f'word_video/{i}.mp4', hint='hint')
+            SentenceSynonym.objects.create(sentence=f'sentence {i}', correct_word=f'word {i}')
+            SentencePunctuation.objects.create(
+                text=f'text {i}', correct_text=f'text {i}.', choices='.,!,?', correct_answer='.',
+            )
+            LetterFillIn.objects.create(
+                correct_word=f'ቃል{i}', display_word=f'_ል{i}', correct_letter='ቃ',
+                choices=['ቃ', 'ሀ', 'ለ'], meaning='word',
+            )
+
+    def test_query_count_does_not_depend_on_the_mix(self):
+        url = reverse('multiple-choice')
+        sources = set()
+        for spec in QUESTION_TYPES.values():
+            sources.add(source_for(spec['model'], **spec.get('filters', {})))
+            sources.add(source_for(spec['model']))
+        # Letter sounds come from a reference table, without an in_bulk() query
+        models = {spec['model'] for spec in QUESTION_TYPES.values()} - set(reference_data.TABLES)
+
+        for _ in range(5):
+            cache.clear()
+            for source in sources:
+                source.invalidate()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['questions']), 10)
+            # Cold: a query to load each pool and table, then one in_bulk() per content model
+            self.assertLessEqual(len(queries), len(sources) + len(models))
+
+        # A cold request may not have drawn from every pool, load the rest
+        for source in sources:
+            len(source)
+        for _ in range(10):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['questions']), 10)
+            # Warm: at most one in_bulk() query per content model
+            self.assertLessEqual(len(queries), len(models))
+
+
+class QuestionPoolTests(TestCase):
+    def setUp(self):
+        self.sentences = [Sentence.objects.create(sentence=f'sentence {i}', definition=f'definition {i % 3}') for i in range(6)]
+        self.pool = get_pool(Sentence)
+        self.pool.invalidate()
+
+    def test_loads_once_and_follows_saves_and_deletes(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.pool), 6)
+            self.assertEqual(len(self.pool), 6)
+
+        added = Sentence.objects.create(sentence='new', definition='new')
+        self.sentences[0].delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.pool), 6)
+            ids = set(self.pool.sample_ids(10))
+        self.assertIn(added.pk, ids)
+        self.assertNotIn(self.sentences[0].pk, ids)
+
+        active = get_pool(Sentence, is_active=True)
+        active.invalidate()
+        self.assertEqual(len(active), 6)
+        added.is_active = False
+        added.save()
+        self.assertNotIn(added.pk, active.sample_ids(10))
+
+    def test_sample_with_exclude_and_unique_by(self):
+        rows = self.pool.sample(3, unique_by='definition')
+        self.assertEqual(len({row.definition for row in rows}), 3)
+        self.assertEqual(len(self.pool.sample(5, unique_by='definition')), 3)  # Only 3 different definitions
+
+        keep = self.sentences[2]
+        excluded = [sentence.pk for sentence in self.sentences if sentence != keep]
+        self.assertEqual(self.pool.sample(3, exclude=excluded), [keep])
+        self.assertEqual(self.pool.sample(3, exclude=excluded, unique_by='definition', exclude_values=[keep.definition]), [])
+
+    def test_discrimination_game_needs_two_different_words(self):
+        for i in range(4):
+            WordAudio.objects.create(word='ቃል', audio_file=f'word_audios/{i}.mp3', image=f'word_images/{i}.png', definition='d')
+        get_pool(WordAudio).invalidate()
+        self.assertEqual(self.client.get(reverse('word-sound-discrimination')).status_code, 404)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        points = [100, 100, 90, 80, 80, 70, 60, 50, 40, 30, 20]
+        for i, value in enumerate(points):
+            user = User.objects.create(username=f'user{i}')
+            UserProfile.objects.create(
+                user=user, full_name=f'User {i}', referral_code=f'CODE{i:06d}',
+                aura_points=value, is_subscribed=True,
+            )
+        leaderboard.invalidate()
+
+    def test_ranks_with_ties(self):
+        response = self.client.get(reverse('leaderboard'))
+        self.assertEqual([row['rank'] for row in response.context['top_3']], [1, 1, 3])
+        page = response.context['paginated_users']
+        self.assertEqual([row['rank'] for row in page], [4, 4, 6, 7, 8, 9, 10])
+        self.assertEqual(page.paginator.num_pages, 2)
+
+    def test_rank_follows_point_changes(self):
+        profile = UserProfile.objects.get(full_name='User 10')
+        self.assertEqual(leaderboard.rank_of(profile), 11)
+        profile.aura_points = 95
+        profile.save()
+        self.assertEqual(leaderboard.rank_of(profile), 3)
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.profile = UserProfile.objects.create(
+            user=User.objects.create(username='learner'), full_name='Learner',
+            referral_code='LEARNER001', aura_points=5,
+        )
+
+    def test_award_many_increments_and_logs_in_one_pass(self):
+        stale = UserProfile.objects.get(pk=self.profile.pk)
+        with self.assertNumQueries(4):  # savepoint, UPDATE, INSERT, release
+            ledger.award_many([(self.profile, 10, 'Game'), (stale, 15, 'Quiz')])
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.aura_points, 30)
+        self.assertEqual(self.profile.point_history.count(), 2)
+
+    def test_daily_login_bonus_is_awarded_once(self):
+        self.assertTrue(ledger.award_daily_login_bonus(self.profile))
+        self.assertFalse(ledger.award_daily_login_bonus(UserProfile.objects.get(pk=self.profile.pk)))
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.aura_points, 15)
+        self.assertEqual(self.profile.point_history.count(), 1)
+
+
+class PaymentBonusTests(TestCase):
+    def make_chain(self, length):
+        referrer = None
+        chain = []
+        for i in range(length):
+            referrer = UserProfile.objects.create(
+                user=User.objects.create(username=f'member{length}-{i}'), full_name=f'Member {i}',
+                referral_code=f'CHAIN{length}{i:04d}', referred_by=referrer,
+            )
+            chain.append(referrer)
+        return chain
+
+    def test_bonuses_for_the_whole_upline(self):
+        top, second, direct, payer = self.make_chain(4)
+        referrals.apply_payment_bonuses(payer)
+        referrals.apply_payment_bonuses(payer)  # A repeated confirmation awards nothing new
+
+        points = dict(UserProfile.objects.values_list('full_name', 'aura_points'))
+        self.assertEqual(points, {'Member 0': 5, 'Member 1': 15, 'Member 2': 25, 'Member 3': 100})
+
+    def test_weekly_referral_cap(self):
+        direct, payer = self.make_chain(2)
+        for i in range(referrals.WEEKLY_REFERRAL_CAP):
+            PointHistory.objects.create(
+                user_profile=direct, points=25, reason=f"Referral Bonus: Payment completed by X{i}",
+                reason_code=PointHistory.REFERRAL,
+            )
+
+        self.assertEqual(direct.successful_referrals_this_week(), referrals.WEEKLY_REFERRAL_CAP)
+        awards = referrals.apply_payment_bonuses(payer)
+        self.assertEqual([award.reason_code for award in awards], [PointHistory.WELCOME])
+
+        # Both count from the same aware local Monday midnight
+        PointHistory.objects.filter(user_profile=direct).update(created_at=referrals.start_of_week() - timedelta(seconds=1))
+        self.assertEqual(direct.successful_referrals_this_week(), 0)
+
+    def test_query_count_does_not_grow_with_chain_depth(self):
+        counts = []
+        for length in (2, 4):
+            payer = self.make_chain(length)[-1]
+            with CaptureQueriesContext(connection) as queries:
+                referrals.apply_payment_bonuses(payer)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class SlideViewTests(TestCase):
+    def setUp(self):
+        self.level = Level.objects.create(name='Beginner', description='', order=1)
+        self.modules = [
+            Module.objects.create(name=f'Module {i}', description='', level=self.level, order=i)
+            for i in (1, 2)
+        ]
+        self.slides = [
+            Slide.objects.create(title=f'Slide {i}', module=self.modules[0], order=i) for i in (1, 2)
+        ]
+        self.next_module_slide = Slide.objects.create(title='Next', module=self.modules[1], order=1)
+
+        self.user = User.objects.create(username='reader')
+        UserProfile.objects.create(
+            user=self.user, full_name='Reader', referral_code='READER0001', related_level=self.level,
+        )
+        self.client.force_login(self.user)
+
+    def get_slide(self, slide, **params):
+        return self.client.get(reverse('view_slide', args=[slide.id]), params)
+
+    def test_next_slide_crosses_into_the_next_module(self):
+        self.get_slide(self.slides[0])  # Creates and unlocks the level progress
+        self.assertEqual(self.get_slide(self.slides[0]).context['next_slide'].id, self.slides[1].id)
+        self.assertEqual(self.get_slide(self.slides[1]).context['next_slide'].id, self.next_module_slide.id)
+        self.assertIsNone(self.get_slide(self.next_module_slide).context['next_slide'])
+
+    def test_query_count_does_not_grow_with_the_catalog(self):
+        self.get_slide(self.slides[0])
+        counts = []
+        for extra in (0, 20):
+            for i in range(extra):
+                slide = Slide.objects.create(title=f'Extra {i}', module=self.modules[1], order=10 + i)
+                UserSlideProgress.objects.create(user=self.user, slide=slide, is_completed=True)
+            self.get_slide(self.slides[0])  # Reload the outline
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get_slide(self.slides[0], mark_completed='true')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertTrue(response.context['user_slide_progress_dict'][self.slides[0].id]['is_completed'])
+
+    def test_outline_lookups_are_cached_until_the_course_changes(self):
+        first, second = self.slides
+        outline.levels()
+        with self.assertNumQueries(0):
+            self.assertEqual(outline.next_slide_id(second.id), self.next_module_slide.id)
+            self.assertEqual(outline.previous_slide_id(self.next_module_slide.id), second.id)
+            self.assertEqual(outline.first_slide_id(self.modules[1].id), self.next_module_slide.id)
+
+        inserted = Slide.objects.create(title='Inserted', module=self.modules[0], order=3)
+        self.assertEqual(outline.next_slide_id(second.id), inserted.id)
+        self.assertEqual(outline.previous_slide_id(self.next_module_slide.id), inserted.id)
+
+
+@skipUnless(connection.vendor == 'sqlite', "Reads SQLite's query plans")
+class IndexUsageTests(TestCase):
+    def test_hot_queries_use_an_index(self):
+        user = User.objects.create(username='learner')
+        moment = timezone.now()
+        hot_queries = {
+            'upcoming events': Event.objects.filter(start_date__gte=moment).order_by('start_date'),
+            'leaderboard': UserProfile.objects.filter(is_subscribed=True).order_by('-aura_points'),
+            'expired charades': WordCharade.objects.filter(sent_at__lt=moment),
+            'latest countdown recording': WordCountdownRecording.objects.filter(user=user).order_by('-submission_date')[:1],
+            'active sentences': Sentence.objects.filter(is_active=True).values_list('pk'),
+            'active paragraphs': Paragraph.objects.filter(is_active=True).values_list('pk'),
+            'next story part': StoryPart.objects.filter(story_id=1, part_number=2),
+            'slide progress': UserSlideProgress.objects.filter(user=user, slide_id=1),
+        }
+        for name, queryset in hot_queries.items():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertRegex(plan, r'USING (COVERING )?INDEX')
+                self.assertNotIn('TEMP B-TREE', plan)  # No sort step for the ordered ones
+
+    def test_one_progress_row_per_user_and_slide(self):
+        user = User.objects.create(username='learner')
+        level = Level.objects.create(name='Beginner', description='', order=1)
+        slide = Slide.objects.create(module=Module.objects.create(name='Letters', description='', level=level, order=1), title='ሀ', order=1)
+        UserSlideProgress.objects.create(user=user, slide=slide)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserSlideProgress.objects.create(user=user, slide=slide)
+
+
+class GamesPageTests(TestCase):
+    def test_only_unlocked_levels_list_games_in_one_query(self):
+        user = User.objects.create(username='player')
+        for order, name in enumerate(['Beginner', 'Basic'], start=1):
+            level = Level.objects.create(name=name, description='', order=order)
+            UserLevelProgress.objects.create(user=user, level=level, is_locked=name != 'Beginner')
+        self.client.force_login(user)
+        self.client.get(reverse('games'))  # Loads the session and user
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('games'))
+        levels = response.context['levels']
+        self.assertTrue(any(levels['Beginner'].values()))
+        self.assertFalse(any(levels['Basic'].values()))
+        # The session, the user and the unlocked levels
+        self.assertEqual(len(queries), 3)
+
+
+class ReferenceDataTests(TestCase):
+    def test_letters_are_served_from_memory_until_changed(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            for letter in 'ለሀ':
+                LetterSound.objects.create(letter=letter, sound_field=f'sounds/{letter}.mp3')
+
+        before = reference_data.stats()['lettersound']
+        with self.assertNumQueries(1):
+            self.assertEqual(reference_data.letters(), ['ሀ', 'ለ'])
+            for _ in range(5):
+                self.assertEqual(len(reference_data.letter_sounds.sample(2, unique_by='letter')), 2)
+        after = reference_data.stats()['lettersound']
+        self.assertEqual(after['database'] - before['database'], 1)
+        self.assertEqual(after['memory'] - before['memory'], 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LetterSound.objects.create(letter='ሐ', sound_field='sounds/ሐ.mp3')
+        self.assertEqual(reference_data.letters(), ['ሀ', 'ለ', 'ሐ'])
+
+
+class RoundBankTests(TestCase):
+    def test_word_hunt_is_served_from_the_bank(self):
+        for i, word in enumerate(['ሰላም', 'ቤት', 'ውሃ', 'መጽሐፍ']):
+            WordAudio.objects.create(word=word, audio_file=f'word_audios/{i}.mp3', image=f'word_images/{i}.png', definition=word)
+        for letter in 'ሀለሐመ':
+            LetterSound.objects.create(letter=letter, sound_field=f'sounds/{letter}.mp3')
+
+        rounds = round_bank.generate('word_hunt', count=20, workers=1, seed=7)
+        self.assertEqual(rounds, round_bank.generate('word_hunt', count=20, workers=1, seed=7))
+        with self.captureOnCommitCallbacks(execute=True):
+            round_bank.store('word_hunt', rounds)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('word-hunt'))
+        self.assertEqual(len(queries), 1)  # One lookup of a stored board
+        self.assertIn({'grid': response.context['grid'], 'words': response.context['target_words']}, rounds)
+        grid = np.array([list(row) for row in response.context['grid']])
+        lines = [''.join(line) for line in [*grid, *grid.T]]
+        lines += [''.join(np.diagonal(flipped, k)) for flipped in (grid, grid[:, ::-1]) for k in range(-len(grid), len(grid))]
+        for word in response.context['target_words']:
+            self.assertTrue(any(word in line or word[::-1] in line for line in lines))
+
+    def test_games_without_content_answer_404_and_log_it(self):
+        for name, game in (('word-hunt', 'word_hunt'), ('find-family', 'find_family')):
+            with self.assertLogs('hahuapp.round_bank', 'WARNING') as logs:
+                self.assertEqual(self.client.get(reverse(name)).status_code, 404)
+            self.assertIn(game, logs.output[0])
+
+
+class SyntheticDataTests(TestCase):
+    def test_learners_with_referrals_progress_and_history(self):
+        use_temp_media_root(self)
+        synthetic.populate(20)
+        created = synthetic.populate_learners(30, point_history=500, slide_progress=3, batch_size=10)
+        self.assertEqual((created['UserProfile'], created['PointHistory']), (30, 500))
+
+        profiles = UserProfile.objects.filter(user__username__startswith=synthetic.LEARNER_PREFIX)
+        self.assertTrue(profiles.filter(referred_by__isnull=False).exists())
+        self.assertFalse(profiles.filter(referred_by__pk__gt=F('pk')).exists())  # Referrers signed up first
+        self.assertEqual(
+            profiles.aggregate(total=Sum('aura_points'))['total'],
+            PointHistory.objects.aggregate(total=Sum('points'))['total'],
+        )
+        self.assertFalse(
+            PointHistory.objects.filter(reason_code=PointHistory.REFERRAL).exclude(source_profile__referred_by=F('user_profile')).exists()
+        )
+        span = PointHistory.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+        self.assertGreater(span['last'] - span['first'], timedelta(days=synthetic.HISTORY_DAYS - 1))
+        self.assertTrue(self.client.login(username=f'{synthetic.LEARNER_PREFIX}0', password=synthetic.LEARNER_PASSWORD))
+
+        self.assertGreater(synthetic.write_media(), 0)
+        with default_storage.open(WordAudio.objects.first().image.name) as image:
+            self.assertEqual(Image.open(image).size, (8, 8))
+
+
+class ViewBenchmarkTests(TestCase):
+    def test_pages_are_measured_and_compared(self):
+        use_temp_media_root(self)
+        cache.clear()
+        client, content = benchmark.prepare(rows=30)
+        self.assertEqual(content['WordAudio'], 30)
+        self.assertEqual(content['StoryPart'], 30)
+
+        pages = {endpoint.name: endpoint for endpoint in benchmark.endpoints(['lesson', 'leaderboard', 'word-hunt'])}
+        self.assertEqual(set(pages), {'slide_view', 'view_slide', 'leaderboard', 'word-hunt'})
+        self.assertEqual(pages['view_slide'].path, reverse('view_slide', args=[Slide.objects.order_by('pk').first().pk]))
+
+        results = {name: benchmark.measure(client, endpoint.path, repeat=3) for name, endpoint in pages.items()}
+        for result in results.values():
+            self.assertEqual(result['status'], 200)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+        self.assertEqual(results['word-hunt']['queries'], 1)  # One stored board
+
+        baseline = {'results': {name: dict(result, p95_ms=result['p95_ms'] * 10) for name, result in results.items()}}
+        self.assertEqual(benchmark.compare({'results': results}, baseline), {})
+        baseline['results']['leaderboard']['queries'] -= 1
+        self.assertEqual(list(benchmark.compare({'results': results}, baseline)), ['leaderboard'])
+
+
+class LoadTestTests(LiveServerTestCase):
+    def test_learner_journeys_are_timed_by_step(self):
+        use_temp_media_root(self)
+        cache.clear()
+        synthetic.populate(20)
+        synthetic.populate_learners(3)
+        usernames = load_test.learner_usernames(5)
+        self.assertEqual(len(usernames), 3)
+
+        # Concurrent users, the test database is a file (see DATABASES) so each server thread has its own connection
+        report = load_test.run(
+            self.live_server_url, usernames, users=3, duration=120, ramp_up=0, think_time=(0, 0), journeys=2,
+        )
+        self.assertEqual(list(report['steps']), load_test.STEPS)
+        self.assertEqual(report['steps']['game round']['requests'], 3 * 2 * load_test.ROUNDS)
+        for step, row in report['steps'].items():
+            self.assertEqual(row['failures'], 0, step)
+            self.assertLessEqual(row['p50_ms'], row['p95_ms'])
+        self.assertEqual(PointHistory.objects.filter(reason='Load test').count(), 6)
+        self.assertEqual(WordAudioRecording.objects.count(), 6)
+
+
+class AdminListTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_superuser('staff', 'staff@example.com', 'pw')
+        self.profiles = [
+            UserProfile.objects.create(user=User.objects.create(username=f'learner{i}'), full_name=f'Learner {i}', referral_code=f'ADM{i:07d}')
+            for i in range(2)
+        ]
+        PointHistory.objects.bulk_create([
+            PointHistory(user_profile=self.profiles[i % 2], points=1, reason=f'Round {i}', reason_code=PointHistory.ACTIVITY)
+            for i in range(120)
+        ])
+        self.client.force_login(self.staff)
+
+    def get(self, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('point_history_customadmin') + query)
+        self.assertLessEqual(len(queries), 4)  # Session, user, page and a filter label, however many rows
+        return response.context['listing']
+
+    def test_keyset_pages_with_search_and_filter(self):
+        newest = list(PointHistory.objects.order_by('-pk').values_list('pk', flat=True))
+        first = self.get()
+        self.assertEqual([row.pk for row in first.rows], newest[:admin_lists.PER_PAGE])
+        self.assertIsNone(first.newer)
+
+        second = self.get('?' + first.older)
+        self.assertEqual([row.pk for row in second.rows], newest[admin_lists.PER_PAGE:2 * admin_lists.PER_PAGE])
+        self.assertEqual([row.pk for row in self.get('?' + second.newer).rows], newest[:admin_lists.PER_PAGE])
+        last = self.get('?' + second.older)
+        self.assertEqual(len(last.rows), 20)
+        self.assertIsNone(last.older)
+
+        profile = self.profiles[1]
+        filtered = self.get(f'?user_profile={profile.pk}&q=Round 1')
+        self.assertTrue(filtered.rows)
+        self.assertTrue(all(row.user_profile_id == profile.pk and 'Round 1' in row.reason for row in filtered.rows))
+        self.assertEqual(filtered.filters[0]['text'], profile.full_name)
+
+    def test_digits_int_cannot_read_are_ignored(self):
+        newest = list(PointHistory.objects.order_by('-pk').values_list('pk', flat=True))[:admin_lists.PER_PAGE]
+        for query in ('?after=፩', '?before=²', '?user_profile=፩'):
+            self.assertEqual([row.pk for row in self.get(query).rows], newest, query)
+        self.assertEqual(self.get('?q=፩').rows, [])
+        response = self.client.get(reverse('admin_autocomplete', args=['profile']), {'q': '²'})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_autocomplete_replaces_full_dropdowns(self):
+        response = self.client.get(reverse('admin_autocomplete', args=['profile']), {'q': 'learner1'})
+        self.assertEqual(response.json()['results'], [{'id': self.profiles[1].pk, 'text': 'Learner 1'}])
+        self.assertEqual(self.client.get(reverse('admin_autocomplete', args=['nothing'])).status_code, 404)
+
+        html = self.client.get(reverse('point_history_customadmin')).content.decode()
+        self.assertNotIn('<option value="%d"' % self.profiles[0].pk, html)
+        self.assertIn(reverse('admin_autocomplete', args=['profile']), html)
+
+        self.client.force_login(User.objects.get(username='learner0'))
+        self.assertEqual(self.client.get(reverse('point_history_customadmin')).status_code, 302)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        request_metrics.clear()
+        self.client.force_login(User.objects.create_superuser('staff', 'staff@example.com', 'staff'))
+
+    def test_requests_are_timed_per_view(self):
+        with override_settings(SERVER_TIMING=True, SLOW_REQUEST_MS=0), self.assertLogs('hahuapp.slow_requests') as logs:
+            response = self.client.get(reverse('custom_admin_page'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries, 0 duplicates", tpl;dur=')
+        self.assertIn('"view": "custom_admin_page"', logs.output[0])
+
+        rows = {row['view']: row for row in request_metrics.summary()}
+        self.assertEqual(rows['custom_admin_page']['requests'], 1)
+        self.assertGreater(rows['custom_admin_page']['template_p95_ms'], 0)
+        self.assertIsNone(rows['custom_admin_page']['worst_duplicate'])
+        self.assertContains(self.client.get(reverse('request_metrics_customadmin')), 'custom_admin_page')
+
+    def test_slow_request_log_directory_is_made_on_the_first_write(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        name = f'{directory}/logs/slow_requests.log'
+        handler = request_metrics.SlowRequestFileHandler(name, delay=True)
+        self.addCleanup(handler.close)
+        self.assertFalse(os.path.exists(os.path.dirname(name)))
+
+        handler.emit(logging.makeLogRecord({'msg': 'slow'}))
+        with open(name) as log:
+            self.assertEqual(log.read(), 'slow\n')
+
+    def test_repeated_queries_are_flagged(self):
+        timer = request_metrics.RequestTimer()
+        with connection.execute_wrapper(timer):
+            for pk in (1, 2, 3):
+                Level.objects.filter(pk=pk).first()
+            Module.objects.count()
+        extra, (runs, sql) = timer.duplicates()
+        self.assertEqual((extra, runs), (2, 3))
+        self.assertIn('"hahuapp_level"', sql)
+
+
+class WordGridTests(SimpleTestCase):
+    letters = list('ሀለሐመሠረሰሸቀበ')
+
+    def test_seeded_grids_hold_every_word(self):
+        words = ['ሰላም', 'ትምህርት', 'ኢትዮጵያ', 'አማርኛ', 'ቤት', 'ውሃ', 'መጽሐፍ', 'ቡና', 'እንጀራ', 'ገበያ']
+        board = word_grid.generate(words, self.letters, seed=3)
+        self.assertTrue(np.array_equal(board.grid, word_grid.generate(words, self.letters, seed=3).grid))
+        self.assertFalse((board.grid == '').any())
+        covered = set()
+        for word, row, col, d_row, d_col in board.placements:
+            self.assertEqual(''.join(board.grid[row + d_row * i, col + d_col * i] for i in range(len(word))), word)
+            cells = {(row + d_row * i, col + d_col * i) for i in range(len(word))}
+            self.assertFalse(cells & covered, word)  # A found word locks its cells, words can't cross
+            covered |= cells
+
+    def test_impossible_boards_fail_within_the_budget(self):
+        with self.assertRaises(word_grid.GridError):
+            word_grid.generate(['ኢትዮጵያ'], self.letters, size=4)
+        words = ['ሀለሐመሠረ', 'ሰሸቀበተቸ', 'ኀነኘአከኸ', 'ወዐዘዠየደ', 'ጀገጠጨጰጸ', 'ፀፈፐሀለሐ', 'መሠረሰሸቀ']
+        with self.assertRaises(word_grid.GridError):
+            word_grid.generate(words, self.letters, size=6, budget=500)
+
+
+def use_temp_media_root(testcase):
+    media_root = tempfile.mkdtemp()
+    testcase.addCleanup(shutil.rmtree, media_root)
+    settings_override = override_settings(MEDIA_ROOT=media_root)
+    settings_override.enable()
+    testcase.addCleanup(settings_override.disable)
+
+
+class RecordingUploadTests(TestCase):
+    def setUp(self):
+        use_temp_media_root(self)
+        self.word_audio = WordAudio.objects.create(
+            word='ቃል', audio_file='word_audios/0.mp3', image='word_images/0.png', definition='word',
+        )
+        self.user = User.objects.create(username='speaker')
+        self.client.force_login(self.user)
+
+    def put_chunk(self, upload_id, offset, data):
+        return self.client.put(
+            reverse('recording-upload-chunk', args=[upload_id]), data,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunks_are_resumed_and_assembled_into_a_recording(self):
+        data = bytes(range(256)) * 40
+        response = self.client.post(reverse('start-recording-upload'), {
+            'kind': 'word_audio', 'content_type': ContentType.objects.get_for_model(WordAudio).id,
+            'object_id': self.word_audio.id, 'filename': 'take.webm', 'size': len(data),
+        })
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['upload_id']
+        self.assertEqual(response.json()['url'], reverse('recording-upload-chunk', args=[upload_id]))
+
+        self.assertEqual(self.put_chunk(upload_id, 0, data[:4000]).json()['offset'], 4000)
+        # A retried chunk is refused with the offset to resume from
+        response = self.put_chunk(upload_id, 0, data[:4000])
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 4000))
+
+        response = self.put_chunk(upload_id, 4000, data[4000:])
+        self.assertTrue(response.json()['complete'])
+
+        recording = WordAudioRecording.objects.get(user=self.user)
+        with recording.recording_file.open('rb') as stored:
+            self.assertEqual(stored.read(), data)
+        self.assertEqual(default_storage.listdir(f'recording_uploads/{upload_id}')[1], [])
+
+    def stored_upload(self, data):
+        """An upload with every byte stored, the way append_chunk() leaves it before completing."""
+        upload = RecordingUpload.objects.create(
+            user=self.user, kind='word_audio', content_type=ContentType.objects.get_for_model(WordAudio),
+            object_id=self.word_audio.id, filename='take.webm', size=len(data),
+        )
+        upload.parts = [default_storage.save(f'recording_uploads/{upload.pk}/000000000000.part', ContentFile(data))]
+        upload.received = len(data)
+        upload.save()
+        return upload
+
+    def test_an_upload_claimed_by_another_request_is_left_to_it(self):
+        upload = self.stored_upload(b'voice' * 100)
+        RecordingUpload.objects.filter(pk=upload.pk).update(claimed_at=timezone.now())
+
+        self.assertIsNone(uploads.complete_upload(upload).completed_at)
+        self.assertFalse(WordAudioRecording.objects.exists())
+
+        # A claim that ran out is taken over
+        RecordingUpload.objects.filter(pk=upload.pk).update(claimed_at=timezone.now() - uploads.CLAIM_TIMEOUT)
+        self.assertIsNotNone(uploads.complete_upload(upload).completed_at)
+        self.assertEqual(WordAudioRecording.objects.count(), 1)
+
+    def test_a_failed_completion_removes_the_copied_file(self):
+        upload = self.stored_upload(b'voice' * 100)
+        with mock.patch.object(WordAudioRecording, 'save', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                uploads.complete_upload(upload)
+
+        upload.refresh_from_db()
+        self.assertEqual((upload.claimed_at, upload.completed_at), (None, None))  # A retry can complete it
+        self.assertEqual(default_storage.listdir('user_recordings')[1], [])
+        self.assertTrue(default_storage.exists(upload.parts[0]))
+
+
+class MediaJobTests(TestCase):
+    def setUp(self):
+        use_temp_media_root(self)
+        self.word_audio = WordAudio.objects.create(
+            word='ቃል', audio_file=ContentFile(b'RIFF' * 100, name='long.wav'),
+            image='word_images/0.png', definition='word',
+        )
+
+    def test_saved_media_is_queued_once(self):
+        job = MediaJob.objects.get()
+        self.assertEqual((job.field_name, job.source_name), ('audio_file', self.word_audio.audio_file.name))
+        self.word_audio.save()
+        self.assertEqual(MediaJob.objects.count(), 1)
+
+    def test_rendition_is_swapped_in_only_over_the_queued_file(self):
+        source_name = self.word_audio.audio_file.name
+        name = transcoding.swap_in_rendition(
+            self.word_audio, 'audio_file', source_name, ContentFile(b'aac'), '.m4a',
+        )
+        self.word_audio.refresh_from_db()
+        self.assertEqual(self.word_audio.audio_file.name, name)
+        self.assertTrue(name.endswith('.m4a'))
+        self.assertFalse(default_storage.exists(source_name))
+
+        # The file changed since the job was queued, the newer file stays
+        self.assertIsNone(transcoding.swap_in_rendition(
+            self.word_audio, 'audio_file', source_name, ContentFile(b'aac'), '.m4a',
+        ))
+        self.word_audio.refresh_from_db()
+        self.assertEqual(self.word_audio.audio_file.name, name)
+
+
+class RetentionTests(TestCase):
+    def test_sweep_deletes_expired_rows_and_their_files(self):
+        use_temp_media_root(self)
+        user = User.objects.create(username='speaker')
+        word_audio = WordAudio.objects.create(
+            word='ቃል', audio_file='word_audios/0.mp3', image='word_images/0.png', definition='word',
+        )
+        recordings = [
+            WordCharade.objects.create(
+                user=user, content_type=ContentType.objects.get_for_model(WordAudio), object_id=word_audio.id,
+                recording=ContentFile(b'x' * 100, name=f'take{i}.webm'),
+            )
+            for i in range(5)
+        ]
+        old = timezone.now() - timedelta(days=10)
+        WordCharade.objects.filter(pk__in=[r.pk for r in recordings[:3]]).update(sent_at=old)
+
+        default_storage.delete(recordings[1].recording.name)  # Already gone, not counted
+        jobs = MediaJob.objects.filter(content_type=ContentType.objects.get_for_model(WordCharade))
+        self.assertEqual(jobs.count(), 5)
+        # An original kept next to its rendition goes with the recording
+        kept = default_storage.save('recordings/original.wav', ContentFile(b'y' * 50))
+        jobs.filter(object_id=recordings[2].pk).update(kept_original=kept)
+
+        result = retention.sweep(retention.policy_for(WordCharade), batch_size=2)
+        self.assertEqual((result.rows, result.files, result.reclaimed), (3, 3, 250))
+        self.assertFalse(default_storage.exists(kept))
+        self.assertEqual(WordCharade.objects.count(), 2)
+        self.assertFalse(default_storage.exists(recordings[0].recording.name))
+        self.assertTrue(default_storage.exists(recordings[4].recording.name))
+        # The transcoding jobs of the swept recordings go with them
+        self.assertEqual(sorted(jobs.values_list('object_id', flat=True)), [r.pk for r in recordings[3:]])
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        use_temp_media_root(self)
+        self.name = default_storage.save('word_video/clip.mp4', ContentFile(bytes(range(100))))
+        self.url = default_storage.url(self.name)
+
+    def get(self, data=None, **headers):
+        # serve_media is only routed with SERVE_MEDIA=1, call it directly
+        return serve_media(RequestFactory().get(self.url, data, **headers), self.name)
+
+    def test_range_requests(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+        response = self.get(HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(95, 100)))
+        self.assertEqual(self.get(HTTP_RANGE='bytes=200-').status_code, 416)
+
+    def test_validators_and_versioned_caching(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        versioned = self.get({'v': response['ETag'].strip('"')})
+        self.assertIn('immutable', versioned['Cache-Control'])
+
+    def test_media_is_left_to_the_web_server_by_default(self):
+        with self.assertRaises(NoReverseMatch):
+            reverse('media', args=[self.name])
+
+
+class MediaPrefetchTests(TestCase):
+    def test_memory_game_bundles_its_clips(self):
+        use_temp_media_root(self)
+        clips = {}
+        for i, letter in enumerate('ሀለሐመሠረ'):
+            sound = LetterSound.objects.create(letter=letter, sound_field=ContentFile(bytes([i]) * (10 + i), name=f'{i}.mp3'))
+            clips[sound.sound_field.url] = bytes([i]) * (10 + i)
+
+        manifest = self.client.get(reverse('letter-sound-memory')).context['media_manifest']
+        self.assertEqual(set(manifest['clips']), set(clips))
+
+        response = self.client.get(manifest['bundle'])
+        self.assertIn('immutable', response['Cache-Control'])
+        bundle = b''.join(response.streaming_content)
+        for url, clip in manifest['clips'].items():
+            self.assertEqual(bundle[clip['offset']:clip['offset'] + clip['length']], clips[url])
+        self.assertEqual(self.client.get(manifest['bundle'], HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # A file replaced after the page was rendered makes the page fall back to plain URLs
+        sound = LetterSound.objects.first()
+        with open(sound.sound_field.path, 'ab') as changed:
+            changed.write(b'more')
+        self.assertEqual(self.client.get(manifest['bundle']).status_code, 410)
+        self.assertEqual(self.client.get(manifest['bundle'][:-2] + 'x/').status_code, 404)
+
+
+class ImageDerivativeTests(TestCase):
+    def test_responsive_image_serves_resized_copies(self):
+        use_temp_media_root(self)
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, format='PNG')
+        word_audio = WordAudio.objects.create(
+            word='ቃል', audio_file='word_audios/0.mp3', definition='word',
+            image=ContentFile(buffer.getvalue(), name='red.png'),
+        )
+
+        manifest = images.derivatives(word_audio.image)
+        self.assertEqual([width for width, name in manifest['sources']['webp']], [160, 320, 640, 800])
+        for fmt, sources in manifest['sources'].items():
+            for width, name in sources:
+                self.assertTrue(default_storage.exists(name))
+
+        html = Template(
+            '{% load custom_filters %}{% responsive_image image sizes="200px" alt="Word" %}'
+        ).render(Context({'image': word_audio.image}))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('320w', html)
+        self.assertIn(f'src="{word_audio.image.url}"', html)
+
+    def test_rendering_never_encodes(self):
+        use_temp_media_root(self)
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 300), 'blue').save(buffer, format='PNG')
+        word_audio = WordAudio.objects.create(
+            word='ቃል', audio_file='word_audios/0.mp3', definition='word',
+            image=ContentFile(buffer.getvalue(), name='blue.png'),
+        )
+        template = Template('{% load custom_filters %}{% responsive_image image alt="Word" %}')
+        with mock.patch.object(images, 'build_derivatives') as build_derivatives:
+            # The manifest built on save is read back from storage by any process
+            cache.clear()
+            self.assertIn('<source type="image/webp"', template.render(Context({'image': word_audio.image})))
+
+            # Without one the original is served, nothing is encoded
+            default_storage.delete(images._manifest_name(images._manifest_key(word_audio.image)))
+            cache.clear()
+            html = template.render(Context({'image': word_audio.image}))
+        build_derivatives.assert_not_called()
+        self.assertNotIn('<picture', html)
+        self.assertIn(f'src="{word_audio.image.url}"', html)
+
+        self.assertEqual(images.build_existing(), (1, 1))
+        self.assertIn('<source type="image/webp"', template.render(Context({'image': word_audio.image})))
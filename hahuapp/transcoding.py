@@ -0,0 +1,255 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files import File
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+from . import reference_data
+from .course_outline import outline
+from .models import (
+    MediaJob,
+    SlideContent,
+    StoryPart,
+    VoiceRecording,
+    WordAudio,
+    WordAudioRecording,
+    WordCharade,
+)
+
+### ---------------- Media Transcoding -------------------
+#
+# Uploaded recordings and lesson media are queued in MediaJob when they are
+# saved (see signals.py) and transcoded by `manage.py process_media_jobs`
+# into compact renditions with ffmpeg. The rendition is written next to the
+# original and the FileField is switched to it with one conditional UPDATE,
+# so the served URL changes in a single step and never to a file that was
+# replaced while the job ran.
+#
+# Workers claim jobs with a conditional UPDATE as well, so several of them
+# can share the queue without a broker or row locks.
+
+FFMPEG = getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+FFPROBE = getattr(settings, 'FFPROBE_BINARY', 'ffprobe')
+KEEP_ORIGINALS = getattr(settings, 'MEDIA_KEEP_ORIGINALS', False)
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=30)  # A running job older than this belonged to a dead worker
+TIMEOUT = 15 * 60  # Seconds allowed for one ffmpeg run
+
+PROFILES = {
+    # Speech, Opus stays clear at very low bitrates
+    'voice': {'extension': '.ogg', 'args': ['-vn', '-ac', '1', '-c:a', 'libopus', '-b:a', '24k', '-application', 'voip']},
+    # Lesson audio, AAC plays everywhere
+    'audio': {'extension': '.m4a', 'args': ['-vn', '-c:a', 'aac', '-b:a', '64k', '-movflags', '+faststart']},
+    'video': {
+        'extension': '.mp4',
+        'args': [
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28', '-vf', "scale='min(1280,iw)':-2",
+            '-c:a', 'aac', '-b:a', '96k', '-movflags', '+faststart',
+        ],
+    },
+}
+
+# (model, file field) -> profile
+TRANSCODED_FIELDS = {
+    (WordAudioRecording, 'recording_file'): 'voice',
+    (WordCharade, 'recording'): 'voice',
+    (VoiceRecording, 'audio_file'): 'voice',
+    (WordAudio, 'audio_file'): 'audio',
+    (StoryPart, 'audio_file'): 'audio',
+    (SlideContent, 'video_content'): 'video',
+}
+
+FIELDS_BY_MODEL = defaultdict(list)
+for (model, field_name), profile in TRANSCODED_FIELDS.items():
+    FIELDS_BY_MODEL[model].append(field_name)
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def ffmpeg_available():
+    return shutil.which(FFMPEG) is not None and shutil.which(FFPROBE) is not None
+
+
+## ---- queueing ----
+
+def enqueue(instance, field_name):
+    """Queue the current file of `field_name`, unless it is already queued or is a rendition."""
+    name = getattr(instance, field_name).name
+    if not name:
+        return None
+    content_type = ContentType.objects.get_for_model(instance)
+    known = MediaJob.objects.filter(
+        Q(source_name=name) | Q(output_name=name),
+        content_type=content_type, object_id=instance.pk, field_name=field_name,
+    )
+    if known.exists():
+        return None
+    return MediaJob.objects.create(
+        content_type=content_type, object_id=instance.pk, field_name=field_name, source_name=name,
+    )
+
+
+def handle_save(sender, instance, update_fields=None):
+    for field_name in FIELDS_BY_MODEL.get(sender, ()):
+        if update_fields is None or field_name in update_fields:
+            enqueue(instance, field_name)
+
+
+def enqueue_existing():
+    """Queue every stored file that has no job yet, returns the number queued."""
+    queued = 0
+    for (model, field_name) in TRANSCODED_FIELDS:
+        content_type = ContentType.objects.get_for_model(model)
+        known = set()
+        for object_id, source_name, output_name in MediaJob.objects.filter(
+            content_type=content_type, field_name=field_name,
+        ).values_list('object_id', 'source_name', 'output_name'):
+            known.add((object_id, source_name))
+            known.add((object_id, output_name))
+
+        jobs = [
+            MediaJob(content_type=content_type, object_id=pk, field_name=field_name, source_name=name)
+            for pk, name in model.objects.exclude(**{field_name: ''}).values_list('pk', field_name).iterator()
+            if name and (pk, name) not in known
+        ]
+        MediaJob.objects.bulk_create(jobs, batch_size=500)
+        queued += len(jobs)
+    return queued
+
+
+def claim_next():
+    """Claim the oldest runnable job for this worker, or return None."""
+    candidates = (
+        MediaJob.objects.filter(
+            Q(status=MediaJob.PENDING) | Q(status=MediaJob.RUNNING, started_at__lt=now() - STALE_AFTER),
+            attempts__lt=MAX_ATTEMPTS,
+        )
+        .order_by('created_at')
+        .values_list('pk', 'status', 'started_at')[:10]
+    )
+    for pk, status, started_at in candidates:
+        claimed = MediaJob.objects.filter(pk=pk, status=status, started_at=started_at).update(
+            status=MediaJob.RUNNING, started_at=now(), attempts=F('attempts') + 1,
+        )
+        if claimed:  # Another worker may have taken it first
+            return MediaJob.objects.select_related('content_type').get(pk=pk)
+    return None
+
+
+## ---- processing ----
+
+def probe(path):
+    """Return (duration in seconds, bitrate in bits per second) of a media file."""
+    result = subprocess.run(
+        [FFPROBE, '-v', 'error', '-show_entries', 'format=duration,bit_rate', '-of', 'json', path],
+        capture_output=True, text=True, timeout=60,
+    )
+    if result.returncode != 0:
+        raise TranscodeError(result.stderr.strip() or 'ffprobe failed')
+    info = json.loads(result.stdout).get('format', {})
+    duration = float(info['duration']) if info.get('duration') not in (None, 'N/A') else None
+    bitrate = int(info['bit_rate']) if info.get('bit_rate') not in (None, 'N/A') else None
+    return duration, bitrate
+
+
+def local_path(field_file, workdir):
+    """A local path for ffmpeg, copying the file out of remote storage when needed."""
+    try:
+        return field_file.path
+    except NotImplementedError:
+        path = os.path.join(workdir, 'source' + os.path.splitext(field_file.name)[1])
+        with field_file.open('rb') as source, open(path, 'wb') as target:
+            for chunk in source.chunks():
+                target.write(chunk)
+        return path
+
+
+def transcode(source, output, profile):
+    result = subprocess.run(
+        [FFMPEG, '-nostdin', '-y', '-v', 'error', '-i', source, *PROFILES[profile]['args'], output],
+        capture_output=True, text=True, timeout=TIMEOUT,
+    )
+    if result.returncode != 0:
+        raise TranscodeError(result.stderr.strip()[-2000:] or 'ffmpeg failed')
+
+
+def swap_in_rendition(instance, field_name, source_name, content, extension):
+    """
+    Store `content` as the new file of `field_name` and point the row at it,
+    only if the row still holds `source_name`. Returns the new name, or None
+    when the file was replaced in the meantime.
+    """
+    field = instance._meta.get_field(field_name)
+    base = os.path.splitext(os.path.basename(source_name))[0]
+    name = field.storage.save(field.generate_filename(instance, base + extension), content, max_length=field.max_length)
+
+    updated = type(instance).objects.filter(pk=instance.pk, **{field_name: source_name}).update(**{field_name: name})
+    if not updated:
+        field.storage.delete(name)
+        return None
+    # The outline and the reference tables keep file names, and update() sends no signal
+    if type(instance) is SlideContent:
+        outline.invalidate()
+    reference_data.handle_change(type(instance))
+    if not KEEP_ORIGINALS:
+        field.storage.delete(source_name)
+    return name
+
+
+def finish(job, status, error=''):
+    job.status = status
+    job.error = error
+    job.finished_at = now()
+    job.save()
+
+
+def process(job):
+    """Transcode the file of a claimed job and swap it in."""
+    model = job.content_type.model_class()
+    instance = model.objects.filter(pk=job.object_id).first()
+    if instance is None or getattr(instance, job.field_name).name != job.source_name:
+        return finish(job, MediaJob.SKIPPED, 'The file was replaced or removed before it was processed.')
+
+    field_file = getattr(instance, job.field_name)
+    profile = TRANSCODED_FIELDS[(model, job.field_name)]
+    extension = PROFILES[profile]['extension']
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            output = os.path.join(workdir, 'rendition' + extension)
+            transcode(local_path(field_file, workdir), output, profile)
+            job.duration, job.bitrate = probe(output)
+            job.source_size = field_file.size
+            job.output_size = os.path.getsize(output)
+
+            if job.output_size >= job.source_size:
+                return finish(job, MediaJob.SKIPPED, 'The original is already smaller.')
+            with open(output, 'rb') as rendition:
+                name = swap_in_rendition(instance, job.field_name, job.source_name, File(rendition), extension)
+    except (TranscodeError, OSError, subprocess.TimeoutExpired) as e:
+        status = MediaJob.FAILED if job.attempts >= MAX_ATTEMPTS else MediaJob.PENDING
+        return finish(job, status, str(e))
+
+    if name is None:
+        return finish(job, MediaJob.SKIPPED, 'The file was replaced while it was being processed.')
+    job.output_name = name
+    if KEEP_ORIGINALS:
+        job.kept_original = job.source_name  # Retention removes it with the recording
+    finish(job, MediaJob.DONE)
+
+
+def media_info(instance, field_name):
+    """The finished job of the file currently in `field_name`, with its duration and bitrate."""
+    return MediaJob.objects.filter(
+        content_type=ContentType.objects.get_for_model(instance), object_id=instance.pk,
+        field_name=field_name, output_name=getattr(instance, field_name).name, status=MediaJob.DONE,
+    ).first()
@@ -0,0 +1,211 @@
+import os
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import get_valid_filename
+from django.utils.timezone import now
+
+from .models import (
+    LetterImage,
+    RecordingUpload,
+    WordAudio,
+    WordAudioRecording,
+    WordCharade,
+    WordCountdownRecording,
+    WordVideo,
+)
+
+### ---------------- Chunked Recording Uploads -------------------
+#
+# Recordings are sent in chunks of raw bytes. Each chunk is streamed from the
+# request body straight into default_storage as a part file, so a worker
+# never holds more than one read buffer of it, and a dropped connection only
+# loses the chunk in flight: the client asks for the stored offset and
+# carries on from there. When the last byte arrives the parts are streamed,
+# in order, into the recording's FileField and removed.
+#
+# The row is only locked for bookkeeping, never while data is copied: on
+# SQLite a lock held in a transaction blocks every other write. Completing
+# claims the upload in one short transaction, copies the parts with no
+# transaction open, and records the recording in a second short one.
+
+CHUNK_SIZE = 512 * 1024  # Suggested to clients
+MAX_CHUNK_SIZE = 5 * 1024 * 1024
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+PARTS_DIR = 'recording_uploads'
+CLAIM_TIMEOUT = timedelta(minutes=10)  # A completion that takes longer is taken to have died
+AUDIO_EXTENSIONS = {'.wav', '.webm', '.ogg', '.oga', '.opus', '.mp3', '.m4a', '.aac', '.mp4'}
+
+# kind -> the content a recording can answer, the recording model, its file
+# field and the fields that link it to that content
+UPLOAD_KINDS = {
+    'word_audio': {
+        'targets': (WordAudio,),
+        'model': WordAudioRecording,
+        'file_field': 'recording_file',
+        'fields': lambda upload: {'word_audio_id': upload.object_id},
+    },
+    'charade': {
+        'targets': (WordVideo, LetterImage),
+        'model': WordCharade,
+        'file_field': 'recording',
+        'fields': lambda upload: {'content_type_id': upload.content_type_id, 'object_id': upload.object_id},
+    },
+    'countdown': {
+        'targets': (LetterImage,),
+        'model': WordCountdownRecording,
+        'file_field': 'audio_file',
+        'fields': lambda upload: {'letter_id': upload.object_id},
+    },
+}
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class BodyReader:
+    """Read at most `length` bytes from a stream, such as the request body."""
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+class PartsReader:
+    """Read the stored parts of an upload one after another, as one file."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.current = None
+
+    def read(self, size=-1):
+        while self.names or self.current:
+            if self.current is None:
+                self.current = default_storage.open(self.names.pop(0), 'rb')
+            data = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+        return b''
+
+
+def start_upload(user, kind, content_type_id, object_id, filename, size):
+    """Validate a new upload and create its RecordingUpload."""
+    spec = UPLOAD_KINDS.get(kind)
+    if spec is None:
+        raise UploadError("Unknown recording kind.")
+    try:
+        content_type = ContentType.objects.get_for_id(int(content_type_id))
+        object_id, size = int(object_id), int(size)
+    except (TypeError, ValueError, ContentType.DoesNotExist):
+        raise UploadError("Invalid upload parameters.")
+
+    model = content_type.model_class()
+    if model not in spec['targets'] or not model.objects.filter(pk=object_id).exists():
+        raise UploadError("Invalid question!")
+    if not 0 < size <= MAX_UPLOAD_SIZE:
+        raise UploadError("Recording is empty or too large.", status=413)
+
+    name = get_valid_filename(os.path.basename(filename or '')) or 'recording.webm'
+    if os.path.splitext(name)[1].lower() not in AUDIO_EXTENSIONS:
+        raise UploadError("Unsupported audio format.", status=415)
+
+    return RecordingUpload.objects.create(
+        user=user, kind=kind, content_type=content_type, object_id=object_id, filename=name, size=size,
+    )
+
+
+def append_chunk(upload, offset, stream, length):
+    """
+    Store `length` bytes from `stream` at `offset` and return the upload.
+
+    The offset must be the number of bytes already stored, anything else is
+    refused with a 409 so the client can resume from upload.received. The
+    upload is completed once the last byte is stored.
+    """
+    if upload.completed_at:
+        return upload
+    if offset != upload.received:
+        raise UploadError("Offset does not match the stored data.", status=409)
+    if length > MAX_CHUNK_SIZE or offset + length > upload.size:
+        raise UploadError("Chunk is too large.", status=413)
+
+    if length:
+        part = default_storage.save(
+            f'{PARTS_DIR}/{upload.pk}/{offset:012d}.part', File(BodyReader(stream, length), name='part'),
+        )
+        if default_storage.size(part) != length:
+            default_storage.delete(part)  # The client went away half way through the chunk
+            raise UploadError("Incomplete chunk.")
+
+        with transaction.atomic():
+            # Lock the row only for the bookkeeping, never while data streams in
+            upload = RecordingUpload.objects.select_for_update().get(pk=upload.pk)
+            if upload.received != offset:
+                default_storage.delete(part)  # Another request stored this chunk first
+                raise UploadError("Offset does not match the stored data.", status=409)
+            upload.parts.append(part)
+            upload.received = offset + length
+            upload.save(update_fields=['parts', 'received'])
+
+    if upload.received == upload.size:
+        upload = complete_upload(upload)
+    return upload
+
+
+def complete_upload(upload):
+    """
+    Stream the parts into a new recording and remove them.
+
+    An upload another request is already completing is returned as it is,
+    the client asks for its status again.
+    """
+    spec = UPLOAD_KINDS[upload.kind]
+    with transaction.atomic():
+        upload = RecordingUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.completed_at or (upload.claimed_at and upload.claimed_at > now() - CLAIM_TIMEOUT):
+            return upload
+        upload.claimed_at = now()
+        upload.save(update_fields=['claimed_at'])
+
+    recording = spec['model'](user_id=upload.user_id, **spec['fields'](upload))
+    field = getattr(recording, spec['file_field'])
+    content = File(PartsReader(upload.parts), name=upload.filename)
+    content.size = upload.size
+    try:
+        field.save(upload.filename, content, save=False)
+        with transaction.atomic():
+            upload = RecordingUpload.objects.select_for_update().get(pk=upload.pk)
+            if upload.completed_at is None:
+                recording.save()
+                upload.recording_id = recording.pk
+                upload.completed_at = now()
+                upload.save(update_fields=['recording_id', 'completed_at'])
+    except Exception:
+        if field.name:
+            field.storage.delete(field.name)  # Don't leave a file no recording points to
+        RecordingUpload.objects.filter(pk=upload.pk, completed_at=None).update(claimed_at=None)
+        raise
+
+    if recording.pk is None:
+        field.storage.delete(field.name)  # Completed by another request after our claim ran out
+        return upload
+    for part in upload.parts:
+        default_storage.delete(part)
+    return upload
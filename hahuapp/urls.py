@@ -72,6 +72,8 @@ from .views import (
     home
 )
 from . import views
+from .media import serve_media
+from .prefetch import serve_bundle
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -182,6 +184,8 @@ urlpatterns = [
     path('video/submit/<int:video_id>/', views.submit_video_response, name='submit-video-response'),
     path('word-audio/', views.word_audio_activity, name='word-audio-activity'),
     path('submit-word-audio/', views.submit_word_audio_recording, name='submit-word-audio-recording'),
+    path('recording-uploads/', views.start_recording_upload, name='start-recording-upload'),
+    path('recording-uploads/<uuid:upload_id>/', views.recording_upload_chunk, name='recording-upload-chunk'),
     path('sentence-game/<int:sentence_id>/', views.sentence_audio_game, name='sentence-audio-game'), #access this page using /sentence-game/1/
     path('paragraph/', views.paragraph_game, name='paragraph-game'),  # This URL pattern points to the view for your paragraph game
     path('record_voice/', views.record_voice, name='record-voice'),
@@ -232,8 +236,19 @@ urlpatterns = [
     path('custom-admin/user-module-progress/', views.user_module_progress_customadmin, name='user_module_progress_customadmin'),
     path('custom-admin/user-profile/', views.user_profile_customadmin, name='user_profile_customadmin'),
     path('custom-admin/point-history/', views.point_history_customadmin, name='point_history_customadmin'),
-    
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('custom-admin/request-metrics/', views.request_metrics_customadmin, name='request_metrics_customadmin'),
+    path('custom-admin/autocomplete/<str:source>/', views.admin_autocomplete, name='admin_autocomplete'),
+
+    # Small clips of a listening game in one response, see prefetch.py
+    path('media-bundle/<str:token>/', serve_bundle, name='media-bundle'),
+]
+
+# Uploaded media, with byte ranges and cache validators. Only when asked to:
+# in production the web server serves MEDIA_ROOT
+if settings.SERVE_MEDIA:
+    urlpatterns.append(path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", serve_media, name='media'))
+else:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
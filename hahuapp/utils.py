@@ -1,22 +1,26 @@
 import random
+from collections import defaultdict
 from .models import (
     WordAudio,
-    LetterFillIn, 
+    LetterFillIn,
     SentencePunctuation,
-    WordVideo, 
+    WordVideo,
     SentenceSynonym,
     LetterSound,
-    AmharicLetterFamily,
-    ParagraphCreation,
-    AmharicLetterAudio
 )
+from . import reference_data
+from .question_pool import get_pool, pools_for
 
 ### ---------------- The Centralized Mapping -------------------
+#
+# Every question type is described by the model it is drawn from, the filters
+# the question row must match, how many distractor rows it needs and a builder
+# that turns the fetched rows into the question dict used by the template.
+# Letter sounds come from reference_data like in the letter games, the
+# other models from their question pools.
 
 
-def get_letter_fill_question():
-    words_data = LetterFillIn.objects.all()
-    selected_word = random.choice(words_data)
+def build_letter_fill_question(selected_word, distractors):
     return {
         'type': 'letter_fill',
         'question': selected_word.display_word,
@@ -26,10 +30,8 @@ def get_letter_fill_question():
     }
 
 
-def get_photo_to_word_question():
-    question = WordAudio.objects.filter(image__isnull=False).order_by('?').first()
-    incorrect_choices = WordAudio.objects.exclude(id=question.id).order_by('?')[:3]
-    choices = list(incorrect_choices) + [question]
+def build_photo_to_word_question(question, distractors):
+    choices = distractors + [question]
     random.shuffle(choices)
     return {
         'type': 'photo_to_word',
@@ -40,10 +42,8 @@ def get_photo_to_word_question():
     }
 
 
-def get_word_to_photo_question():
-    question = WordAudio.objects.order_by('?').first()
-    incorrect_choices = WordAudio.objects.exclude(id=question.id).order_by('?')[:3]
-    choices = list(incorrect_choices) + [question]
+def build_word_to_photo_question(question, distractors):
+    choices = distractors + [question]
     random.shuffle(choices)
     return {
         'type': 'word_to_photo',
@@ -54,10 +54,8 @@ def get_word_to_photo_question():
     }
 
 
-def get_video_to_word_question():
-    question = WordVideo.objects.order_by('?').first()
-    incorrect_choices = WordVideo.objects.exclude(id=question.id).order_by('?')[:3]
-    choices = list(incorrect_choices) + [question]
+def build_video_to_word_question(question, distractors):
+    choices = distractors + [question]
     random.shuffle(choices)
     return {
         'type': 'video_to_word',
@@ -68,10 +66,8 @@ def get_video_to_word_question():
     }
 
 
-def get_sentence_synonym_question():
-    question = SentenceSynonym.objects.order_by('?').first()
-    distractors = list(SentenceSynonym.objects.exclude(id=question.id).values_list('correct_word', flat=True).order_by('?')[:3])
-    choices = distractors + [question.correct_word]
+def build_sentence_synonym_question(question, distractors):
+    choices = [distractor.correct_word for distractor in distractors] + [question.correct_word]
     random.shuffle(choices)
     return {
         'type': 'sentence_synonym',
@@ -82,8 +78,7 @@ def get_sentence_synonym_question():
     }
 
 
-def get_sentence_punctuation_question():
-    sentence = SentencePunctuation.objects.order_by('?').first()
+def build_sentence_punctuation_question(sentence, distractors):
     choices = sentence.choices.split(",")
     random.shuffle(choices)
     return {
@@ -95,13 +90,9 @@ def get_sentence_punctuation_question():
     }
 
 
-def get_letter_sound_charades_question():
-    sounds = LetterSound.objects.all()
-    selected_sound = random.choice(sounds)
+def build_letter_sound_charades_question(selected_sound, distractors):
     correct_letter = selected_sound.letter
-    other_sounds = LetterSound.objects.exclude(letter=correct_letter)
-    incorrect_choices = random.sample(list(other_sounds), 3)
-    choices = [correct_letter] + [sound.letter for sound in incorrect_choices]
+    choices = [correct_letter] + [sound.letter for sound in distractors]
     random.shuffle(choices)
     return {
         'type': 'letter_sound_charades',
@@ -112,13 +103,9 @@ def get_letter_sound_charades_question():
     }
 
 
-def get_word_sound_identification_question():
-    all_words = WordAudio.objects.all()
-    selected_word = random.choice(all_words)
+def build_word_sound_identification_question(selected_word, distractors):
     correct_word = selected_word.word
-    other_words = WordAudio.objects.exclude(word=correct_word)
-    incorrect_choices = random.sample(list(other_words), 3)
-    choices = [correct_word] + [word.word for word in incorrect_choices]
+    choices = [correct_word] + [word.word for word in distractors]
     random.shuffle(choices)
     return {
         'type': 'word_sound_identification',
@@ -129,42 +116,159 @@ def get_word_sound_identification_question():
     }
 
 
-def get_listen_and_identify_question():
-    all_sounds = WordAudio.objects.all()
-    selected_sound = random.choice(all_sounds)
-    correct_audio = selected_sound
-    other_sounds = WordAudio.objects.exclude(word=correct_audio.word)
-    incorrect_choices = random.sample(list(other_sounds), 3)
-    choices = [correct_audio] + incorrect_choices
+def build_listen_and_identify_question(correct_audio, distractors):
+    choices = [correct_audio] + distractors
     random.shuffle(choices)
     return {
         'type': 'listen_and_identify',
         'question': correct_audio.audio_file.url,
         'choices': [choice.word for choice in choices],
         'correct_answer': correct_audio.word,
-        'extra_info': selected_sound.definition or "",
+        'extra_info': correct_audio.definition or "",
     }
 
+
+QUESTION_TYPES = {
+    'letter_fill': {
+        'model': LetterFillIn, 'distractors': 0,
+        'build': build_letter_fill_question,
+    },
+    'photo_to_word': {
+        'model': WordAudio, 'filters': {'image__isnull': False}, 'distractors': 3,
+        'build': build_photo_to_word_question,
+    },
+    'word_to_photo': {
+        'model': WordAudio, 'distractors': 3,
+        'build': build_word_to_photo_question,
+    },
+    'video_to_word': {
+        'model': WordVideo, 'distractors': 3,
+        'build': build_video_to_word_question,
+    },
+    'sentence_synonym': {
+        'model': SentenceSynonym, 'distractors': 3,
+        'build': build_sentence_synonym_question,
+    },
+    'sentence_punctuation': {
+        'model': SentencePunctuation, 'distractors': 0,
+        'build': build_sentence_punctuation_question,
+    },
+    'letter_sound_charades': {
+        'model': LetterSound, 'distractors': 3, 'unique_by': 'letter',
+        'build': build_letter_sound_charades_question,
+    },
+    'word_sound_identification': {
+        'model': WordAudio, 'distractors': 3, 'unique_by': 'word',
+        'build': build_word_sound_identification_question,
+    },
+    'listen_and_identify': {
+        'model': WordAudio, 'distractors': 3, 'unique_by': 'word',
+        'build': build_listen_and_identify_question,
+    },
+}
+
 ### ----------- list of questions ---------------
 
-def get_random_questions():
-    question_fetchers = [
-        get_letter_fill_question,
-        get_photo_to_word_question,
-        get_word_to_photo_question,
-        get_video_to_word_question,
-        get_sentence_synonym_question,
-        get_sentence_punctuation_question,
-        get_letter_sound_charades_question,
-        get_word_sound_identification_question,
-        get_listen_and_identify_question,
-    ]
 
+def source_for(model, **filters):
+    """The reference table of `model` when it has one, else its question pool."""
+    table = reference_data.TABLES.get(model)
+    if table is not None and not filters:
+        return table
+    return get_pool(model, **filters)
+
+
+def plan_questions(count, asked):
+    """
+    Pick the question types and the row ids for `count` questions.
+
+    Only the in-memory question pools and reference tables are used here, no
+    rows are fetched. `asked` maps a question type to the ids it has already
+    used so the same question is never asked twice.
+    """
+    plan = []
+    available = list(QUESTION_TYPES)
+
+    while len(plan) < count and available:
+        question_type = random.choice(available)
+        spec = QUESTION_TYPES[question_type]
+
+        ids = source_for(spec['model'], **spec.get('filters', {})).sample_ids(1, exclude=asked[question_type])
+        if not ids:
+            available.remove(question_type)  # This type has run out of questions
+            continue
+
+        question_id = ids[0]
+        asked[question_type].add(question_id)
+
+        # Draw spare distractors when some of them may share the correct answer
+        wanted = spec['distractors'] * 2 if spec.get('unique_by') else spec['distractors']
+        distractor_ids = source_for(spec['model']).sample_ids(wanted, exclude=[question_id])
+        plan.append((question_type, question_id, distractor_ids))
+
+    return plan
+
+
+def fetch_planned_rows(plan):
+    """Fetch every row used by the plan with one in_bulk() query per model, reference tables need none."""
+    ids_by_model = defaultdict(set)
+    for question_type, question_id, distractor_ids in plan:
+        model = QUESTION_TYPES[question_type]['model']
+        ids_by_model[model].add(question_id)
+        ids_by_model[model].update(distractor_ids)
+
+    rows = {}
+    for model, ids in ids_by_model.items():
+        table = reference_data.TABLES.get(model)
+        if table is not None:
+            rows[model] = table.in_bulk(ids)
+            continue
+        rows[model] = model.objects.in_bulk(ids)
+        if len(rows[model]) < len(ids):
+            # Rows were deleted by another process, reload the pools next time
+            for pool in pools_for(model):
+                pool.invalidate()
+    return rows
+
+
+def assemble_questions(plan, rows):
     questions = []
-    while len(questions) < 10:
-        fetcher = random.choice(question_fetchers)
-        question = fetcher()
-        if question not in questions:  # Avoid duplicates
-            questions.append(question)
+    for question_type, question_id, distractor_ids in plan:
+        spec = QUESTION_TYPES[question_type]
+        model_rows = rows[spec['model']]
+        question = model_rows.get(question_id)
+        if question is None:
+            continue
+
+        unique_by = spec.get('unique_by')
+        taken = {getattr(question, unique_by)} if unique_by else set()
+        distractors = []
+        for distractor_id in distractor_ids:
+            distractor = model_rows.get(distractor_id)
+            if distractor is None or len(distractors) == spec['distractors']:
+                continue
+            if unique_by:
+                value = getattr(distractor, unique_by)
+                if value in taken:
+                    continue
+                taken.add(value)
+            distractors.append(distractor)
+
+        questions.append(spec['build'](question, distractors))
+    return questions
+
+
+def get_random_questions(count=10):
+    questions = []
+    asked = defaultdict(set)
+
+    # A second round is only needed when some planned rows were deleted meanwhile
+    for _ in range(3):
+        if len(questions) >= count:
+            break
+        plan = plan_questions(count - len(questions), asked)
+        if not plan:
+            break
+        questions.extend(assemble_questions(plan, fetch_planned_rows(plan)))
 
     return questions
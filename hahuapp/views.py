@@ -1,7 +1,7 @@
 from datetime import timedelta
 import base64
 from django.core.files.base import ContentFile
-from django.http import HttpResponseNotAllowed, HttpResponseRedirect
+from django.http import Http404, HttpResponseNotAllowed, HttpResponseRedirect
 from django.contrib.admin.views.decorators import staff_member_required
 
 from django.contrib.contenttypes.models import ContentType
@@ -25,7 +25,7 @@ from .forms import (
     LevelForm, ModuleForm, SlideForm, SlideContentForm, SlideQuestionForm # for the lecture slide
 )
 
-from .models import UserProfile, Event, LetterVideo, LetterImage, BingoQuestion, LetterSoundSequence, DescriptiveImage, DescriptiveSentenceQuestion, FillInTheBlank, Numbers, Video, VideoResponse, WordAudioRecording, Paragraph
+from .models import UserProfile, Event, LetterVideo, LetterImage, BingoQuestion, LetterSoundSequence, DescriptiveImage, DescriptiveSentenceQuestion, FillInTheBlank, Numbers, Video, VideoResponse, WordAudioRecording, Paragraph, RecordingUpload
 from django.utils import timezone
 from django.utils.timezone import now
 import random
@@ -41,6 +41,7 @@ from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
+from functools import lru_cache
 ####################
 
 from .models import (
@@ -70,6 +71,14 @@ from .models import (
 from .utils import (
     get_random_questions,
 )
+from .question_pool import get_pool
+from .leaderboard import leaderboard, RankedProfiles
+from .course_outline import outline
+from .course_progress import slide_progress_map, unlock_first_steps
+from . import admin_lists, ledger, referrals, reference_data, request_metrics, round_bank, uploads
+from .media import versioned_url
+from .images import image_srcset
+from .prefetch import media_manifest
 
 def home(request):
     return render(request, 'home.html')
@@ -93,7 +102,7 @@ def signup(request):
                 referrer = UserProfile.objects.filter(referral_code=referral_code).first()
                 if referrer:
                     user_profile.referred_by = referrer  # Link the referrer
-                    user_profile.save()
+                    user_profile.save(update_fields=['referred_by'])
 
             return redirect('login')
     else:
@@ -111,21 +120,9 @@ def user_login(request):
             if user is not None:
                 login(request, user)
 
-                # Daily login bonus logic
+                # Daily login bonus logic (10 Aura points once a day)
                 user_profile = UserProfile.objects.get(user=user)
-                today = now().date()
-                if user_profile.last_login_bonus_date != today:
-                    # Award 10 Aura points
-                    user_profile.aura_points += 10
-                    user_profile.last_login_bonus_date = today
-                    user_profile.save()
-
-                    # Log the transaction in PointHistory
-                    PointHistory.objects.create(
-                        user_profile=user_profile,
-                        points=10,
-                        reason="Daily login bonus"
-                    )
+                ledger.award_daily_login_bonus(user_profile)
 
                 return redirect('home')
             else:
@@ -138,8 +135,7 @@ def user_login(request):
 @login_required
 def user_profile(request):
     user_profile = UserProfile.objects.get(user=request.user)
-    all_users = list(UserProfile.objects.filter(is_subscribed=True).order_by('-aura_points'))
-    rank = all_users.index(user_profile) + 1 if user_profile in all_users else None
+    rank = leaderboard.rank_of(user_profile)
 
     # Pass user profile data to the template context
     return render(request, 'user_profile.html', {
@@ -164,16 +160,8 @@ def award_points(request):
             # Get the user profile for the logged-in user
             user_profile = UserProfile.objects.get(user=request.user)
 
-            # Update the user's aura points
-            user_profile.aura_points += points
-            user_profile.save()
-
-            # Create a record in PointHistory
-            PointHistory.objects.create(
-                user_profile=user_profile,
-                points=points,
-                reason=reason
-            )
+            # Update the user's aura points and record it in PointHistory
+            ledger.award(user_profile, points, reason, reason_code=PointHistory.ACTIVITY)
 
             return JsonResponse({'message': 'Points awarded successfully!'})
         except Exception as e:
@@ -198,7 +186,7 @@ def latest_event(request):
     latest_event = Event.objects.filter(start_date__gte=timezone.now()).order_by('start_date').first()
     users = UserProfile.objects.filter(is_subscribed=True).order_by('-aura_points')
     top_3 = users[:3]
-    levels = Level.objects.order_by('order') ###### 
+    levels = outline.levels()
 
     return render(request, 'home.html', {
         'latest_event': latest_event,
@@ -319,66 +307,19 @@ def success(request):
     user_profile.level = level.name
     user_profile.related_level = level
     user_profile.is_subscribed = True  # Mark as subscribed
-    user_profile.save()
+    user_profile.save(update_fields=['level', 'related_level', 'is_subscribed'])
 
     # Unlock the first module in the unlocked level (if applicable)
-    first_module = level.modules.order_by('order').first()
-    if first_module:
+    first_module_id = outline.first_module_id(level.id)
+    if first_module_id:
         UserModuleProgress.objects.get_or_create(
             user=request.user,
-            module=first_module,
+            module_id=first_module_id,
             defaults={'is_locked': False}  # Unlock the first module automatically
         )
 
-    # Award 100 Aura points only for first subscription (if applicable)
-    if not PointHistory.objects.filter(user_profile=user_profile, reason="Welcome Bonus").exists():
-        user_profile.aura_points = int(user_profile.aura_points or 0) + 100
-        user_profile.save()
-
-        # Log the transaction in PointHistory
-        PointHistory.objects.create(
-            user_profile=user_profile,
-            points=100,
-            reason="Welcome Bonus"
-        )
-
-    # Handle Referral Points
-    referrer = user_profile.referred_by  # Use already established referrer
-    if referrer:
-        # Check if referral bonus for this referred student has already been awarded
-        referral_reason = f"Referral Bonus: Payment completed by {user_profile.full_name}"
-        if not PointHistory.objects.filter(user_profile=referrer, reason=referral_reason).exists():
-            if referrer.successful_referrals_this_week() < 3:  # Weekly cap check
-                referrer.aura_points += 25
-                referrer.save()
-                PointHistory.objects.create(
-                    user_profile=referrer,
-                    points=25,
-                    reason=referral_reason
-                )
-
-    # Handle Downline Bonus Cap
-    referrer = user_profile.referred_by  # Start with the direct referrer
-    points_map = [0, 15, 5]  # Points for levels 2 and 3 (Level 1 handled by direct referral bonus above)
-    level_idx = 0
-
-    while referrer and level_idx < len(points_map):
-        if level_idx > 0:  # Skip Level 1 to avoid conflict with Weekly Referral Cap
-            downline_reason = f"Downline Bonus: Payment completed by {user_profile.full_name} (Level {level_idx + 1})"
-            if not PointHistory.objects.filter(user_profile=referrer, reason=downline_reason).exists():
-                referrer.aura_points += points_map[level_idx]
-                referrer.save()
-
-                # Log the transaction in PointHistory
-                PointHistory.objects.create(
-                    user_profile=referrer,
-                    points=points_map[level_idx],
-                    reason=downline_reason
-                )
-
-        # Move to the next referrer in the chain
-        referrer = referrer.referred_by
-        level_idx += 1
+    # Award the welcome bonus and the referral/downline bonuses for the whole upline at once
+    referrals.apply_payment_bonuses(user_profile)
 
     return render(request, 'payment_success.html')
 
@@ -392,20 +333,16 @@ def error_page(request):
 # Letter Bingo game Start
 
 def letter_bingo_view(request):
-    # Fetch all stored letters from the database
-    letters = list(LetterSound.objects.values_list('letter', flat=True))
-
     # Ensure there are enough letters for the game logic
-    if len(letters) < 4:
+    sounds = reference_data.letter_sounds.sample(4)
+    if len(sounds) < 4:
         return render(request, 'error.html', {'message': 'Not enough letters in the database.'})
 
     # Select a random letter to display
-    random_letter = random.choice(letters)
+    random_letter = sounds[0].letter
 
     # Generate 4 choices, including the correct one
-    choices = random.sample(letters, 3)
-    if random_letter not in choices:
-        choices.append(random_letter)
+    choices = [sound.letter for sound in sounds]
     random.shuffle(choices)
 
     return render(request, 'letter_bingo.html', {
@@ -418,8 +355,7 @@ def letter_bingo_view(request):
 # Letter Memory Game Start
 
 def letter_memory_view(request):
-    letters = list(LetterSound.objects.values_list('letter', flat=True))
-    selected_letters = random.sample(letters, 6)  # Select 6 unique letters (can adjust number)
+    selected_letters = [sound.letter for sound in reference_data.letter_sounds.sample(6)]  # Select 6 unique letters (can adjust number)
     card_set = selected_letters * 2  # Duplicate the letters to create pairs
     random.shuffle(card_set)  # Shuffle the cards to randomize their positions
 
@@ -430,8 +366,7 @@ def letter_memory_view(request):
 # Letter Sequencing Game Start
 
 def letter_sequencing_view(request):
-    letters = list(LetterSound.objects.values_list('letter', flat=True))
-    selected_letters = random.sample(letters, 5)  # Select 5 unique letters
+    selected_letters = [sound.letter for sound in reference_data.letter_sounds.sample(5)]  # Select 5 unique letters
 
     # Sort letters to get the correct order
     correct_order = sorted(selected_letters)
@@ -448,9 +383,7 @@ def letter_sequencing_view(request):
 # Letter Fill in the Blank Game Start
 
 def letter_fill_in_the_blanks_view(request):
-    words_data = LetterFillIn.objects.all()
-    
-    selected_word = random.choice(words_data)
+    selected_word = get_pool(LetterFillIn).choice()
 
     context = {
         'correct_word': selected_word.correct_word,
@@ -467,16 +400,13 @@ def letter_fill_in_the_blanks_view(request):
 # letter sound discrimination start
 
 def letter_sound_discrimination_view(request):
-    word_sounds = list(LetterSound.objects.all())
-
-    if len(word_sounds) < 4:
-        return render(request, 'error.html', {'message': 'Not enough sounds to play the game.'})
-
-    odd_sound = random.choice(word_sounds)
-    other_sounds = [s for s in word_sounds if s.letter != odd_sound.letter]
+    pool = reference_data.letter_sounds
 
-    # Pick three identical sounds
-    identical_sound = random.choice(other_sounds)
+    # The odd sound and the sound repeated three times must be different letters
+    sounds = pool.sample(2, unique_by='letter') if len(pool) >= 4 else []
+    if len(sounds) < 2:
+        raise Http404("Not enough different sounds to play the game.")
+    odd_sound, identical_sound = sounds
     game_sounds = [identical_sound.sound_field.url] * 3 + [odd_sound.sound_field.url]
 
     # Shuffle the sounds for display
@@ -496,25 +426,26 @@ def letter_sound_discrimination_view(request):
 # letter Sound Memory start 
 
 def letter_sound_memory_view(request):
-    sounds = list(LetterSound.objects.all())
-    selected_sounds = random.sample(sounds, 6)  # 3 pairs (6 cards)
+    selected_sounds = reference_data.letter_sounds.sample(6)  # 3 pairs (6 cards)
     card_data = selected_sounds * 2  # Duplicate for matching pairs
     random.shuffle(card_data)  # Shuffle cards
 
-    return render(request, 'letter_sound_memory.html', {'card_data': card_data})
+    return render(request, 'letter_sound_memory.html', {
+        'card_data': card_data,
+        'media_manifest': media_manifest(sound.sound_field for sound in selected_sounds),
+    })
 
 # letter sound Memory End
 
 # letter sound charades
 
 def letter_sound_charades_view(request):
-    sounds = LetterSound.objects.all()
-    selected_sound = random.choice(sounds)
+    pool = reference_data.letter_sounds
+    selected_sound = pool.choice()
 
     # Create letter choices (1 correct, 3 incorrect)
     correct_letter = selected_sound.letter
-    other_sounds = LetterSound.objects.exclude(letter=correct_letter)
-    incorrect_choices = random.sample(list(other_sounds), 3)
+    incorrect_choices = pool.sample(3, exclude=[selected_sound.pk], unique_by='letter', exclude_values=[correct_letter])
 
     # Combine correct and incorrect choices, and shuffle them
     choices = [correct_letter] + [sound.letter for sound in incorrect_choices]
@@ -531,9 +462,7 @@ def letter_sound_charades_view(request):
 # letter story start
 
 def letter_story_view(request):
-    letters = LetterSound.objects.all()
-    
-    selected_letters = random.sample(list(letters), 5)
+    selected_letters = reference_data.letter_sounds.sample(5)
     return render(request, 'letter_story.html', {'selected_letters': selected_letters})
 
 # letter story end
@@ -541,9 +470,7 @@ def letter_story_view(request):
 # letter fill in the blank 2 
 
 def letter_fill_in_the_blanks_2_view(request):
-    words_data = LetterFillIn.objects.all()
-    
-    selected_word = random.choice(words_data)
+    selected_word = get_pool(LetterFillIn).choice()
 
     context = {
         'correct_word': selected_word.correct_word,
@@ -603,8 +530,7 @@ def word_formation_view(request):
 
 def scrambled_letters_view(request):
     # Select 5 different letters randomly
-    letters = list(LetterSound.objects.values_list('letter', flat=True))
-    selected_letters = random.sample(letters, 5)  # Select 5 unique letters
+    selected_letters = [sound.letter for sound in reference_data.letter_sounds.sample(5)]  # Select 5 unique letters
     scrambled = scramble_word(''.join(selected_letters))  # Scramble the letters
 
     return render(request, 'scrambled_letters.html', {
@@ -643,7 +569,7 @@ def timed_writing_view(request):
 # listen and write start
 
 def listen_and_write_view(request):
-    letter_sound = random.choice(LetterSound.objects.all())
+    letter_sound = reference_data.letter_sounds.choice()
 
     context = {
         'letter_sound': letter_sound,
@@ -656,7 +582,7 @@ def listen_and_write_view(request):
 
 def audio_recognition_view(request):
     # Select a random WordAudio object
-    word_audio = random.choice(WordAudio.objects.all())
+    word_audio = get_pool(WordAudio).choice()
     context = {
         'word_audio': word_audio,
     }
@@ -673,12 +599,12 @@ def letter_quiz_view(request):
     - Displays exactly 15 letter choices (including correct ones).
     """
     # Step 1: Select exactly 5 random sounds for the quiz
-    selected_sounds = list(LetterSound.objects.order_by('?')[:5])
+    pool = reference_data.letter_sounds
+    selected_sounds = pool.sample(5)
     correct_letters = {sound.letter for sound in selected_sounds}
 
     # Step 2: Select additional letters to make the total choices 15
-    all_letters = list(LetterSound.objects.exclude(pk__in=[s.pk for s in selected_sounds]))
-    additional_choices = random.sample(all_letters, 15 - len(correct_letters))
+    additional_choices = pool.sample(15 - len(correct_letters), exclude=[s.pk for s in selected_sounds])
 
     # Step 3: Combine correct and additional letters, then shuffle the list
     choices = selected_sounds + additional_choices
@@ -697,9 +623,7 @@ def letter_quiz_view(request):
 # word matching start
 
 def word_matching_view(request):
-    words = list(WordAudio.objects.all())
-    random.shuffle(words)
-    selected_words = words[:4]
+    selected_words = get_pool(WordAudio).sample(4)
 
     # Shuffle the definitions for multiple-choice matching
     definitions = [word.definition for word in selected_words]
@@ -719,49 +643,14 @@ def word_matching_view(request):
 
 # word hunt start
 
-def generate_grid(target_words):
-    max_length = max(len(word.word) for word in target_words)
-    grid_size = max(max_length + 2, 6) 
-
-    grid = [['' for _ in range(grid_size)] for _ in range(grid_size)]
-
-    # Place words either horizontally or vertically
-    for word in target_words:
-        placed = False
-        while not placed:
-            direction = random.choice(['horizontal', 'vertical'])
-            if direction == 'horizontal':
-                row = random.randint(0, grid_size - 1)
-                col = random.randint(0, grid_size - len(word.word))
-                if all(grid[row][col + i] == '' for i in range(len(word.word))):
-                    for i in range(len(word.word)):
-                        grid[row][col + i] = word.word[i]
-                    placed = True
-            else:  # Vertical placement
-                row = random.randint(0, grid_size - len(word.word))
-                col = random.randint(0, grid_size - 1)
-                if all(grid[row + i][col] == '' for i in range(len(word.word))):
-                    for i in range(len(word.word)):
-                        grid[row + i][col] = word.word[i]
-                    placed = True
-
-    letter_sounds = [ls.letter for ls in LetterSound.objects.all()]
-
-    # Fill empty spaces with random letters from LetterSound model
-    for i in range(grid_size):
-        for j in range(grid_size):
-            if grid[i][j] == '':
-                grid[i][j] = random.choice(letter_sounds)
-
-    return grid, [word.word for word in target_words]
-
 def word_hunt_view(request):
-    target_words = random.sample(list(WordAudio.objects.all()), 3) 
-    grid, placed_words = generate_grid(target_words)
+    board = round_bank.get_board('word_hunt')
+    if board is None:
+        raise Http404("No words to hide in a word hunt")
 
     return render(request, 'word_hunt.html', {
-        'grid': grid,
-        'target_words': placed_words,
+        'grid': board['grid'],
+        'target_words': board['words'],
     })
 
 # word hunt end
@@ -769,7 +658,7 @@ def word_hunt_view(request):
 # word sequencing start
 
 def word_sequencing_view(request):
-    word_instance = random.choice(WordAudio.objects.all())
+    word_instance = get_pool(WordAudio).choice()
     word = word_instance.word
     shuffled_letters = list(word)
     random.shuffle(shuffled_letters) 
@@ -785,12 +674,11 @@ def word_sequencing_view(request):
 # word sound identification start
 
 def word_sound_identification_view(request):
-    all_words = WordAudio.objects.all()
-    selected_word = random.choice(all_words) 
+    pool = get_pool(WordAudio)
+    selected_word = pool.choice()
 
     correct_word = selected_word.word
-    other_words = WordAudio.objects.exclude(word=correct_word)
-    incorrect_choices = random.sample(list(other_words), 3)
+    incorrect_choices = pool.sample(3, exclude=[selected_word.pk], unique_by='word', exclude_values=[correct_word])
 
     choices = [correct_word] + [word.word for word in incorrect_choices]
     random.shuffle(choices)
@@ -806,8 +694,7 @@ def word_sound_identification_view(request):
 # word tracing start
 
 def word_tracing_view(request):
-    words = WordAudio.objects.all()
-    selected_word = random.choice(words)
+    selected_word = get_pool(WordAudio).choice()
 
     context = {
         'selected_word': selected_word.word,
@@ -819,8 +706,7 @@ def word_tracing_view(request):
 # word formation (level 2) start
 
 def word_formation_2_view(request):
-    words = WordAudio.objects.all()
-    selected_word = random.choice(words)  # Select a random word
+    selected_word = get_pool(WordAudio).choice()  # Select a random word
     correct_word = selected_word.word
     scrambled = scramble_word(correct_word)  # Scramble the word, function defined in scrambled letters
 
@@ -834,7 +720,7 @@ def word_formation_2_view(request):
 # word dictation start
 
 def word_dictaition_view(request):
-    word_sound = random.choice(WordAudio.objects.all())
+    word_sound = get_pool(WordAudio).choice()
 
     context = {
         'word_sound': word_sound,
@@ -846,9 +732,9 @@ def word_dictaition_view(request):
 # word Charades 
 
 def word_charades_view(request):
-    word = random.choice(WordVideo.objects.all())
+    word = get_pool(WordVideo).choice()
     context = {
-        'video_url': word.video_file.url,
+        'video_url': versioned_url(word.video_file),
         'correct_word': word.word,
         'hint': word.hint
     }
@@ -945,8 +831,7 @@ def letter_memory_game(request):
         request.session['score'] = 0
         request.session['rounds'] = 0
     
-    # Fetch all LetterSounds
-    letter_sounds = list(LetterSound.objects.all())
+    letter_sounds = reference_data.letter_sounds
 
     if request.method == 'POST':
         user_answer = request.POST.get('user_answer')
@@ -963,7 +848,7 @@ def letter_memory_game(request):
             return render(request, 'game_over.html', {'score': score})
 
         # Select a random letter
-        current_sound = random.choice(letter_sounds)
+        current_sound = letter_sounds.choice()
         return render(request, 'letter_memory_game.html', {
             'letter_sound': current_sound,
             'score': request.session['score'],
@@ -971,7 +856,7 @@ def letter_memory_game(request):
         })
 
     # Select a random letter on the first visit
-    current_sound = random.choice(letter_sounds)
+    current_sound = letter_sounds.choice()
     return render(request, 'letter_memory_game.html', {
         'letter_sound': current_sound,
         'score': request.session['score'],
@@ -981,8 +866,7 @@ def letter_memory_game(request):
 #tony
 def sound_sorting(request):
     # Get a random selection of 5 sounds from the LetterSound model
-    sounds = list(LetterSound.objects.all())
-    selected_sounds = random.sample(sounds, min(5, len(sounds)))
+    selected_sounds = reference_data.letter_sounds.sample(5)
 
     if request.method == 'POST':
         user_answer = request.POST.get('user_answer')
@@ -1003,9 +887,8 @@ def sound_sorting(request):
 
 #tony
 def letter_sound_identification(request):
-    # Get all letter sounds and images
-    letter_sounds = LetterSound.objects.all()
-    letter_images = LetterImage.objects.all()
+    letter_sounds = reference_data.letter_sounds
+    letter_images = get_pool(LetterImage)
 
     if request.method == 'POST':
         user_answer = request.POST.get('user_answer')
@@ -1019,8 +902,8 @@ def letter_sound_identification(request):
             feedback = f"Wrong! The correct letter was: {correct_letter}"
 
         # Select a new random letter sound and image
-        letter_sound = random.choice(letter_sounds)
-        letter_image = random.choice(letter_images)
+        letter_sound = letter_sounds.choice()
+        letter_image = letter_images.choice()
 
         return render(request, 'your_template.html', {
             'letter_sound': letter_sound,
@@ -1029,8 +912,8 @@ def letter_sound_identification(request):
         })
 
     # On initial load, select a random letter sound and image
-    letter_sound = random.choice(letter_sounds)
-    letter_image = random.choice(letter_images)
+    letter_sound = letter_sounds.choice()
+    letter_image = letter_images.choice()
 
     return render(request, 'letter_sound_identification.html', {
         'letter_sound': letter_sound,
@@ -1040,8 +923,7 @@ def letter_sound_identification(request):
 
 #tony
 def sound_imitation(request):
-    letter_sounds = LetterSound.objects.all()
-    letter_sound = random.choice(letter_sounds)
+    letter_sound = reference_data.letter_sounds.choice()
 
     return render(request, 'sound_imitation.html', {
         'letter_sound': letter_sound,
@@ -1073,10 +955,9 @@ def speaking_charades_view(request):
             return render(request, 'feedback.html', {'feedback': 'Recording submitted successfully!'})
 
     else:
-        content_type, question = random.choice([
-            (ContentType.objects.get_for_model(WordVideo), WordVideo.objects.order_by('?').first()),
-            (ContentType.objects.get_for_model(LetterImage), LetterImage.objects.order_by('?').first()),
-        ])
+        model = random.choice([WordVideo, LetterImage])
+        content_type = ContentType.objects.get_for_model(model)
+        question = get_pool(model).choice()
 
         if not question:
             return render(request, 'feedback.html', {'feedback': 'No content available.'})
@@ -1094,7 +975,7 @@ def speaking_charades_view(request):
 @login_required
 def word_countdown_view(request):
     if request.method == 'GET':
-        letter = random.choice(LetterImage.objects.all())
+        letter = get_pool(LetterImage).choice()
     else:
         letter_id = request.POST.get('letter_id')
         letter = get_object_or_404(LetterImage, id=letter_id)
@@ -1108,7 +989,11 @@ def word_countdown_view(request):
         )
         return redirect('feedback')  
 
-    return render(request, 'word_countdown.html', {'letter': letter})
+    # The page uploads through chunked_upload.js, the form post is the fallback
+    return render(request, 'word_countdown.html', {
+        'letter': letter,
+        'content_type_id': ContentType.objects.get_for_model(LetterImage).id,
+    })
 
 @login_required
 def feedback_view(request):
@@ -1122,15 +1007,12 @@ def feedback_view(request):
 # word sound discrimination start
 
 def word_sound_discrimination_view(request):
-    word_sounds = list(WordAudio.objects.all())
-
-    if len(word_sounds) < 4:
-        return render(request, 'error.html', {'message': 'Not enough sounds to play the game.'})
-
-    odd_sound = random.choice(word_sounds)
-    other_sounds = [s for s in word_sounds if s.word != odd_sound.word]
+    pool = get_pool(WordAudio)
 
-    identical_sound = random.choice(other_sounds)
+    sounds = pool.sample(2, unique_by='word') if len(pool) >= 4 else []
+    if len(sounds) < 2:
+        raise Http404("Not enough different sounds to play the game.")
+    odd_sound, identical_sound = sounds
     game_sounds = [identical_sound.audio_file.url] * 3 + [odd_sound.audio_file.url]
     random.shuffle(game_sounds)
 
@@ -1148,24 +1030,23 @@ def word_sound_discrimination_view(request):
 # word sound memory start
 
 def word_sound_memory_view(request):
-    word_sounds = list(WordAudio.objects.all())
-    selected_sounds = random.sample(word_sounds, 5)  # 5 pairs (10 cards)
+    selected_sounds = get_pool(WordAudio).sample(5)  # 5 pairs (10 cards)
     card_data = selected_sounds * 2  # Duplicate for matching pairs
     random.shuffle(card_data)  # Shuffle cards
 
-    return render(request, 'word_sound_memory.html', {'card_data': card_data})
+    return render(request, 'word_sound_memory.html', {
+        'card_data': card_data,
+        'media_manifest': media_manifest(sound.audio_file for sound in selected_sounds),
+    })
 
 # word sound memory end
 
 # listen and identify start
 
 def listen_and_identify_view(request):
-    all_sounds = WordAudio.objects.all()
-    selected_sound = random.choice(all_sounds)
-
-    correct_audio = selected_sound
-    other_sounds = WordAudio.objects.exclude(word=correct_audio.word)
-    incorrect_choices = random.sample(list(other_sounds), 3)
+    pool = get_pool(WordAudio)
+    correct_audio = pool.choice()
+    incorrect_choices = pool.sample(3, exclude=[correct_audio.pk], unique_by='word', exclude_values=[correct_audio.word])
 
     choices = [correct_audio] + incorrect_choices
     random.shuffle(choices)
@@ -1182,13 +1063,10 @@ def listen_and_identify_view(request):
 # word sound sequencing start
 
 def word_sound_sequencing_view(request):
-    word_audios = list(WordAudio.objects.all())
-    if len(word_audios) < 4:
+    selected_audios = get_pool(WordAudio).sample(4)
+    if len(selected_audios) < 4:
         raise ValueError("Not enough words in the database to play the game.")
 
-    random.shuffle(word_audios)  
-    selected_audios = word_audios[:4]
-
     shuffled_words = selected_audios[:]
     random.shuffle(shuffled_words)
 
@@ -1202,12 +1080,11 @@ def word_sound_sequencing_view(request):
 # sentence matching start
 
 def sentence_matching_view(request):
-    all_sentences = Sentence.objects.all()
-    selected_sentence = random.choice(all_sentences) 
+    pool = get_pool(Sentence)
+    selected_sentence = pool.choice()
 
     correct_definition = selected_sentence.definition
-    other_definitions = Sentence.objects.exclude(definition=correct_definition)
-    incorrect_choices = random.sample(list(other_definitions), 3)
+    incorrect_choices = pool.sample(3, exclude=[selected_sentence.pk], unique_by='definition', exclude_values=[correct_definition])
 
     choices = [correct_definition] + [sentence.definition for sentence in incorrect_choices]
     random.shuffle(choices)
@@ -1223,8 +1100,7 @@ def sentence_matching_view(request):
 # sentence hunt start
 
 def sentence_hunt_view(request):
-    sentences = list(Sentence.objects.filter(is_active=True))  
-    selected_sentences = random.sample(sentences, min(3, len(sentences)))
+    selected_sentences = get_pool(Sentence, is_active=True).sample(3)
 
     words = []
     for sentence in selected_sentences:
@@ -1246,8 +1122,7 @@ def sentence_hunt_view(request):
 # passage analysis start
 
 def passage_analysis_view(request):
-    paragraphs = Passage.objects.all()
-    selected_paragraph = random.choice(paragraphs) 
+    selected_paragraph = get_pool(Passage).choice()
 
     correct = selected_paragraph.main_idea
 
@@ -1265,15 +1140,15 @@ def passage_analysis_view(request):
 # photo to word
 
 def photo_to_word_view(request):
-    question = WordAudio.objects.filter(image__isnull=False).order_by('?').first()
+    question = get_pool(WordAudio, image__isnull=False).choice()
 
-    incorrect_choices = WordAudio.objects.exclude(id=question.id).order_by('?')[:3]
+    incorrect_choices = get_pool(WordAudio).sample(3, exclude=[question.id])
 
-    choices = list(incorrect_choices) + [question]
+    choices = incorrect_choices + [question]
     random.shuffle(choices)
 
     question_data = {
-        'image_url': question.image.url,
+        'image': question.image,
         'choices': [choice.word for choice in choices],
         'correct_answer': question.word,
         'definition': question.definition
@@ -1286,16 +1161,17 @@ def photo_to_word_view(request):
 # word to photo 
 
 def word_to_photo_view(request):
-    question = WordAudio.objects.all().order_by('?').first()
+    pool = get_pool(WordAudio)
+    question = pool.choice()
 
-    incorrect_choices = WordAudio.objects.exclude(id=question.id).order_by('?')[:3]
+    incorrect_choices = pool.sample(3, exclude=[question.id])
 
-    choices = list(incorrect_choices) + [question]
+    choices = incorrect_choices + [question]
     random.shuffle(choices)
 
     question_data = {
         'word': question.word,
-        'choices': [choice.image.url for choice in choices],
+        'choices': [choice.image for choice in choices],
         'correct_answer': question.image.url,
         'definition': question.definition
     }
@@ -1307,15 +1183,16 @@ def word_to_photo_view(request):
 # video to word
 
 def video_to_word_view(request):
-    question = WordVideo.objects.order_by('?').first()
+    pool = get_pool(WordVideo)
+    question = pool.choice()
 
-    incorrect_choices = WordVideo.objects.exclude(id=question.id).order_by('?')[:3]
+    incorrect_choices = pool.sample(3, exclude=[question.id])
 
-    choices = list(incorrect_choices) + [question]
+    choices = incorrect_choices + [question]
     random.shuffle(choices)
 
     context = {
-        'video_url': question.video_file.url,
+        'video_url': versioned_url(question.video_file),
         'choices': [choice.word for choice in choices],
         'correct_answer': question.word,
         'hint': question.hint
@@ -1328,9 +1205,10 @@ def video_to_word_view(request):
 # Sentence Synonym 
 
 def sentence_synonym_view(request):
-    question = SentenceSynonym.objects.order_by('?').first()
+    pool = get_pool(SentenceSynonym)
+    question = pool.choice()
 
-    distractors = list(SentenceSynonym.objects.exclude(id=question.id).values_list('correct_word', flat=True).order_by('?')[:3])
+    distractors = [synonym.correct_word for synonym in pool.sample(3, exclude=[question.id])]
 
     choices = distractors + [question.correct_word]
     random.shuffle(choices)
@@ -1349,7 +1227,7 @@ def sentence_synonym_view(request):
 # Sentence punctuation
 
 def sentence_punctuation_view(request):
-    sentence = SentencePunctuation.objects.order_by('?').first()
+    sentence = get_pool(SentencePunctuation).choice()
     
     punctuation_choices = sentence.choices.split(",")
     random.shuffle(punctuation_choices) 
@@ -1369,7 +1247,7 @@ def sentence_punctuation_view(request):
 # Paragraph creation 
 
 def paragraph_creation_view(request):
-    game = ParagraphCreation.objects.order_by('?').first()
+    game = get_pool(ParagraphCreation).choice()
 
     # Shuffle the sentences for display
     shuffled_sentences = game.sentences.copy()
@@ -1388,38 +1266,14 @@ def paragraph_creation_view(request):
 # find family
 
 def find_family_view(request):
-    all_families = AmharicLetterFamily.objects.all()
-   
-    selected_family = random.choice(all_families)
-    letter = selected_family.letter
-    correct_family = selected_family.family
-    
-    correct_members = random.sample(correct_family, 4)
-    
-    incorrect_families = random.sample([fam for fam in all_families if fam != selected_family], 2)
-    incorrect_members = []
-    for fam in incorrect_families:
-        incorrect_members.extend(random.sample(fam.family, 2)) 
-    
-    mixed_options = correct_members + incorrect_members
-    
-    if len(mixed_options) > 10:
-        mixed_options = mixed_options[:10]
-    else:
-        remaining_choices = 10 - len(mixed_options)
-        additional_incorrect_members = []
-        while len(additional_incorrect_members) < remaining_choices:
-            incorrect_family = random.choice([fam for fam in all_families if fam != selected_family])
-            additional_incorrect_members.extend(random.sample(incorrect_family.family, 1)) 
-        
-        mixed_options.extend(additional_incorrect_members)
-    
-    random.shuffle(mixed_options)
+    board = round_bank.get_board('find_family')
+    if board is None:
+        raise Http404("No letter families to play with")
 
     context = {
-        'letter': letter,
-        'options': mixed_options,
-        'correct_family': json.dumps(correct_family) 
+        'letter': board['letter'],
+        'options': board['options'],
+        'correct_family': json.dumps(board['family'])
     }
     
     return render(request, 'find_family.html', context)
@@ -1429,7 +1283,7 @@ def find_family_view(request):
 # arrange family
 
 def arrange_family_view(request):
-    letter_family = AmharicLetterFamily.objects.order_by('?').first()
+    letter_family = reference_data.letter_families.choice()
     correct_family = letter_family.family  # This is the ordered family list
     
     # Shuffle the family members to create options
@@ -1449,13 +1303,13 @@ def arrange_family_view(request):
 # find family 2
 
 def find_family_2_view(request):
-    letter_family = random.choice(AmharicLetterFamily.objects.all())
-    correct_family_audios = letter_family.letters.all()
+    letter_family = reference_data.letter_families.choice()
+    correct_family_audios = list(letter_family.letters.all())
 
     correct_audio_files = [audio.audio_file.url for audio in correct_family_audios]
 
-    other_families = AmharicLetterAudio.objects.exclude(family=letter_family)
-    distractor_audios = random.sample(list(other_families), 6) 
+    # Any audio that is not part of the selected family works as a distractor
+    distractor_audios = get_pool(AmharicLetterAudio).sample(6, exclude=[audio.pk for audio in correct_family_audios])
     distractor_audio_files = [audio.audio_file.url for audio in distractor_audios]
 
     all_audio_choices = correct_audio_files + distractor_audio_files
@@ -1465,7 +1319,8 @@ def find_family_2_view(request):
         'question_type': 'find_family_2',
         "letter": letter_family.letter,
         "correct_audio_files": correct_audio_files,
-        "audio_choices": all_audio_choices
+        "audio_choices": all_audio_choices,
+        "media_manifest": media_manifest(audio.audio_file for audio in correct_family_audios + distractor_audios),
     }
     return render(request, 'find_family_2.html', context)
 
@@ -1474,11 +1329,11 @@ def find_family_2_view(request):
 # time stamp
 
 def time_stamp_view(request):
-    letter_audio_files = list(AmharicLetterAudio.objects.all())
+    pool = get_pool(AmharicLetterAudio)
 
-    correct_letter_audio = random.choice(letter_audio_files)
+    correct_letter_audio = pool.choice()
     
-    audio_sequence = random.sample(letter_audio_files, 4) 
+    audio_sequence = pool.sample(4)
     audio_sequence.append(correct_letter_audio)  
    
     random.shuffle(audio_sequence)
@@ -1494,6 +1349,7 @@ def time_stamp_view(request):
     return render(request, 'time_stamp.html', {
         'correct_letter': correct_letter_audio.letter,
         'audio_sequence': audio_sequence_data,
+        'media_manifest': media_manifest(audio.audio_file for audio in audio_sequence),
     })
 
 # time stamp end
@@ -1622,34 +1478,35 @@ GAMES = [
 ]
 
 
-def games_page_view(request):
-    # Get the current logged-in user's profile
-    user_profile = UserProfile.objects.get(user=request.user)
+GAME_LEVELS = ['Beginner', 'Basic', 'Advanced', 'Pro']
+GAME_CATEGORIES = ['Reading', 'Writing', 'Listening', 'Speaking']
 
-    # Get the user's unlocked levels as Level instances
-    unlocked_levels = UserLevelProgress.objects.filter(user=request.user, is_locked=False).values_list('level', flat=True)
+# GAMES indexed by level name, then category, in the order they are listed
+GAME_CATALOG = {level: {category: [] for category in GAME_CATEGORIES} for level in GAME_LEVELS}
+for game in GAMES:
+    GAME_CATALOG[game['level']][game['category']].append(game)
 
-    # Initialize structure for levels
-    levels = {
-        'Beginner': {'Reading': [], 'Writing': [], 'Listening': [], 'Speaking': []},
-        'Basic': {'Reading': [], 'Writing': [], 'Listening': [], 'Speaking': []},
-        'Advanced': {'Reading': [], 'Writing': [], 'Listening': [], 'Speaking': []},
-        'Pro': {'Reading': [], 'Writing': [], 'Listening': [], 'Speaking': []},
-    }
 
-    # Populate the structure with games but only for unlocked levels
-    for game in GAMES:
-        level_name = game['level']
-        category = game['category']
+@lru_cache(maxsize=32)
+def games_for_levels(level_names):
+    """The games page structure for a frozenset of unlocked level names, cached per set."""
+    return {
+        level: {
+            category: list(games) if level in level_names else []
+            for category, games in categories.items()
+        }
+        for level, categories in GAME_CATALOG.items()
+    }
 
-        # Fetch the actual Level instance corresponding to the level_name
-        level_instance = Level.objects.filter(name=level_name).first()
 
-        if level_instance and level_instance.id in unlocked_levels:  # Check if the level is unlocked for the user
-            levels[level_name][category].append(game)
+def games_page_view(request):
+    # Names of the user's unlocked levels, in one query
+    unlocked_level_names = frozenset(
+        UserLevelProgress.objects.filter(user=request.user, is_locked=False).values_list('level__name', flat=True)
+    )
 
-    # Render the page with the filtered levels and games
-    return render(request, 'games_page.html', {'levels': levels})
+    # Render the page with the games of the unlocked levels only
+    return render(request, 'games_page.html', {'levels': games_for_levels(unlocked_level_names)})
 
 # Games Page end
 
@@ -1657,7 +1514,7 @@ def games_page_view(request):
 
 def story_telling_view(request, story_id=None, part_number=1):
     if story_id is None:  # Show top 10 stories if no story_id is provided
-        stories = Story.objects.all().order_by('?')[:10]  # Adjust sorting as needed
+        stories = get_pool(Story).sample(10)
         return render(request, 'story_list.html', {'stories': stories})
 
     # Fetch the story and specific part
@@ -1720,20 +1577,14 @@ def tracing_board(request):
     return render(request, 'board.html', {'letter': selected_letter})
 
 def letter_sound_identification(request):
-    # Get a random letter sound from the database
-    letter_sounds = LetterSound.objects.all()
-    selected_letter = random.choice(letter_sounds)
+    # Get 4 random sounds, the first one is the letter to identify
+    sound_choices = reference_data.letter_sounds.sample(4)
+    selected_letter = sound_choices[0]
     letter = selected_letter.letter
-    
-    # Get all sound choices (4 random sounds)
-    sound_choices = list(LetterSound.objects.all())
 
     # Ensure the correct sound is included in the choices
     correct_sound = selected_letter.sound_field.url  # Get the URL of the correct sound
 
-    # Add the correct sound and select 3 random sounds from the remaining
-    sound_choices.remove(selected_letter)  # Remove the correct sound from the choices
-    sound_choices = random.sample(sound_choices, 3) + [selected_letter]  # Include the correct sound
     random.shuffle(sound_choices)  # Shuffle to randomize position
 
     # Prepare the context
@@ -1745,11 +1596,8 @@ def letter_sound_identification(request):
     return render(request, 'letter_sound_identification.html', context)
 
 def letter_dictation(request):
-    # Fetch all letter sounds
-    letter_sounds = LetterSound.objects.all()
-
     # Select a random letter sound for the dictation
-    selected_sound = random.choice(letter_sounds)
+    selected_sound = reference_data.letter_sounds.choice()
 
     context = {
         'letter': selected_sound.letter,
@@ -1758,7 +1606,7 @@ def letter_dictation(request):
     return render(request, 'letter_dictation.html', context)
 
 def bingo_game(request):
-    question = BingoQuestion.objects.order_by('?').first()  # Get a random question
+    question = get_pool(BingoQuestion).choice()  # Get a random question
     context = {'question': question}
     return render(request, 'letter_sound_bingo.html', context)
 
@@ -1800,7 +1648,7 @@ def get_random_question():
         {'model': WordVideo, 'answer_field': 'word'}
     ]
     chosen = random.choice(models)
-    item = chosen['model'].objects.order_by('?').first()  # Fetch a random entry from the chosen model
+    item = get_pool(chosen['model']).choice()  # Fetch a random entry from the chosen model
     return {
         'type': chosen['model'].__name__,
         'content': item,
@@ -1848,11 +1696,12 @@ def descriptive_image_game(request):
         # Check the user's answer
         if user_answer == correct_answer:
             # Get a new random question
-            new_question = random.choice(DescriptiveImage.objects.exclude(id=question_id))
+            new_question = get_pool(DescriptiveImage).choice(exclude=[question.id])
             return JsonResponse({
                 'message': 'Correct! Here is the next question.',
                 'is_correct': True,
                 'new_question_image_url': new_question.image.url,
+                'new_question_image_srcset': image_srcset(new_question.image),
                 'new_question_id': new_question.id
             })
         else:
@@ -1863,12 +1712,12 @@ def descriptive_image_game(request):
             })
 
     # If it's a GET request, return the first question
-    question = random.choice(DescriptiveImage.objects.all())
+    question = get_pool(DescriptiveImage).choice()
     return render(request, 'descriptive_image_game.html', {'question': question})
 
 def descriptive_sentence_game(request):
     # Get a random question from the database
-    question = random.choice(DescriptiveSentenceQuestion.objects.all())
+    question = get_pool(DescriptiveSentenceQuestion).choice()
     
     if request.method == 'POST':
         # Get the user's answer from the POST request
@@ -1885,7 +1734,7 @@ def descriptive_sentence_game(request):
 
         if is_correct:
             # Provide new question and image URL if answer is correct
-            new_question = random.choice(DescriptiveSentenceQuestion.objects.all())
+            new_question = get_pool(DescriptiveSentenceQuestion).choice()
             response_data['new_question_image_url'] = new_question.image.url
             response_data['new_question_id'] = new_question.id
         
@@ -1901,7 +1750,7 @@ def word_copy_game(request):
         
         if user_input == word.word:
             # Fetch a new random word from the database
-            new_word = random.choice(WordAudio.objects.exclude(id=word_id))
+            new_word = get_pool(WordAudio).choice(exclude=[word.id])
             return JsonResponse({
                 'message': 'Correct!',
                 'new_word': new_word.word,
@@ -1911,7 +1760,7 @@ def word_copy_game(request):
             return JsonResponse({'message': 'Try Again'})
 
     # Initial word for GET request
-    word = random.choice(WordAudio.objects.all())
+    word = get_pool(WordAudio).choice()
     return render(request, 'word_copy_game.html', {'word': word})
 
 
@@ -1926,7 +1775,7 @@ def fill_in_the_blank_game(request):
 
         if is_correct:
             message = "Correct!"
-            new_question = random.choice(FillInTheBlank.objects.exclude(id=question_id))
+            new_question = get_pool(FillInTheBlank).choice(exclude=[question.id])
             split_question = new_question.question.split('__')  # Assuming blanks are represented by '__'
             return JsonResponse({
                 'message': message,
@@ -1938,7 +1787,7 @@ def fill_in_the_blank_game(request):
             return JsonResponse({'message': 'Incorrect. Try again!'})
 
     # Initial GET request - select a random question
-    question = random.choice(FillInTheBlank.objects.all())
+    question = get_pool(FillInTheBlank).choice()
     split_question = question.question.split('__')  # Assuming blanks are represented by '__'
     return render(request, 'fill_in_the_blank_game.html', {
         'question': question,
@@ -1951,7 +1800,9 @@ def number_to_word_game(request):
     if request.method == 'POST':
         user_answer = request.POST.get('user_answer').strip().lower()
         number_id = request.POST.get('number_id')
-        number = Numbers.objects.get(id=number_id)
+        number = reference_data.number(int(number_id)) if number_id and number_id.isdigit() else None
+        if number is None:
+            raise Http404("Unknown number")
 
         # Check if the user's answer matches the word representation
         if user_answer == number.word.lower():
@@ -1967,7 +1818,7 @@ def number_to_word_game(request):
         })
 
     # If it's a GET request, show a random number
-    number = Numbers.objects.order_by('?').first()
+    number = reference_data.numbers.choice()
     return render(request, 'number_to_word_game.html', {'number': number})
 
 def writing_practice(request):
@@ -2028,8 +1879,11 @@ def submit_video_response(request, video_id):
 
 @login_required
 def word_audio_activity(request):
-    word_audio = WordAudio.objects.order_by('?').first()
-    return render(request, 'word_audio_activity.html', {'word_audio': word_audio})
+    word_audio = get_pool(WordAudio).choice()
+    return render(request, 'word_audio_activity.html', {
+        'word_audio': word_audio,
+        'content_type_id': ContentType.objects.get_for_model(WordAudio).id,
+    })
 
 @login_required
 def submit_word_audio_recording(request):
@@ -2054,6 +1908,59 @@ def submit_word_audio_recording(request):
     return JsonResponse({"error": "Invalid request"}, status=400)
 
 
+# chunked recording uploads, see uploads.py
+
+def upload_status(upload):
+    return {
+        'upload_id': str(upload.pk),
+        'url': reverse('recording-upload-chunk', args=[upload.pk]),
+        'offset': upload.received,
+        'size': upload.size,
+        'chunk_size': uploads.CHUNK_SIZE,
+        'complete': upload.completed_at is not None,
+    }
+
+
+@login_required
+def start_recording_upload(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request"}, status=400)
+    try:
+        upload = uploads.start_upload(
+            request.user,
+            request.POST.get("kind"),
+            request.POST.get("content_type"),
+            request.POST.get("object_id"),
+            request.POST.get("filename"),
+            request.POST.get("size"),
+        )
+    except uploads.UploadError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    return JsonResponse(upload_status(upload), status=201)
+
+
+@login_required
+def recording_upload_chunk(request, upload_id):
+    upload = get_object_or_404(RecordingUpload, pk=upload_id, user=request.user)
+    if request.method == "GET":
+        return JsonResponse(upload_status(upload))  # Where to resume from
+    if request.method not in ("POST", "PUT"):
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    # The body is the raw chunk, it is streamed to storage and never read into memory
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return JsonResponse({"error": "Upload-Offset header is required"}, status=400)
+    try:
+        upload = uploads.append_chunk(upload, offset, request, length)
+    except uploads.UploadError as e:
+        upload.refresh_from_db()
+        return JsonResponse({"error": str(e), **upload_status(upload)}, status=e.status)
+    return JsonResponse(upload_status(upload))
+
+
 def sentence_audio_game(request, sentence_id):
     sentence = Sentence.objects.get(id=sentence_id)
     
@@ -2070,7 +1977,7 @@ def sentence_audio_game(request, sentence_id):
 
 def paragraph_game(request):
     # Fetch a random active paragraph
-    paragraph = Paragraph.objects.filter(is_active=True).order_by('?').first()
+    paragraph = get_pool(Paragraph, is_active=True).choice()
     
     # Return the paragraph content to the template
     return render(request, 'paragraph_game.html', {'paragraph': paragraph})
@@ -2100,34 +2007,9 @@ def multiple_choice_view(request):
 ### --------- LeaderBoard ------------ 
 
 def leaderboard_view(request):
-    users = UserProfile.objects.filter(is_subscribed=True).order_by('-aura_points')
-
-    # Assign ranks with ties
-    ranked_users = []
-    previous_points = None
-    previous_rank = 0
-    tied_count = 0
-
-    for i, user in enumerate(users, start=1):
-        if user.aura_points == previous_points:
-            tied_count += 1
-            rank = previous_rank
-        else:
-            rank = previous_rank + tied_count + 1
-            tied_count = 0
-
-        previous_points = user.aura_points
-        previous_rank = rank
-
-        ranked_users.append({
-            "rank": rank,
-            "full_name": user.full_name,
-            "aura_points": user.aura_points
-        })
-
-    # Separate the top 3 and paginate the rest
-    top_3 = ranked_users[:3]
-    paginator = Paginator(ranked_users[3:], 7)
+    # Ranks (with ties) come from the leaderboard index, only the shown rows are queried
+    top_3 = RankedProfiles()[:3]
+    paginator = Paginator(RankedProfiles(offset=3), 7)
     page_number = request.GET.get('page')
     paginated_users = paginator.get_page(page_number)
 
@@ -2404,9 +2286,8 @@ def admin_wordcountdown(request):
 
 from .forms import SentenceForm
 
+@staff_member_required
 def sentence_customadmin(request):
-    sentences = Sentence.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = SentenceForm(request.POST)
@@ -2427,8 +2308,10 @@ def sentence_customadmin(request):
             return redirect('sentence_customadmin')
     
     form = SentenceForm()  # For creating a new sentence
+    listing = admin_lists.listing(request, 'sentence')
     return render(request, 'sentence_customadmin.html', {
-        'sentences': sentences,
+        'sentences': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
@@ -2436,9 +2319,8 @@ def sentence_customadmin(request):
 
 from .forms import PassageForm
 
+@staff_member_required
 def passage_customadmin(request):
-    passages = Passage.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = PassageForm(request.POST)
@@ -2463,8 +2345,10 @@ def passage_customadmin(request):
             return redirect('passage_customadmin')
     
     form = PassageForm()  # For creating a new passage
+    listing = admin_lists.listing(request, 'passage')
     return render(request, 'passage_customadmin.html', {
-        'passages': passages,
+        'passages': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
@@ -2472,9 +2356,8 @@ def passage_customadmin(request):
 
 from .forms import DescriptiveImageForm, DescriptiveSentenceQuestionForm
 
+@staff_member_required
 def descriptive_image_customadmin(request):
-    images = DescriptiveImage.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = DescriptiveImageForm(request.POST, request.FILES)
@@ -2497,14 +2380,15 @@ def descriptive_image_customadmin(request):
             return redirect('descriptive_image_customadmin')
     
     form = DescriptiveImageForm()
+    listing = admin_lists.listing(request, 'descriptive_image')
     return render(request, 'descriptive_image_customadmin.html', {
-        'images': images,
+        'images': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
+@staff_member_required
 def descriptive_sentence_question_customadmin(request):
-    questions = DescriptiveSentenceQuestion.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = DescriptiveSentenceQuestionForm(request.POST, request.FILES)
@@ -2527,17 +2411,18 @@ def descriptive_sentence_question_customadmin(request):
             return redirect('descriptive_sentence_question_customadmin')
     
     form = DescriptiveSentenceQuestionForm()
+    listing = admin_lists.listing(request, 'descriptive_sentence_question')
     return render(request, 'descriptive_sentence_question_customadmin.html', {
-        'questions': questions,
+        'questions': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import FillInTheBlankForm, NumbersForm
 
+@staff_member_required
 def fill_in_the_blank_customadmin(request):
-    questions = FillInTheBlank.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = FillInTheBlankForm(request.POST)
@@ -2560,14 +2445,15 @@ def fill_in_the_blank_customadmin(request):
             return redirect('fill_in_the_blank_customadmin')
     
     form = FillInTheBlankForm()
+    listing = admin_lists.listing(request, 'fill_in_the_blank')
     return render(request, 'fill_in_the_blank_customadmin.html', {
-        'questions': questions,
+        'questions': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
+@staff_member_required
 def numbers_customadmin(request):
-    numbers_list = Numbers.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = NumbersForm(request.POST)
@@ -2590,8 +2476,10 @@ def numbers_customadmin(request):
             return redirect('numbers_customadmin')
     
     form = NumbersForm()
+    listing = admin_lists.listing(request, 'numbers')
     return render(request, 'numbers_customadmin.html', {
-        'numbers': numbers_list,
+        'numbers': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
@@ -2599,9 +2487,8 @@ def numbers_customadmin(request):
 from .models import WritingSubmission
 from .forms import WritingSubmissionForm
 
+@staff_member_required
 def writing_submission_customadmin(request):
-    submissions = WritingSubmission.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = WritingSubmissionForm(request.POST)
@@ -2624,17 +2511,18 @@ def writing_submission_customadmin(request):
             return redirect('writing_submission_customadmin')
     
     form = WritingSubmissionForm()
+    listing = admin_lists.listing(request, 'writing_submission')
     return render(request, 'writing_submission_customadmin.html', {
-        'submissions': submissions,
+        'submissions': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import VideoForm
 
+@staff_member_required
 def video_customadmin(request):
-    videos = Video.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = VideoForm(request.POST, request.FILES)
@@ -2657,17 +2545,18 @@ def video_customadmin(request):
             return redirect('video_customadmin')
     
     form = VideoForm()
+    listing = admin_lists.listing(request, 'video')
     return render(request, 'video_customadmin.html', {
-        'videos': videos,
+        'videos': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import VideoResponseForm, WordAudioRecordingForm
 
+@staff_member_required
 def video_response_customadmin(request):
-    responses = VideoResponse.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = VideoResponseForm(request.POST)
@@ -2690,16 +2579,15 @@ def video_response_customadmin(request):
             return redirect('video_response_customadmin')
     
     form = VideoResponseForm()
-    videos = Video.objects.all()  # For the dropdown
+    listing = admin_lists.listing(request, 'video_response')
     return render(request, 'video_response_customadmin.html', {
-        'responses': responses,
+        'responses': listing.rows,
+        'listing': listing,
         'form': form,
-        'videos': videos,
     })
 
+@staff_member_required
 def word_audio_recording_customadmin(request):
-    recordings = WordAudioRecording.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = WordAudioRecordingForm(request.POST, request.FILES)
@@ -2722,20 +2610,19 @@ def word_audio_recording_customadmin(request):
             return redirect('word_audio_recording_customadmin')
     
     form = WordAudioRecordingForm()
-    word_audios = WordAudio.objects.all()  # For the dropdown
+    listing = admin_lists.listing(request, 'word_audio_recording')
     return render(request, 'word_audio_recording_customadmin.html', {
-        'recordings': recordings,
+        'recordings': listing.rows,
+        'listing': listing,
         'form': form,
-        'word_audios': word_audios,
     })
 
 
 from .models import Paragraph, VoiceRecording
 from .forms import ParagraphForm, VoiceRecordingForm
 
+@staff_member_required
 def paragraph_customadmin(request):
-    paragraphs = Paragraph.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = ParagraphForm(request.POST)
@@ -2758,14 +2645,15 @@ def paragraph_customadmin(request):
             return redirect('paragraph_customadmin')
     
     form = ParagraphForm()
+    listing = admin_lists.listing(request, 'paragraph')
     return render(request, 'paragraph_customadmin.html', {
-        'paragraphs': paragraphs,
+        'paragraphs': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
+@staff_member_required
 def voice_recording_customadmin(request):
-    recordings = VoiceRecording.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = VoiceRecordingForm(request.POST, request.FILES)
@@ -2788,17 +2676,18 @@ def voice_recording_customadmin(request):
             return redirect('voice_recording_customadmin')
     
     form = VoiceRecordingForm()
+    listing = admin_lists.listing(request, 'voice_recording')
     return render(request, 'voice_recording_customadmin.html', {
-        'recordings': recordings,
+        'recordings': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import ParagraphCreationForm
 
+@staff_member_required
 def paragraph_creation_customadmin(request):
-    paragraphs = ParagraphCreation.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = ParagraphCreationForm(request.POST)
@@ -2821,17 +2710,18 @@ def paragraph_creation_customadmin(request):
             return redirect('paragraph_creation_customadmin')
     
     form = ParagraphCreationForm()
+    listing = admin_lists.listing(request, 'paragraph_creation')
     return render(request, 'paragraph_creation_customadmin.html', {
-        'paragraphs': paragraphs,
+        'paragraphs': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import AmharicLetterFamilyForm, AmharicLetterAudioForm
 
+@staff_member_required
 def amharic_letter_family_customadmin(request):
-    families = AmharicLetterFamily.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = AmharicLetterFamilyForm(request.POST)
@@ -2854,14 +2744,15 @@ def amharic_letter_family_customadmin(request):
             return redirect('amharic_letter_family_customadmin')
     
     form = AmharicLetterFamilyForm()
+    listing = admin_lists.listing(request, 'amharic_letter_family')
     return render(request, 'amharic_letter_family_customadmin.html', {
-        'families': families,
+        'families': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
+@staff_member_required
 def amharic_letter_audio_customadmin(request):
-    audios = AmharicLetterAudio.objects.all()
-    
     if request.method == 'POST':
         if 'create' in request.POST:
             form = AmharicLetterAudioForm(request.POST, request.FILES)
@@ -2884,19 +2775,18 @@ def amharic_letter_audio_customadmin(request):
             return redirect('amharic_letter_audio_customadmin')
     
     form = AmharicLetterAudioForm()
-    families = AmharicLetterFamily.objects.all()  # For the dropdown
+    listing = admin_lists.listing(request, 'amharic_letter_audio')
     return render(request, 'amharic_letter_audio_customadmin.html', {
-        'audios': audios,
+        'audios': listing.rows,
+        'listing': listing,
         'form': form,
-        'families': families,
     })
 
 
 from .forms import LetterFillInForm, NumberToWordForm
 
+@staff_member_required
 def letter_fill_in_customadmin(request):
-    letters = LetterFillIn.objects.all()
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = LetterFillInForm(request.POST)
@@ -2919,14 +2809,15 @@ def letter_fill_in_customadmin(request):
             return redirect('letter_fill_in_customadmin')
 
     form = LetterFillInForm()
+    listing = admin_lists.listing(request, 'letter_fill_in')
     return render(request, 'letter_fill_in_customadmin.html', {
-        'letters': letters,
+        'letters': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
+@staff_member_required
 def number_to_word_customadmin(request):
-    numbers = NumberToWord.objects.all()
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = NumberToWordForm(request.POST)
@@ -2949,17 +2840,18 @@ def number_to_word_customadmin(request):
             return redirect('number_to_word_customadmin')
 
     form = NumberToWordForm()
+    listing = admin_lists.listing(request, 'number_to_word')
     return render(request, 'number_to_word_customadmin.html', {
-        'numbers': numbers,
+        'numbers': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import AmharicEnglishMatchingForm, SentenceSynonymForm
 
+@staff_member_required
 def amharic_english_matching_customadmin(request):
-    matches = AmharicEnglishMatching.objects.all()
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = AmharicEnglishMatchingForm(request.POST)
@@ -2982,14 +2874,15 @@ def amharic_english_matching_customadmin(request):
             return redirect('amharic_english_matching_customadmin')
 
     form = AmharicEnglishMatchingForm()
+    listing = admin_lists.listing(request, 'amharic_english_matching')
     return render(request, 'amharic_english_matching_customadmin.html', {
-        'matches': matches,
+        'matches': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
+@staff_member_required
 def sentence_synonym_customadmin(request):
-    synonyms = SentenceSynonym.objects.all()
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = SentenceSynonymForm(request.POST)
@@ -3012,17 +2905,18 @@ def sentence_synonym_customadmin(request):
             return redirect('sentence_synonym_customadmin')
 
     form = SentenceSynonymForm()
+    listing = admin_lists.listing(request, 'sentence_synonym')
     return render(request, 'sentence_synonym_customadmin.html', {
-        'synonyms': synonyms,
+        'synonyms': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import SentencePunctuationForm
 
+@staff_member_required
 def sentence_punctuation_customadmin(request):
-    sentences = SentencePunctuation.objects.all()
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = SentencePunctuationForm(request.POST)
@@ -3045,17 +2939,18 @@ def sentence_punctuation_customadmin(request):
             return redirect('sentence_punctuation_customadmin')
 
     form = SentencePunctuationForm()
+    listing = admin_lists.listing(request, 'sentence_punctuation')
     return render(request, 'sentence_punctuation_customadmin.html', {
-        'sentences': sentences,
+        'sentences': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import StoryForm, StoryPartForm, StoryQuestionForm
 
+@staff_member_required
 def story_customadmin(request):
-    stories = Story.objects.all()
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = StoryForm(request.POST, request.FILES)
@@ -3078,14 +2973,15 @@ def story_customadmin(request):
             return redirect('story_customadmin')
 
     form = StoryForm()
+    listing = admin_lists.listing(request, 'story')
     return render(request, 'story_customadmin.html', {
-        'stories': stories,
+        'stories': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
+@staff_member_required
 def story_part_customadmin(request):
-    story_parts = StoryPart.objects.all()
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = StoryPartForm(request.POST, request.FILES)
@@ -3108,14 +3004,15 @@ def story_part_customadmin(request):
             return redirect('story_part_customadmin')
 
     form = StoryPartForm()
+    listing = admin_lists.listing(request, 'story_part')
     return render(request, 'story_part_customadmin.html', {
-        'story_parts': story_parts,
+        'story_parts': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
+@staff_member_required
 def story_question_customadmin(request):
-    questions = StoryQuestion.objects.all()
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = StoryQuestionForm(request.POST)
@@ -3138,8 +3035,10 @@ def story_question_customadmin(request):
             return redirect('story_question_customadmin')
 
     form = StoryQuestionForm()
+    listing = admin_lists.listing(request, 'story_question')
     return render(request, 'story_question_customadmin.html', {
-        'questions': questions,
+        'questions': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
@@ -3147,47 +3046,32 @@ def story_question_customadmin(request):
 
 from django.core.exceptions import PermissionDenied
 from django.http import Http404
+from django.db.models import Prefetch
 
 @login_required
 def slide_view(request, slide_id=None):
     try:
-        # Get user profile and accessible levels
+        # Get user profile and accessible levels, the sidebar tree comes from the cached outline
         user_profile = request.user.userprofile
-        levels = Level.objects.filter(order__lte=user_profile.related_level.order)
+        levels = [level for level in outline.levels() if level.order <= user_profile.related_level.order]
         slide = None
         contents = None
         selected_level_id = None
         selected_module_id = None
         next_slide = None
 
-        # Unlock the first slide logic
-        first_unlocked = False
-        for level in levels.order_by('order'):
-            user_level_progress, created = UserLevelProgress.objects.get_or_create(user=request.user, level=level)
-            if user_level_progress.is_locked and not first_unlocked:
-                user_level_progress.is_locked = False
-                user_level_progress.save()
-                first_unlocked = True
-
-            first_module = level.modules.order_by('order').first()
-            if first_module:
-                user_module_progress, created = UserModuleProgress.objects.get_or_create(user=request.user, module=first_module)
-                if user_module_progress.is_locked and not first_unlocked:
-                    user_module_progress.is_locked = False
-                    user_module_progress.save()
-
-                first_slide = first_module.slides.order_by('order').first()
-                if first_slide:
-                    user_slide_progress, created = UserSlideProgress.objects.get_or_create(user=request.user, slide=first_slide)
-                    if not user_slide_progress.is_completed and not first_unlocked:
-                        user_slide_progress.is_completed = True
-                        user_slide_progress.save()
-                        first_unlocked = True
-                    break
+        # Progress for every slide in one query, then unlock the first slide
+        user_slide_progress_dict = slide_progress_map(request.user)
+        unlock_first_steps(request.user, levels, user_slide_progress_dict)
 
         if slide_id:
             # Get the current slide
-            slide = get_object_or_404(Slide, id=slide_id)
+            slide = get_object_or_404(
+                Slide.objects.select_related('module__level', 'question').prefetch_related(
+                    Prefetch('contents', queryset=SlideContent.objects.order_by('order'))
+                ),
+                id=slide_id,
+            )
 
             # Check if the slide belongs to a locked level
             user_level_progress = UserLevelProgress.objects.filter(user=request.user, level=slide.module.level).first()
@@ -3196,44 +3080,22 @@ def slide_view(request, slide_id=None):
                 return redirect('e_learning:level_overview')  # Redirect to an overview page
 
             # Track user progress for the slide
-            user_slide_progress, created = UserSlideProgress.objects.get_or_create(user=request.user, slide=slide)
+            if slide.id not in user_slide_progress_dict:
+                UserSlideProgress.objects.get_or_create(user=request.user, slide=slide)
+                user_slide_progress_dict[slide.id] = {'is_completed': False}
             if 'mark_completed' in request.GET:
-                user_slide_progress.is_completed = True
-                user_slide_progress.completed_at = timezone.now()
-                user_slide_progress.save()
+                UserSlideProgress.objects.filter(user=request.user, slide=slide).update(
+                    is_completed=True, completed_at=timezone.now()
+                )
+                user_slide_progress_dict[slide.id] = {'is_completed': True}
 
             # Get slide contents and navigation details
-            contents = slide.contents.order_by('order')
+            contents = slide.contents.all()
             selected_level_id = slide.module.level.id
             selected_module_id = slide.module.id
 
-            # Determine the next slide
-            next_slide = (
-                Slide.objects.filter(module=slide.module, order__gt=slide.order)
-                .order_by('order')
-                .first()
-            )
-
-            # If no next slide, find the first slide in the next module
-            if not next_slide:
-                next_module = (
-                    Module.objects.filter(level=slide.module.level, order__gt=slide.module.order)
-                    .order_by('order')
-                    .first()
-                )
-                if next_module:
-                    next_slide = next_module.slides.order_by('order').first()
-
-        # Prepare a progress dictionary for rendering
-        user_slide_progress_dict = {
-            slide.id: {
-                'is_completed': (
-                    slide.user_progress.filter(user=request.user).first().is_completed
-                    if slide.user_progress.filter(user=request.user).exists() else False
-                )
-            }
-            for slide in Slide.objects.all()
-        }
+            # Determine the next slide from the cached course outline
+            next_slide = outline.slide(outline.next_slide_id(slide.id))
 
         return render(request, 'e_learning/slide_view.html', {
             'levels': levels,
@@ -3365,9 +3227,8 @@ def create_slide_content(request, slide_id):
 #custom admin continued 
 from .forms import LevelForm
 
+@staff_member_required
 def level_customadmin(request):
-    levels = Level.objects.all()
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = LevelForm(request.POST)
@@ -3390,18 +3251,18 @@ def level_customadmin(request):
             return redirect('level_customadmin')
 
     form = LevelForm()
+    listing = admin_lists.listing(request, 'level')
     return render(request, 'level_customadmin.html', {
-        'levels': levels,
+        'levels': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import ModuleForm
 
+@staff_member_required
 def module_customadmin(request):
-    modules = Module.objects.all()
-    levels = Level.objects.all()  # Get all levels for the dropdown
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = ModuleForm(request.POST)
@@ -3424,9 +3285,10 @@ def module_customadmin(request):
             return redirect('module_customadmin')
 
     form = ModuleForm()
+    listing = admin_lists.listing(request, 'module')
     return render(request, 'module_customadmin.html', {
-        'modules': modules,
-        'levels': levels,
+        'modules': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
@@ -3434,10 +3296,8 @@ from django.shortcuts import render, get_object_or_404, redirect
 from .models import Slide, Module
 from .forms import SlideForm
 
+@staff_member_required
 def slide_customadmin(request):
-    slides = Slide.objects.all()
-    modules = Module.objects.all()  # Get all modules for the dropdown
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = SlideForm(request.POST)
@@ -3460,9 +3320,10 @@ def slide_customadmin(request):
             return redirect('slide_customadmin')
 
     form = SlideForm()
+    listing = admin_lists.listing(request, 'slide')
     return render(request, 'slide_customadmin.html', {
-        'slides': slides,
-        'modules': modules,
+        'slides': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
@@ -3470,10 +3331,8 @@ def slide_customadmin(request):
 
 from .forms import SlideContentForm
 
+@staff_member_required
 def slide_content_customadmin(request):
-    slide_contents = SlideContent.objects.all()
-    slides = Slide.objects.all()  # Get all slides for the dropdown
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = SlideContentForm(request.POST, request.FILES)  # Include request.FILES for file uploads
@@ -3496,18 +3355,17 @@ def slide_content_customadmin(request):
             return redirect('slide_content_customadmin')
 
     form = SlideContentForm()
+    listing = admin_lists.listing(request, 'slide_content')
     return render(request, 'slide_content_customadmin.html', {
-        'slide_contents': slide_contents,
-        'slides': slides,
+        'slide_contents': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 from .forms import SlideQuestionForm
 
+@staff_member_required
 def slide_question_customadmin(request):
-    slide_questions = SlideQuestion.objects.all()
-    slides = Slide.objects.all()  # Get all slides for the dropdown
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = SlideQuestionForm(request.POST)
@@ -3530,9 +3388,10 @@ def slide_question_customadmin(request):
             return redirect('slide_question_customadmin')
 
     form = SlideQuestionForm()
+    listing = admin_lists.listing(request, 'slide_question')
     return render(request, 'slide_question_customadmin.html', {
-        'slide_questions': slide_questions,
-        'slides': slides,
+        'slide_questions': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
@@ -3541,11 +3400,8 @@ from .models import UserSlideProgress, Slide
 from .forms import UserSlideProgressForm
 from django.contrib.auth.models import User
 
+@staff_member_required
 def user_slide_progress_customadmin(request):
-    progress_records = UserSlideProgress.objects.all()
-    slides = Slide.objects.all()  # Get all slides for the dropdown
-    users = User.objects.all()  # Get all users for the dropdown
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = UserSlideProgressForm(request.POST)
@@ -3568,21 +3424,18 @@ def user_slide_progress_customadmin(request):
             return redirect('user_slide_progress_customadmin')
 
     form = UserSlideProgressForm()
+    listing = admin_lists.listing(request, 'user_slide_progress')
     return render(request, 'user_slide_progress_customadmin.html', {
-        'progress_records': progress_records,
-        'slides': slides,
-        'users': users,
+        'progress_records': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import UserLevelProgressForm
 
+@staff_member_required
 def user_level_progress_customadmin(request):
-    progress_records = UserLevelProgress.objects.all()
-    levels = Level.objects.all()  # Get all levels for the dropdown
-    users = User.objects.all()    # Get all users for the dropdown
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = UserLevelProgressForm(request.POST)
@@ -3605,21 +3458,18 @@ def user_level_progress_customadmin(request):
             return redirect('user_level_progress_customadmin')
 
     form = UserLevelProgressForm()
+    listing = admin_lists.listing(request, 'user_level_progress')
     return render(request, 'user_level_progress_customadmin.html', {
-        'progress_records': progress_records,
-        'levels': levels,
-        'users': users,
+        'progress_records': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import UserModuleProgressForm
 
+@staff_member_required
 def user_module_progress_customadmin(request):
-    progress_records = UserModuleProgress.objects.all()
-    modules = Module.objects.all()  # Get all modules for the dropdown
-    users = User.objects.all()       # Get all users for the dropdown
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = UserModuleProgressForm(request.POST)
@@ -3642,21 +3492,18 @@ def user_module_progress_customadmin(request):
             return redirect('user_module_progress_customadmin')
 
     form = UserModuleProgressForm()
+    listing = admin_lists.listing(request, 'user_module_progress')
     return render(request, 'user_module_progress_customadmin.html', {
-        'progress_records': progress_records,
-        'modules': modules,
-        'users': users,
+        'progress_records': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import UserProfileForm
 
+@staff_member_required
 def user_profile_customadmin(request):
-    profiles = UserProfile.objects.all()
-    levels = Level.objects.all()  # Get all levels for the dropdown
-    users = User.objects.all()     # Get all users for the dropdown
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = UserProfileForm(request.POST)
@@ -3679,20 +3526,18 @@ def user_profile_customadmin(request):
             return redirect('user_profile_customadmin')
 
     form = UserProfileForm()
+    listing = admin_lists.listing(request, 'user_profile')
     return render(request, 'user_profile_customadmin.html', {
-        'profiles': profiles,
-        'levels': levels,
-        'users': users,
+        'profiles': listing.rows,
+        'listing': listing,
         'form': form,
     })
 
 
 from .forms import PointHistoryForm
 
+@staff_member_required
 def point_history_customadmin(request):
-    histories = PointHistory.objects.all()
-    profiles = UserProfile.objects.all()  # Get all user profiles for the dropdown
-
     if request.method == 'POST':
         if 'create' in request.POST:
             form = PointHistoryForm(request.POST)
@@ -3715,8 +3560,31 @@ def point_history_customadmin(request):
             return redirect('point_history_customadmin')
 
     form = PointHistoryForm()
+    listing = admin_lists.listing(request, 'point_history')
     return render(request, 'point_history_customadmin.html', {
-        'histories': histories,
-        'profiles': profiles,
+        'histories': listing.rows,
+        'listing': listing,
         'form': form,
-    })
\ No newline at end of file
+    })
+
+
+### --------- Request Metrics ------------
+
+@staff_member_required
+def request_metrics_customadmin(request):
+    # Percentiles per page over the samples of every worker, see request_metrics.py
+    return render(request, 'request_metrics_customadmin.html', {
+        'rows': request_metrics.summary(),
+        'max_samples': request_metrics.MAX_SAMPLES,
+        'slow_request_ms': settings.SLOW_REQUEST_MS,
+    })
+
+
+### --------- Custom Admin Autocomplete ------------
+
+@staff_member_required
+def admin_autocomplete(request, source):
+    # Matches for the search boxes of the custom admin pages, see admin_lists.py
+    if source not in admin_lists.SOURCES:
+        return JsonResponse({'error': 'Unknown source'}, status=404)
+    return JsonResponse({'results': admin_lists.autocomplete(source, request.GET.get('q', '').strip())})
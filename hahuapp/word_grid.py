@@ -0,0 +1,120 @@
+from collections import namedtuple
+
+import numpy as np
+
+### ---------------- Word Search Grids -------------------
+#
+# Places words in a square grid of letters, in any of the eight directions
+# (horizontal, vertical, diagonal, each either way), and fills the rest with
+# random letters. Words never share a cell: word_hunt.html locks the cells
+# of a found word, so a word crossing it could never be selected.
+#
+# Placement is a backtracking search, longest word first. For each word all
+# fitting positions are found at once with NumPy: the cells each candidate
+# would cover are gathered into an (n, len(word)) array and compared with the
+# word. The candidates are tried in random order. Every candidate tried counts
+# against ATTEMPT_BUDGET. When the budget runs out the grid is made one size
+# larger, up to MAX_GROWTH times, unless the caller asked for a size. The
+# work per board is therefore bounded whatever the words, and the same seed
+# always gives the same board.
+
+ATTEMPT_BUDGET = 2000
+MAX_GROWTH = 2
+MIN_SIZE = 6
+
+STRAIGHT = ((0, 1), (1, 0))
+DIAGONAL = ((1, 1), (-1, 1))
+
+WordGrid = namedtuple('WordGrid', ['grid', 'placements'])  # placements: (word, row, col, d_row, d_col)
+
+
+class GridError(ValueError):
+    pass
+
+
+def directions(diagonal=True, reverse=True):
+    forward = STRAIGHT + (DIAGONAL if diagonal else ())
+    if not reverse:
+        return forward
+    return forward + tuple((-d_row, -d_col) for d_row, d_col in forward)
+
+
+def candidates(grid, word, moves):
+    """Every (row, col, d_row, d_col) where `word` fits in `grid` as it is now, on empty cells only."""
+    size = grid.shape[0]
+    steps = np.arange(len(word))
+    found = []
+    for d_row, d_col in moves:
+        # Starting cells from which the word stays inside the grid
+        rows = np.arange(size)
+        cols = np.arange(size)
+        end = len(word) - 1
+        rows = rows[(rows + d_row * end >= 0) & (rows + d_row * end < size)]
+        cols = cols[(cols + d_col * end >= 0) & (cols + d_col * end < size)]
+        if not len(rows) or not len(cols):
+            continue
+        starts_row, starts_col = (axis.ravel() for axis in np.meshgrid(rows, cols, indexing='ij'))
+        cells = grid[starts_row[:, None] + d_row * steps, starts_col[:, None] + d_col * steps]
+        fits = (cells == '').all(axis=1)
+        found.extend((int(row), int(col), d_row, d_col) for row, col in zip(starts_row[fits], starts_col[fits]))
+    return found
+
+
+def place(grid, words, moves, rng, budget):
+    """
+    Backtracking placement of `words` into `grid` (modified in place). Returns
+    the placements, or None when they don't fit within the budget. `budget` is
+    a one-item list, so every level of the search draws from the same count.
+    """
+    if not words:
+        return []
+    word, rest = words[0], words[1:]
+    options = candidates(grid, word, moves)
+    steps = np.arange(len(word))
+    for index in rng.permutation(len(options)):
+        if budget[0] <= 0:
+            return None
+        budget[0] -= 1
+        row, col, d_row, d_col = options[index]
+        rows, cols = row + d_row * steps, col + d_col * steps
+        grid[rows, cols] = list(word)
+        placements = place(grid, rest, moves, rng, budget)
+        if placements is not None:
+            return [(word, row, col, d_row, d_col)] + placements
+        grid[rows, cols] = ''  # Undo and try the next position
+    return None
+
+
+def generate(words, letters, seed=None, size=None, diagonal=True, reverse=True, budget=ATTEMPT_BUDGET):
+    """
+    Build a WordGrid holding every word in `words`, with the empty cells filled
+    from `letters`. `seed` may be an int or a numpy Generator. Raises GridError
+    when the words can't be placed.
+    """
+    if not words or not letters:
+        raise GridError("A grid needs words and letters")
+    longest = max(len(word) for word in words)
+    if size is not None and longest > size:
+        raise GridError(f"A word of {longest} letters doesn't fit in a {size}x{size} grid")
+    if size:
+        sizes = [size]  # A size that was asked for is kept
+    else:
+        smallest = max(longest + 2, MIN_SIZE)
+        sizes = range(smallest, smallest + MAX_GROWTH + 1)
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    moves = directions(diagonal, reverse)
+    ordered = sorted(words, key=len, reverse=True)
+
+    for grid_size in sizes:
+        grid = np.full((grid_size, grid_size), '', dtype='<U1')
+        placements = place(grid, ordered, moves, rng, [budget])
+        if placements is not None:
+            empty = grid == ''
+            grid[empty] = rng.choice(list(letters), size=int(empty.sum()))
+            return WordGrid(grid, placements)
+    raise GridError(f"Couldn't place {len(words)} words within {budget} attempts")
+
+
+def as_rows(word_grid):
+    """The grid as a list of row strings."""
+    return [''.join(row) for row in word_grid.grid]